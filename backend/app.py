@@ -13,8 +13,11 @@ print("🔥 Initializing Firebase before importing services...")
 firebase_initialized = initialize_firebase()
 
 if not firebase_initialized:
-    print("❌ Failed to initialize Firebase - exiting")
-    exit(1)
+    if os.getenv('DATA_BACKEND', 'firestore').lower() == 'memory':
+        print("⚠️  Firebase not initialized - continuing with the in-memory data backend")
+    else:
+        print("❌ Failed to initialize Firebase - exiting")
+        exit(1)
 
 # NOW import everything else - Firebase is ready
 from routes.profile import profile_bp
@@ -25,11 +28,26 @@ from routes.restaurants import restaurants_bp
 from routes.customer import customer_bp
 from routes.agent import agent_bp  # Add agent routes
 from routes.payment import payment_bp
+from middleware.auth import get_token_cache_stats
+from middleware.compression import init_compression
+from utils.json_provider import FastJSONProvider
+from services.role_service import role_service
+from data.identity_map import get_identity_map_stats
+from services.catalog_service import catalog_service
+from services.search_service import search_service
+from services.autocomplete_service import autocomplete_service
+from services.delivery_area_service import delivery_area_service
+from services.menu_cache import menu_cache
+from services.cart_store import cart_store
+from services.pricing_service import pricing_service
+from services.claim_arbiter import claim_arbiter
 
 
 def create_app():
     """Application factory pattern"""
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    init_compression(app)
     
     # Simple CORS setup for development
     CORS(app)
@@ -44,6 +62,15 @@ def create_app():
     app.register_blueprint(agent_bp)  # Register agent routes
     app.register_blueprint(payment_bp)
     
+    @app.after_request
+    def report_document_reads(response):
+        """Report document reads made and saved by the request's identity map"""
+        stats = get_identity_map_stats()
+        if stats:
+            response.headers['X-Document-Reads'] = str(stats['reads'])
+            response.headers['X-Document-Reads-Saved'] = str(stats['reads_saved'])
+        return response
+    
     # Basic routes
     @app.route('/static/uploads/<path:filename>')
     def uploaded_file(filename):
@@ -77,6 +104,8 @@ def create_app():
                     "PUT /api/customer/orders/<id>/cancel",
                     "GET/PUT /api/customer/profile",
                     "GET /api/customer/search",
+                    "GET /api/customer/search/dishes",
+                    "GET /api/customer/autocomplete",
                     "GET /api/customer/cuisines"
                 ],
                 "restaurants": [
@@ -119,7 +148,19 @@ def create_app():
                 "agent_delivery",
                 "role_based_access"
             ],
-            "cors": "enabled_for_all_origins"
+            "cors": "enabled_for_all_origins",
+            "caches": {
+                "verified_tokens": get_token_cache_stats(),
+                "user_roles": role_service.get_cache_stats(),
+                "restaurant_catalog": catalog_service.get_stats(),
+                "search_indexes": search_service.get_stats(),
+                "autocomplete": autocomplete_service.get_stats(),
+                "delivery_areas": delivery_area_service.get_stats(),
+                "restaurant_menus": menu_cache.stats(),
+                "pending_carts": cart_store.stats(),
+                "menu_prices": pricing_service.stats(),
+                "order_claims": claim_arbiter.stats()
+            }
         })
     
     return app
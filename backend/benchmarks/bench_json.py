@@ -0,0 +1,120 @@
+# backend/benchmarks/bench_json.py
+"""Serialization cost of a 500-order /api/restaurants/orders response
+
+Times the same payload through the Flask test client three ways:
+- the previous path: Flask's default provider (standard library encoder),
+  with the isoformat() loop the restaurant order views used to run;
+- FastJSONProvider (orjson when installed), handed the datetimes as-is;
+- FastJSONProvider with response compression, for a client sending
+  Accept-Encoding: br, gzip.
+
+Run from backend/:  python -m benchmarks.bench_json [orders]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATA_BACKEND', 'memory')
+
+from flask import Flask, jsonify
+
+from middleware.compression import CONTENT_ENCODINGS, init_compression
+from utils.json_provider import FastJSONProvider, orjson
+
+ROUNDS = 200
+STATUSES = ('confirmed', 'preparing', 'ready', 'assigned_to_agent', 'picked_up', 'on_way', 'delivered')
+DISHES = ('Chicken Biryani', 'Paneer Tikka', 'Garlic Naan', 'Dal Makhani', 'Mango Lassi', 'Gulab Jamun')
+
+
+def make_orders(count: int):
+    rng = random.Random(7)
+    start = datetime(2026, 10, 1, 11, 0)
+    orders = []
+    for i in range(count):
+        created = start + timedelta(minutes=7 * i)
+        items = []
+        for _ in range(rng.randint(1, 5)):
+            price = round(rng.uniform(3, 20), 2)
+            quantity = rng.randint(1, 3)
+            items.append({'menu_item_id': f'item-{rng.randint(1, 60)}', 'name': rng.choice(DISHES),
+                          'price': price, 'quantity': quantity, 'line_total': round(price * quantity, 2)})
+        subtotal = round(sum(item['line_total'] for item in items), 2)
+        orders.append({
+            'id': f'order_{i:012x}',
+            'order_number': f'ORD20261001{i:06X}',
+            'customer_id': f'customer-{rng.randint(1, 300)}',
+            'restaurant_id': 'restaurant-1',
+            'items': items,
+            'delivery_address': {'address_line_1': f'{rng.randint(1, 400)} Park Street', 'city': 'Kolkata',
+                                 'postal_code': '700016', 'lat': 22.55, 'lng': 88.35},
+            'special_instructions': rng.choice(('', 'Less spicy', 'Ring the bell twice')),
+            'payment_method': rng.choice(('online', 'cash')),
+            'payment_status': 'PAID',
+            'subtotal': subtotal,
+            'delivery_fee': 2.5,
+            'tax_rate': 5,
+            'tax': round(subtotal * 0.05, 2),
+            'total': round(subtotal * 1.05 + 2.5, 2),
+            'status': rng.choice(STATUSES),
+            'created_at': created,
+            'confirmed_at': created + timedelta(seconds=30),
+            'updated_at': created + timedelta(minutes=rng.randint(1, 60))
+        })
+    return orders
+
+
+def make_app(orders, fast: bool, compress: bool) -> Flask:
+    app = Flask(__name__)
+    if fast:
+        app.json = FastJSONProvider(app)
+    if compress:
+        init_compression(app)
+
+    @app.route('/orders')
+    def list_orders():
+        if fast:
+            page = orders
+        else:
+            # What get_restaurant_orders did before the JSON provider handled datetimes
+            page = []
+            for order in orders:
+                order_data = dict(order)
+                for key in ('created_at', 'updated_at', 'confirmed_at'):
+                    if order_data.get(key) and hasattr(order_data[key], 'isoformat'):
+                        order_data[key] = order_data[key].isoformat()
+                page.append(order_data)
+        return jsonify({'success': True, 'data': {'orders': page, 'next_cursor': None}})
+
+    return app
+
+
+def time_requests(app: Flask, label: str):
+    client = app.test_client()
+    headers = {'Accept-Encoding': 'br, gzip'}
+    response = client.get('/orders', headers=headers)
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        client.get('/orders', headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    encoding = response.headers.get('Content-Encoding', 'identity')
+    print(f"{label:<34} p50 {statistics.median(samples):6.1f} ms   p99 {samples[int(0.99 * len(samples))]:6.1f} ms   "
+          f"{len(response.data) / 1024:6.0f} KB ({encoding})")
+
+
+def main(count: int = 500):
+    orders = make_orders(count)
+    print(f"{count} orders, {ROUNDS} requests each; orjson {'installed' if orjson else 'not installed'}, "
+          f"encodings offered: {', '.join(CONTENT_ENCODINGS)}")
+    time_requests(make_app(orders, fast=False, compress=False), 'stdlib jsonify + isoformat loop')
+    time_requests(make_app(orders, fast=True, compress=False), 'FastJSONProvider')
+    time_requests(make_app(orders, fast=True, compress=True), 'FastJSONProvider + compression')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_order_claims.py
+"""Agents racing to claim a pool of ready orders
+
+Hundreds of simulated agents, spread over several workers that each have
+their own AgentService and ClaimArbiter (as separate processes would),
+start at once and walk the order pool in their own random order calling
+accept_order until they get one. Losing contenders are refused either by
+their worker's arbiter, without a round trip, or by the claim transaction.
+
+Reports claim attempts per second, how the losers were refused, and
+checks that no order was assigned twice: every order has one
+assigned_to_agent event and the agent it is stored with, and no agent got
+more than one order.
+
+Run from backend/:  python -m benchmarks.bench_order_claims [agents] [orders] [workers]
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+os.environ.setdefault('DATA_BACKEND', 'memory')
+
+from data.memory_store import MemoryClient
+from services.agent_service import AgentService
+from services.claim_arbiter import ClaimArbiter
+from services.order_lifecycle import OrderLifecycle
+
+
+def run(agents: int = 400, orders: int = 100, workers: int = 4):
+    db = MemoryClient()
+    lifecycle = OrderLifecycle(db=db)
+    order_ids = [f'order-{i}' for i in range(orders)]
+    for order_id in order_ids:
+        lifecycle.create(order_id, {'restaurant_id': 'r1', 'customer_id': 'c1'}, 'ready', 'restaurant', 'r1')
+
+    arbiters = [ClaimArbiter() for _ in range(workers)]
+    services = [AgentService(db=db, lifecycle=lifecycle, arbiter=arbiter) for arbiter in arbiters]
+
+    won = {}
+    attempts = Counter()
+    results_lock = threading.Lock()
+    start = threading.Barrier(agents + 1)
+
+    def agent(index: int):
+        agent_id = f'agent-{index}'
+        service = services[index % workers]
+        pool = list(order_ids)
+        random.Random(index).shuffle(pool)
+        tried, claimed = 0, []
+        start.wait()
+        for order_id in pool:
+            tried += 1
+            try:
+                service.accept_order(agent_id, order_id)
+            except ValueError:
+                continue
+            claimed.append(order_id)
+            break
+        with results_lock:
+            attempts[agent_id] = tried
+            if claimed:
+                won[agent_id] = claimed
+
+    threads = [threading.Thread(target=agent, args=(i,)) for i in range(agents)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    # No double assignment: one event per order, matching the stored agent, one order per agent
+    assigned_events = Counter()
+    mismatched = 0
+    winners = {order_id: agent_id for agent_id, claimed in won.items() for order_id in claimed}
+    for order_id in order_ids:
+        events = [event for event in lifecycle.get_events(order_id) if event['to_status'] == 'assigned_to_agent']
+        assigned_events[len(events)] += 1
+        stored_agent = db.collection('orders').document(order_id).get().to_dict().get('agent_id')
+        if stored_agent != winners.get(order_id) or (events and events[0]['actor_id'] != stored_agent):
+            mismatched += 1
+    double_assignments = sum(count for events, count in assigned_events.items() if events > 1) + mismatched
+    double_assignments += sum(1 for claimed in won.values() if len(claimed) > 1)
+
+    total_attempts = sum(attempts.values())
+    stats = [arbiter.stats() for arbiter in arbiters]
+    arbiter_refused = sum(s['refused_in_flight'] + s['refused_taken'] for s in stats)
+    transaction_refused = sum(s['granted'] - s['won'] for s in stats)
+
+    print(f"{agents} agents on {workers} workers racing for {orders} orders: {total_attempts} claim attempts in "
+          f"{elapsed * 1000:.0f} ms")
+    print(f"  {total_attempts / elapsed:,.0f} claims/s, {len(winners) / elapsed:,.0f} assignments/s, "
+          f"{len(winners)} orders assigned")
+    print(f"  refused by the arbiter {arbiter_refused}, by the transaction {transaction_refused}")
+    print(f"  double assignments: {double_assignments}")
+    return double_assignments == 0 and len(winners) == min(agents, orders)
+
+
+if __name__ == '__main__':
+    sys.exit(0 if run(*(int(arg) for arg in sys.argv[1:4])) else 1)
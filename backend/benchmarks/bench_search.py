@@ -0,0 +1,143 @@
+# backend/benchmarks/bench_search.py
+"""Query latency of the restaurant and dish search indexes at catalog scale
+
+Builds a SearchIndex with the restaurant field weights over synthetic
+restaurants and one with the dish field weights over synthetic menu items
+drawn from a shared food vocabulary (so at 2M items common words like
+"chicken" have posting lists in the hundreds of thousands), then times a mix
+of exact, prefix, misspelled and multi-word queries against each.
+
+Every query is timed twice: cold, right after a write cleared the per-term
+score cache, and warm, with the cache filled by earlier queries. The target
+is the p99 at 50k restaurants and 2M menu items.
+
+Run from backend/:  python -m benchmarks.bench_search [restaurants] [menu_items]
+"""
+import gc
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+
+os.environ.setdefault('DATA_BACKEND', 'memory')
+
+from services.search_service import DISH_FIELD_WEIGHTS, RESTAURANT_FIELD_WEIGHTS
+from utils.search_index import SearchIndex
+
+TARGET_RESTAURANTS = 50_000
+TARGET_MENU_ITEMS = 2_000_000
+QUERY_ROUNDS = 3
+
+CUISINES = ['indian', 'italian', 'chinese', 'mexican', 'thai', 'japanese', 'korean', 'greek',
+            'lebanese', 'turkish', 'american', 'french', 'spanish', 'vietnamese', 'ethiopian',
+            'caribbean', 'peruvian', 'brazilian', 'german', 'moroccan']
+DISHES = ['biryani', 'margherita', 'pizza', 'burger', 'tacos', 'burrito', 'ramen', 'sushi', 'pho',
+          'curry', 'korma', 'tikka', 'masala', 'paneer', 'naan', 'dosa', 'idli', 'samosa', 'pakora',
+          'lasagna', 'risotto', 'carbonara', 'gnocchi', 'ravioli', 'tiramisu', 'falafel', 'shawarma',
+          'hummus', 'gyro', 'souvlaki', 'moussaka', 'kebab', 'paella', 'tapas', 'churros', 'enchiladas',
+          'quesadilla', 'nachos', 'dumplings', 'noodles', 'chowmein', 'wonton', 'tempura', 'teriyaki',
+          'bibimbap', 'bulgogi', 'kimchi', 'padthai', 'satay', 'laksa', 'banhmi', 'injera', 'tagine',
+          'couscous', 'schnitzel', 'bratwurst', 'croissant', 'quiche', 'ratatouille', 'poutine',
+          'sandwich', 'salad', 'soup', 'wrap', 'bowl', 'platter', 'skewers', 'wings', 'fries', 'pasta']
+ADJECTIVES = ['spicy', 'crispy', 'creamy', 'smoky', 'grilled', 'fried', 'roasted', 'steamed', 'baked',
+              'tandoori', 'classic', 'house', 'special', 'loaded', 'fresh', 'homestyle', 'signature',
+              'garlic', 'honey', 'lemon', 'chilli', 'sweet', 'tangy', 'herbed', 'stuffed', 'mini', 'jumbo']
+INGREDIENTS = ['chicken', 'lamb', 'beef', 'pork', 'prawn', 'fish', 'tofu', 'paneer', 'egg', 'mushroom',
+               'spinach', 'potato', 'onion', 'tomato', 'cheese', 'mozzarella', 'basil', 'garlic', 'ginger',
+               'coriander', 'cumin', 'yogurt', 'cream', 'butter', 'rice', 'lentils', 'chickpeas', 'avocado',
+               'pepper', 'jalapeno', 'lime', 'coconut', 'peanut', 'sesame', 'soy', 'mint', 'saffron',
+               'cashew', 'almond', 'olive', 'aubergine', 'courgette', 'cabbage', 'carrot', 'corn', 'beans']
+FILLER = ['served', 'with', 'and', 'on', 'a', 'bed', 'of', 'topped', 'slow', 'cooked', 'in', 'our',
+          'own', 'sauce', 'side', 'hand', 'made', 'daily', 'chef', 'recipe', 'traditional', 'light',
+          'rich', 'finished', 'tossed', 'marinated', 'overnight', 'wood', 'fired', 'oven']
+NAME_WORDS = ['golden', 'royal', 'spice', 'garden', 'palace', 'kitchen', 'corner', 'express', 'bistro',
+              'grill', 'house', 'cafe', 'street', 'village', 'dragon', 'lotus', 'olive', 'harbour', 'urban',
+              'little', 'mama', 'papa', 'sunset', 'blue', 'red', 'green', 'silver', 'jade', 'saffron']
+
+QUERIES = [
+    # exact
+    'biryani', 'margherita pizza', 'chicken', 'paneer tikka', 'ramen', 'sushi', 'falafel wrap',
+    'spicy chicken wings', 'thai', 'italian',
+    # prefix (type-ahead)
+    'bir', 'marg', 'chick', 'pan', 'sush', 'shaw', 'tan',
+    # misspelled
+    'biriyani', 'margarita', 'chiken', 'panner', 'shwarma', 'lasagne', 'tirramisu', 'burrito spicey',
+    'quesadila', 'dumplins', 'bulgoghi',
+]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    pools = (ADJECTIVES, INGREDIENTS, FILLER, FILLER, DISHES)
+    return ' '.join(rng.choice(rng.choice(pools)) for _ in range(words))
+
+
+def make_restaurant(rng: random.Random, index: int) -> dict:
+    return {
+        'name': f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {rng.choice(DISHES)} {index}",
+        'cuisine': rng.choice(CUISINES),
+        'description': _sentence(rng, rng.randint(6, 14))
+    }
+
+
+def make_dish(rng: random.Random) -> dict:
+    return {
+        'name': f"{rng.choice(ADJECTIVES)} {rng.choice(INGREDIENTS)} {rng.choice(DISHES)}",
+        'description': _sentence(rng, rng.randint(5, 12)),
+        'ingredients': ' '.join(rng.sample(INGREDIENTS, rng.randint(2, 5)))
+    }
+
+
+def build(restaurants: int, menu_items: int):
+    rng = random.Random(42)
+    restaurant_index = SearchIndex(RESTAURANT_FIELD_WEIGHTS)
+    dish_index = SearchIndex(DISH_FIELD_WEIGHTS)
+
+    start = time.perf_counter()
+    for i in range(restaurants):
+        restaurant_index.add(f'r{i}', make_restaurant(rng, i))
+    for i in range(menu_items):
+        dish_index.add(f'm{i}', make_dish(rng))
+        if i and i % 500_000 == 0:
+            print(f"  ... {i} menu items indexed")
+    print(f"indexed {restaurants} restaurants and {menu_items} menu items in {time.perf_counter() - start:.0f} s, "
+          f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    return restaurant_index, dish_index
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    p = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return f"p50 {statistics.median(ordered):7.1f} ms   p95 {p(0.95):7.1f} ms   p99 {p(0.99):7.1f} ms   max {ordered[-1]:7.1f} ms"
+
+
+def time_queries(index: SearchIndex, label: str):
+    cold, warm = [], []
+    for _ in range(QUERY_ROUNDS):
+        # A write clears the term score cache, as any menu edit does in production
+        index.add('__write__', {field: 'cache reset' for field in index.field_weights})
+        for query in QUERIES:
+            for samples in (cold, warm):
+                start = time.perf_counter()
+                index.search(query, limit=20)
+                samples.append((time.perf_counter() - start) * 1000)
+
+    print(f"{label} cold: {percentiles(cold)}")
+    print(f"{label} warm: {percentiles(warm)}")
+    return cold + warm
+
+
+def main(restaurants: int = TARGET_RESTAURANTS, menu_items: int = TARGET_MENU_ITEMS):
+    gc.disable()
+    restaurant_index, dish_index = build(restaurants, menu_items)
+    gc.enable()
+    gc.collect()
+
+    time_queries(restaurant_index, f"restaurants ({restaurants})")
+    combined = time_queries(dish_index, f"dishes ({menu_items})")
+    print(f"dish search over all queries: {percentiles(combined)}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
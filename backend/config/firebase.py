@@ -2,10 +2,20 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, auth, storage
 import os
+import threading
 
 # Global variables for Firebase services
 db = None
 bucket = None
+token_verifier = None
+_token_verifier_lock = threading.Lock()
+
+# ID-token verifier: 'firebase' (Admin SDK) or 'local' (cached Google public keys)
+AUTH_VERIFIER = os.getenv('AUTH_VERIFIER', 'firebase').lower()
+
+# When enabled, role writes are mirrored into a Firebase custom claim and role
+# checks trust the claim in the ID token instead of reading user_roles
+ROLE_CLAIMS_ENABLED = os.getenv('ROLE_CLAIMS_ENABLED', 'false').lower() == 'true'
 
 def initialize_firebase():
     """Initialize Firebase Admin SDK"""
@@ -124,4 +134,36 @@ def get_bucket():
 
 def get_auth():
     """Get Firebase Auth service"""
-    return auth
\ No newline at end of file
+    return auth
+
+def get_project_id():
+    """Get the Firebase project ID"""
+    project_id = os.getenv('FIREBASE_PROJECT_ID')
+    if not project_id:
+        try:
+            project_id = firebase_admin.get_app().project_id
+        except ValueError:
+            project_id = None
+    return project_id
+
+def get_token_verifier():
+    """Get the ID-token verifier (anything exposing verify_id_token)"""
+    global token_verifier
+    if AUTH_VERIFIER != 'local':
+        return auth
+    
+    if token_verifier is None:
+        # One verifier (and one key refresh thread) per process, even when requests race to create it
+        with _token_verifier_lock:
+            if token_verifier is None:
+                from config.token_verifier import LocalTokenVerifier
+                token_verifier = LocalTokenVerifier(project_id=get_project_id())
+                print(f"✅ Local ID-token verifier ready for project: {token_verifier.project_id}")
+    return token_verifier
+
+def set_token_verifier(verifier):
+    """Install a custom ID-token verifier (e.g. one backed by a local key source)"""
+    global token_verifier, AUTH_VERIFIER
+    with _token_verifier_lock:
+        token_verifier = verifier
+        AUTH_VERIFIER = 'local' if verifier is not None else 'firebase'
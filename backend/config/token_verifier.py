@@ -0,0 +1,173 @@
+# backend/config/token_verifier.py
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+import requests
+
+# Google's public keys for Firebase ID tokens, in JWK format
+GOOGLE_JWKS_URL = 'https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com'
+
+# Fallbacks used when the key endpoint doesn't send max-age or can't be reached
+DEFAULT_KEY_MAX_AGE = 3600
+KEY_RETRY_INTERVAL = 60
+
+class InvalidIdTokenError(ValueError):
+    """Raised when an ID token fails local verification"""
+
+class RevokedIdTokenError(InvalidIdTokenError):
+    """Raised when an ID token was issued before the user's tokens were revoked"""
+
+class GoogleKeySource:
+    """Fetches the Firebase ID-token signing keys published by Google"""
+
+    def __init__(self, url: str = GOOGLE_JWKS_URL, timeout: int = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self) -> Tuple[Dict[str, Any], int]:
+        """Fetch the key set, returning (keys by kid, max-age in seconds)"""
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+
+        keys = {}
+        for jwk in response.json().get('keys', []):
+            keys[jwk['kid']] = jwt.PyJWK(jwk, algorithm='RS256').key
+
+        match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+        max_age = int(match.group(1)) if match else DEFAULT_KEY_MAX_AGE
+
+        return keys, max_age
+
+class StaticKeySource:
+    """Serves a fixed key set, e.g. a locally generated RSA keypair standing in for Google"""
+
+    def __init__(self, keys: Dict[str, Any], max_age: int = DEFAULT_KEY_MAX_AGE):
+        self.keys = keys
+        self.max_age = max_age
+
+    def fetch(self) -> Tuple[Dict[str, Any], int]:
+        return dict(self.keys), self.max_age
+
+class LocalTokenVerifier:
+    """Verifies Firebase ID tokens locally against a cached public-key set
+
+    Drop-in for firebase_admin.auth.verify_id_token: the key set is refreshed by
+    a background thread according to the source's max-age. Verified tokens
+    are cached by the auth middleware (token_cache), not here. Revocation checks
+    look the user up through user_source (firebase_admin.auth by default),
+    as the Admin SDK does.
+    """
+
+    def __init__(self, project_id: str, key_source=None, leeway: int = 0,
+                 refresh_in_background: bool = True, user_source=None):
+        if not project_id:
+            raise ValueError("project_id is required for local token verification")
+
+        self.project_id = project_id
+        self.issuer = f'https://securetoken.google.com/{project_id}'
+        self.key_source = key_source or GoogleKeySource()
+        self.user_source = user_source
+        self.leeway = leeway
+
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._stop_event = threading.Event()
+
+        max_age = self.refresh_keys()
+
+        self._refresh_thread = None
+        if refresh_in_background:
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop, args=(max_age,), name='id-token-key-refresh', daemon=True
+            )
+            self._refresh_thread.start()
+
+    def refresh_keys(self) -> int:
+        """Fetch the current key set, returning the max-age reported by the source"""
+        keys, max_age = self.key_source.fetch()
+        with self._keys_lock:
+            self._keys = keys
+            self._last_refresh = time.time()
+        return max_age
+
+    def _refresh_loop(self, max_age: int):
+        """Background loop re-fetching keys whenever the previous set goes stale"""
+        delay = max_age
+        while not self._stop_event.wait(delay):
+            try:
+                delay = max(self.refresh_keys(), KEY_RETRY_INTERVAL)
+            except Exception as e:
+                print(f"⚠️  ID-token key refresh failed: {str(e)}")
+                delay = KEY_RETRY_INTERVAL
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop_event.set()
+
+    def _get_key(self, kid: Optional[str]):
+        """Look up a signing key, refreshing once if the kid is unknown (key rotation)"""
+        key = self._keys.get(kid)
+
+        if key is None and time.time() - self._last_refresh > KEY_RETRY_INTERVAL:
+            try:
+                self.refresh_keys()
+            except Exception as e:
+                print(f"⚠️  ID-token key refresh failed: {str(e)}")
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise InvalidIdTokenError(f"ID token has an unknown key ID: {kid}")
+        return key
+
+    def verify_id_token(self, id_token: str, check_revoked: bool = False) -> Dict[str, Any]:
+        """Verify a Firebase ID token and return its decoded claims"""
+        if not isinstance(id_token, str) or not id_token:
+            raise InvalidIdTokenError("ID token must be a non-empty string")
+
+        try:
+            header = jwt.get_unverified_header(id_token)
+            if header.get('alg') != 'RS256':
+                raise InvalidIdTokenError(f"ID token has incorrect algorithm: {header.get('alg')}")
+
+            claims = jwt.decode(
+                id_token,
+                key=self._get_key(header.get('kid')),
+                algorithms=['RS256'],
+                audience=self.project_id,
+                issuer=self.issuer,
+                leeway=self.leeway,
+                options={'require': ['exp', 'iat', 'aud', 'iss', 'sub']}
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidIdTokenError(f"Invalid ID token: {str(e)}")
+
+        subject = claims.get('sub')
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise InvalidIdTokenError("ID token has an invalid subject")
+
+        if claims.get('auth_time', 0) > time.time() + self.leeway:
+            raise InvalidIdTokenError("ID token has an auth_time in the future")
+
+        # Match the Admin SDK, which exposes the subject as `uid`
+        claims['uid'] = subject
+
+        if check_revoked:
+            self._check_revoked(claims)
+        return claims
+
+    def _check_revoked(self, claims: Dict[str, Any]):
+        """Reject tokens of disabled users and tokens issued before a revocation"""
+        user_source = self.user_source
+        if user_source is None:
+            from firebase_admin import auth as user_source
+
+        user = user_source.get_user(claims['uid'])
+        if user.disabled:
+            raise InvalidIdTokenError("The user record is disabled")
+        # tokens_valid_after_timestamp is in milliseconds, iat in seconds
+        if claims['iat'] * 1000 < (user.tokens_valid_after_timestamp or 0):
+            raise RevokedIdTokenError("The Firebase ID token has been revoked")
@@ -0,0 +1,40 @@
+# backend/data/batch_reader.py
+from typing import Any, Dict, Optional
+
+class BatchReader:
+    """Collects document references for a result set and reads them in one get_all call
+
+    References are deduplicated by path, so fifty orders from three
+    restaurants cost a single round trip for three documents.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._references = {}
+        self._snapshots = {}
+        self.round_trips = 0
+
+    def add(self, collection: str, document_id: Optional[str]) -> 'BatchReader':
+        """Queue a document for the next fetch (empty IDs are ignored)"""
+        if document_id:
+            reference = self.db.collection(collection).document(document_id)
+            self._references.setdefault(reference.path, reference)
+        return self
+
+    def fetch(self) -> 'BatchReader':
+        """Resolve every queued document not fetched yet with one get_all call"""
+        pending = [reference for path, reference in self._references.items() if path not in self._snapshots]
+        if pending:
+            self.round_trips += 1
+            for snapshot in self.db.get_all(pending):
+                self._snapshots[snapshot.reference.path] = snapshot
+        return self
+
+    def get(self, collection: str, document_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Get a fetched document's data, or None if it doesn't exist"""
+        if not document_id:
+            return None
+        snapshot = self._snapshots.get(f'{collection}/{document_id}')
+        if snapshot is None or not snapshot.exists:
+            return None
+        return snapshot.to_dict()
@@ -0,0 +1,74 @@
+# backend/data/document_values.py
+"""Firestore write semantics applied to plain dicts
+
+Shared by the in-memory backend (which stores documents as dicts) and the
+request identity map (which keeps what it knows of documents as dicts), so
+both resolve set/merge/update and transform sentinels the same way.
+"""
+from datetime import datetime
+from typing import Any, Dict
+
+from google.cloud.firestore_v1 import transforms
+
+def copy_value(value):
+    """Copy a Firestore-style value (much cheaper than copy.deepcopy)"""
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    return value
+
+def apply_value(target: Dict[str, Any], key: str, value, now: datetime):
+    """Write one (already split) field, resolving transform sentinels"""
+    if value is transforms.DELETE_FIELD:
+        target.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        target[key] = now
+    elif isinstance(value, transforms.Increment):
+        current = target.get(key)
+        target[key] = (current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0) + value.value
+    elif isinstance(value, transforms.Maximum):
+        current = target.get(key)
+        target[key] = value.value if not isinstance(current, (int, float)) else max(current, value.value)
+    elif isinstance(value, transforms.Minimum):
+        current = target.get(key)
+        target[key] = value.value if not isinstance(current, (int, float)) else min(current, value.value)
+    elif isinstance(value, transforms.ArrayUnion):
+        current = list(target.get(key)) if isinstance(target.get(key), list) else []
+        for item in value.values:
+            if item not in current:
+                current.append(copy_value(item))
+        target[key] = current
+    elif isinstance(value, transforms.ArrayRemove):
+        current = target.get(key) if isinstance(target.get(key), list) else []
+        target[key] = [item for item in current if item not in value.values]
+    elif isinstance(value, dict):
+        target[key] = resolve_map(value, now)
+    else:
+        target[key] = copy_value(value)
+
+def resolve_map(data: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Copy a map written with set(), resolving nested sentinels"""
+    resolved = {}
+    for key, value in data.items():
+        apply_value(resolved, key, value, now)
+    return resolved
+
+def merge_map(target: Dict[str, Any], data: Dict[str, Any], now: datetime):
+    """Deep-merge a map into a document, as set(..., merge=True) does"""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_map(target[key], value, now)
+        else:
+            apply_value(target, key, value, now)
+
+def update_paths(target: Dict[str, Any], data: Dict[str, Any], now: datetime):
+    """Apply update() semantics, where keys are dotted field paths"""
+    for field_path, value in data.items():
+        parts = field_path.split('.')
+        current = target
+        for part in parts[:-1]:
+            if not isinstance(current.get(part), dict):
+                current[part] = {}
+            current = current[part]
+        apply_value(current, parts[-1], value, now)
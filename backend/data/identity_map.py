@@ -0,0 +1,197 @@
+# backend/data/identity_map.py
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from flask import g, has_request_context
+from google.cloud.firestore_v1 import transforms
+from data.document_values import copy_value, merge_map, update_paths
+
+class CachedDocumentSnapshot:
+    """Document snapshot served from the identity map
+
+    Offers the DocumentSnapshot attributes services use (id, exists,
+    to_dict, get, reference and the timestamps), whichever backend the
+    document came from. update_time is the time of the last write seen in
+    this request, or of the read if there was none.
+    """
+
+    def __init__(self, reference, data: Optional[Dict[str, Any]], create_time=None, update_time=None, read_time=None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy_value(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        if self._data is None:
+            return None
+        value = self._data
+        for part in field_path.split('.'):
+            if not isinstance(value, dict) or part not in value:
+                raise KeyError(field_path)
+            value = value[part]
+        return copy_value(value)
+
+class _Entry:
+    """What a request knows of one document"""
+    __slots__ = ('data', 'create_time', 'update_time', 'read_time')
+
+    def __init__(self, data, create_time=None, update_time=None, read_time=None):
+        self.data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+
+class IdentityMap:
+    """Request-scoped map of document path -> last known data
+
+    Repeat reads of a document within one request are served from the map,
+    and writes made through it are merged in (read-your-writes), so a get
+    after an update needs no round trip. Writes whose result is computed by
+    the server (SERVER_TIMESTAMP, Increment, ArrayUnion, ...) evict the entry
+    instead, so the next read sees the stored value. The first read returns
+    the backend's own snapshot; later ones return a CachedDocumentSnapshot
+    carrying the document's timestamps.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self.reads = 0
+        self.reads_saved = 0
+
+    def get(self, reference):
+        """Get a document snapshot, reading it at most once per request"""
+        path = reference.path
+        entry = self._entries.get(path)
+        if entry is not None:
+            self.reads_saved += 1
+            return CachedDocumentSnapshot(reference, copy_value(entry.data), entry.create_time,
+                                          entry.update_time, entry.read_time)
+
+        self.reads += 1
+        snapshot = reference.get()
+        self._entries[path] = _Entry(snapshot.to_dict() if snapshot.exists else None,
+                                     getattr(snapshot, 'create_time', None),
+                                     getattr(snapshot, 'update_time', None),
+                                     getattr(snapshot, 'read_time', None))
+        return snapshot
+
+    def record_set(self, reference, data: Dict[str, Any], merge: bool = False, write_result=None):
+        """Record a set() made outside the map"""
+        path = reference.path
+        entry = self._entries.get(path)
+        if not _is_local(data):
+            self._entries.pop(path, None)
+            return
+
+        update_time = getattr(write_result, 'update_time', None)
+        if entry is None or entry.data is None:
+            if merge and entry is None:
+                # merge=True on a document we haven't seen: the rest of it is unknown
+                return
+            # Creates the document (or replaces a missing one)
+            self._entries[path] = _Entry(copy_value(data), update_time, update_time)
+        elif not merge:
+            entry.data = copy_value(data)
+            entry.update_time = update_time
+        else:
+            merge_map(entry.data, data, datetime.utcnow())
+            entry.update_time = update_time
+
+    def record_update(self, reference, data: Dict[str, Any], write_result=None):
+        """Record an update() made outside the map"""
+        path = reference.path
+        entry = self._entries.get(path)
+        if _is_local(data) and entry is not None and entry.data is not None:
+            update_paths(entry.data, data, datetime.utcnow())
+            entry.update_time = getattr(write_result, 'update_time', None)
+        else:
+            self._entries.pop(path, None)
+
+    def record_delete(self, reference):
+        """Record a delete() made outside the map"""
+        self._entries[reference.path] = _Entry(None)
+
+    def evict(self, reference):
+        """Forget a document, e.g. after a transaction or batch wrote it"""
+        self._entries.pop(reference.path, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {'reads': self.reads, 'reads_saved': self.reads_saved}
+
+def _is_local(value) -> bool:
+    """Check whether a written value can be applied without the server"""
+    if isinstance(value, dict):
+        return all(_is_local(item) for item in value.values())
+    if isinstance(value, list):
+        return all(_is_local(item) for item in value)
+    return type(value).__module__ != transforms.__name__
+
+def current_identity_map() -> Optional[IdentityMap]:
+    """Get the current request's identity map (None outside a request)"""
+    if not has_request_context():
+        return None
+
+    identity_map = g.get('identity_map')
+    if identity_map is None:
+        identity_map = IdentityMap()
+        g.identity_map = identity_map
+    return identity_map
+
+# ===== REFERENCE HELPERS =====
+# Drop-in replacements for reference.get()/set()/update()/delete() that go
+# through the current request's identity map, or straight to the reference
+# when called outside a request.
+
+def get_document(reference):
+    """Read a document through the request's identity map"""
+    identity_map = current_identity_map()
+    if identity_map is None:
+        return reference.get()
+    return identity_map.get(reference)
+
+def set_document(reference, data: Dict[str, Any], merge: bool = False):
+    """Write a document and record the write in the request's identity map"""
+    result = reference.set(data, merge=merge)
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        identity_map.record_set(reference, data, merge=merge, write_result=result)
+    return result
+
+def update_document(reference, data: Dict[str, Any]):
+    """Update a document and record the update in the request's identity map"""
+    identity_map = current_identity_map()
+    try:
+        result = reference.update(data)
+    except Exception:
+        # e.g. NotFound: whatever we thought we knew about the document is stale
+        if identity_map is not None:
+            identity_map.evict(reference)
+        raise
+    if identity_map is not None:
+        identity_map.record_update(reference, data, write_result=result)
+    return result
+
+def delete_document(reference):
+    """Delete a document and record the delete in the request's identity map"""
+    result = reference.delete()
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        identity_map.record_delete(reference)
+    return result
+
+def get_identity_map_stats() -> Optional[Dict[str, Any]]:
+    """Get document reads made and saved by the current request, if any"""
+    identity_map = g.get('identity_map') if has_request_context() else None
+    return identity_map.stats() if identity_map is not None else None
@@ -0,0 +1,757 @@
+# backend/data/memory_store.py
+"""In-memory, Firestore-compatible data backend.
+
+Implements the subset of the google-cloud-firestore client API the services
+use (documents, queries, batches, transactions, get_all, on_snapshot), so services run
+unchanged against it for local development, load tests and benchmarks.
+Equality filters are answered from secondary indexes that are built on first
+use and then maintained on every write.
+"""
+import random
+import string
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+from data.document_values import (
+    apply_value as _apply_value,
+    copy_value as _copy,
+    merge_map as _merge_map,
+    resolve_map as _resolve_map,
+    update_paths as _update_paths
+)
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+_MISSING = object()
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+# ===== VALUE HELPERS =====
+
+def _normalize_datetime(value: datetime) -> datetime:
+    """Compare aware and naive datetimes on the same (naive UTC) scale"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _freeze(value):
+    """Hashable form of a value for the equality indexes"""
+    if isinstance(value, bool):
+        return ('bool', value)
+    if isinstance(value, datetime):
+        return ('datetime', _normalize_datetime(value))
+    if isinstance(value, list):
+        return ('list', tuple(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return ('map', tuple(sorted((key, _freeze(item)) for key, item in value.items())))
+    return value
+
+def _sort_key(value):
+    """Order values the way Firestore does: by type first, then by value"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, _normalize_datetime(value))
+    if isinstance(value, str):
+        return (4, value)
+    if isinstance(value, bytes):
+        return (5, value)
+    if isinstance(value, list):
+        return (8, tuple(_sort_key(item) for item in value))
+    if isinstance(value, dict):
+        return (9, tuple(sorted((key, _sort_key(item)) for key, item in value.items())))
+    return (10, str(value))
+
+def _get_field(data: Dict[str, Any], field_path: str):
+    """Resolve a dotted field path, returning _MISSING if absent"""
+    current = data
+    for part in field_path.split('.'):
+        if not isinstance(current, dict) or part not in current:
+            return _MISSING
+        current = current[part]
+    return current
+
+def _matches(data: Dict[str, Any], field_path: str, op: str, value) -> bool:
+    """Evaluate a single where() filter against a document"""
+    if field_path == '__name__':
+        actual = data.get('__name__')
+    else:
+        actual = _get_field(data, field_path)
+
+    if op == 'not-in':
+        return actual is not _MISSING and actual is not None and _freeze(actual) not in {_freeze(v) for v in value}
+    if actual is _MISSING:
+        return False
+    if op == '==':
+        return _freeze(actual) == _freeze(value)
+    if op == '!=':
+        return actual is not None and _freeze(actual) != _freeze(value)
+    if op == 'in':
+        return _freeze(actual) in {_freeze(v) for v in value}
+    if op == 'array_contains':
+        return isinstance(actual, list) and _freeze(value) in {_freeze(v) for v in actual}
+    if op == 'array_contains_any':
+        return isinstance(actual, list) and bool({_freeze(v) for v in actual} & {_freeze(v) for v in value})
+
+    # Range filters only match values of the same type class
+    actual_key, value_key = _sort_key(actual), _sort_key(value)
+    if actual_key[0] != value_key[0]:
+        return False
+    if op == '<':
+        return actual_key < value_key
+    if op == '<=':
+        return actual_key <= value_key
+    if op == '>':
+        return actual_key > value_key
+    if op == '>=':
+        return actual_key >= value_key
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+# ===== SNAPSHOTS =====
+
+class MemoryDocumentSnapshot:
+    """Point-in-time view of a document"""
+
+    def __init__(self, reference, data: Optional[Dict[str, Any]], create_time=None, update_time=None, read_time=None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _copy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        if self._data is None:
+            return None
+        value = _get_field(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+class _StoredDocument:
+    __slots__ = ('data', 'create_time', 'update_time')
+
+    def __init__(self, data, create_time, update_time):
+        self.data = data
+        self.create_time = create_time
+        self.update_time = update_time
+
+class _CollectionStore:
+    """Documents of one collection plus their lazily built equality indexes"""
+
+    def __init__(self):
+        self.documents: Dict[str, _StoredDocument] = {}
+        self.indexes: Dict[str, Dict[Any, set]] = {}
+
+    def ensure_index(self, field_path: str) -> Dict[Any, set]:
+        index = self.indexes.get(field_path)
+        if index is None:
+            index = {}
+            for document_id, stored in self.documents.items():
+                self._index_add(index, field_path, document_id, stored.data)
+            self.indexes[field_path] = index
+        return index
+
+    @staticmethod
+    def _index_add(index, field_path, document_id, data):
+        value = _get_field(data, field_path)
+        if value is not _MISSING:
+            index.setdefault(_freeze(value), set()).add(document_id)
+
+    @staticmethod
+    def _index_remove(index, field_path, document_id, data):
+        value = _get_field(data, field_path)
+        if value is not _MISSING:
+            key = _freeze(value)
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(document_id)
+                if not ids:
+                    del index[key]
+
+    def write(self, document_id: str, data: Optional[Dict[str, Any]], now: datetime) -> Optional[_StoredDocument]:
+        """Replace (or delete, when data is None) a document and update indexes, returning the previous version"""
+        previous = self.documents.get(document_id)
+        for field_path, index in self.indexes.items():
+            if previous is not None:
+                self._index_remove(index, field_path, document_id, previous.data)
+            if data is not None:
+                self._index_add(index, field_path, document_id, data)
+
+        if data is None:
+            self.documents.pop(document_id, None)
+        else:
+            create_time = previous.create_time if previous is not None else now
+            self.documents[document_id] = _StoredDocument(data, create_time, now)
+        return previous
+
+# ===== REFERENCES & QUERIES =====
+
+class MemoryQuery:
+    """Immutable query builder mirroring google.cloud.firestore.Query"""
+
+    ASCENDING = ASCENDING
+    DESCENDING = DESCENDING
+
+    def __init__(self, client, path: str, filters=(), orders=(), limit=None, offset=0,
+                 start=None, end=None):
+        self._client = client
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._offset = offset
+        self._start = start
+        self._end = end
+
+    def _copy_with(self, **changes) -> 'MemoryQuery':
+        state = {
+            'filters': self._filters, 'orders': self._orders, 'limit': self._limit,
+            'offset': self._offset, 'start': self._start, 'end': self._end
+        }
+        state.update(changes)
+        return MemoryQuery(self._client, self._path, **state)
+
+    def where(self, field_path: str = None, op_string: str = None, value=None, *, filter=None) -> 'MemoryQuery':
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy_with(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> 'MemoryQuery':
+        return self._copy_with(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> 'MemoryQuery':
+        return self._copy_with(limit=count)
+
+    def offset(self, num_to_skip: int) -> 'MemoryQuery':
+        return self._copy_with(offset=num_to_skip)
+
+    def select(self, field_paths) -> 'MemoryQuery':
+        # Projections only save bandwidth on the real backend
+        return self
+
+    def start_after(self, document_fields_or_snapshot) -> 'MemoryQuery':
+        return self._copy_with(start=(document_fields_or_snapshot, False))
+
+    def start_at(self, document_fields_or_snapshot) -> 'MemoryQuery':
+        return self._copy_with(start=(document_fields_or_snapshot, True))
+
+    def end_before(self, document_fields_or_snapshot) -> 'MemoryQuery':
+        return self._copy_with(end=(document_fields_or_snapshot, False))
+
+    def end_at(self, document_fields_or_snapshot) -> 'MemoryQuery':
+        return self._copy_with(end=(document_fields_or_snapshot, True))
+
+    def _cursor_key(self, cursor) -> Tuple:
+        """Turn a snapshot, field dict or value list into a comparable sort position"""
+        if isinstance(cursor, MemoryDocumentSnapshot):
+            return self._document_key(cursor.id, cursor._data or {})
+        if isinstance(cursor, dict):
+            values = [cursor[field] if field in cursor else _get_field(cursor, field) for field, _ in self._orders]
+        else:
+            values = list(cursor)
+        # A __name__ cursor value is a document reference (or its ID)
+        for index, (field, _) in enumerate(self._orders[:len(values)]):
+            if field == '__name__' and isinstance(values[index], MemoryDocumentReference):
+                values[index] = values[index].id
+        return self._position(values)
+
+    def _position(self, values) -> Tuple:
+        key = []
+        # The implicit document-ID tiebreak follows the last explicit direction
+        directions = [direction for _, direction in self._orders]
+        directions.append(directions[-1] if directions else ASCENDING)
+        for value, direction in zip(values, directions):
+            key.append(_Directional(_sort_key(value), direction == DESCENDING))
+        return tuple(key)
+
+    def _document_key(self, document_id: str, data: Dict[str, Any]) -> Tuple:
+        values = []
+        for field, _ in self._orders:
+            values.append(document_id if field == '__name__' else _get_field(data, field))
+        values.append(document_id)
+        return self._position(values)
+
+    def _run(self) -> List[MemoryDocumentSnapshot]:
+        client = self._client
+        with client._lock:
+            store = client._stores.get(self._path)
+            if store is None:
+                return []
+
+            # Narrow candidates with the equality indexes, smallest set first
+            candidate_ids = None
+            for field_path, op, value in self._filters:
+                if field_path == '__name__' or op not in ('==', 'in'):
+                    continue
+                index = store.ensure_index(field_path)
+                if op == '==':
+                    ids = index.get(_freeze(value), set())
+                else:
+                    ids = set()
+                    for item in value:
+                        ids |= index.get(_freeze(item), set())
+                candidate_ids = set(ids) if candidate_ids is None else candidate_ids & ids
+                if not candidate_ids:
+                    return []
+
+            if candidate_ids is None:
+                candidate_ids = store.documents.keys()
+
+            matched = []
+            for document_id in candidate_ids:
+                stored = store.documents[document_id]
+                data = stored.data
+                if self._filters:
+                    view = data
+                    if any(field == '__name__' for field, _, _ in self._filters):
+                        view = dict(data, __name__=document_id)
+                    if not all(_matches(view, field, op, value) for field, op, value in self._filters):
+                        continue
+                # Firestore drops documents missing an ordered field
+                if any(field != '__name__' and _get_field(data, field) is _MISSING for field, _ in self._orders):
+                    continue
+                matched.append((self._document_key(document_id, data), document_id, stored))
+
+            matched.sort(key=lambda entry: entry[0])
+
+            if self._start is not None:
+                cursor, inclusive = self._start
+                start_key = self._cursor_key(cursor)
+                matched = [entry for entry in matched
+                           if _compare_prefix(entry[0], start_key) > 0 or (inclusive and _compare_prefix(entry[0], start_key) == 0)]
+            if self._end is not None:
+                cursor, inclusive = self._end
+                end_key = self._cursor_key(cursor)
+                matched = [entry for entry in matched
+                           if _compare_prefix(entry[0], end_key) < 0 or (inclusive and _compare_prefix(entry[0], end_key) == 0)]
+
+            if self._offset:
+                matched = matched[self._offset:]
+            if self._limit is not None:
+                matched = matched[:self._limit]
+
+            read_time = client._now()
+            parent = client.collection(self._path)
+            return [
+                MemoryDocumentSnapshot(parent.document(document_id), _copy(stored.data),
+                                       stored.create_time, stored.update_time, read_time)
+                for _, document_id, stored in matched
+            ]
+
+    def stream(self, transaction=None):
+        snapshots = self._run()
+        if transaction is not None:
+            for snapshot in snapshots:
+                transaction._record_read(snapshot)
+        return iter(snapshots)
+
+    def get(self, transaction=None) -> List[MemoryDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+    def on_snapshot(self, callback) -> 'MemoryWatch':
+        """Call callback(docs, changes, read_time) now and after every write that affects this query"""
+        return self._client._watch(self, callback)
+
+    def _includes(self, document_id: str, data: Optional[Dict[str, Any]]) -> bool:
+        """Check whether a document version belongs to this query's result set (ignoring limits)"""
+        if data is None:
+            return False
+        view = dict(data, __name__=document_id) if any(field == '__name__' for field, _, _ in self._filters) else data
+        if not all(_matches(view, field, op, value) for field, op, value in self._filters):
+            return False
+        return not any(field != '__name__' and _get_field(data, field) is _MISSING for field, _ in self._orders)
+
+class _Directional:
+    """Sort key wrapper that inverts comparisons for descending order"""
+    __slots__ = ('key', 'descending')
+
+    def __init__(self, key, descending: bool):
+        self.key = key
+        self.descending = descending
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return self.key > other.key if self.descending else self.key < other.key
+
+def _compare_prefix(position: Tuple, cursor: Tuple) -> int:
+    """Compare a document position against a (possibly shorter) cursor position"""
+    for mine, theirs in zip(position, cursor):
+        if mine == theirs:
+            continue
+        return -1 if mine < theirs else 1
+    return 0
+
+class MemoryCollectionReference(MemoryQuery):
+    """Reference to a collection (or subcollection) path"""
+
+    def __init__(self, client, path: str):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._path.rsplit('/', 1)[-1]
+
+    @property
+    def parent(self):
+        if '/' not in self._path:
+            return None
+        return self._client.document(self._path.rsplit('/', 1)[0])
+
+    def document(self, document_id: str = None) -> 'MemoryDocumentReference':
+        if document_id is None:
+            document_id = ''.join(random.choice(_AUTO_ID_CHARS) for _ in range(20))
+        return MemoryDocumentReference(self._client, self._path, document_id)
+
+    def add(self, document_data: Dict[str, Any], document_id: str = None):
+        reference = self.document(document_id)
+        write_result = reference.create(document_data)
+        return write_result.update_time, reference
+
+    def list_documents(self, page_size: int = None):
+        with self._client._lock:
+            store = self._client._stores.get(self._path)
+            document_ids = list(store.documents) if store else []
+        return [self.document(document_id) for document_id in document_ids]
+
+class MemoryWriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+class MemoryDocumentReference:
+    """Reference to a single document path"""
+
+    def __init__(self, client, collection_path: str, document_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+
+    @property
+    def path(self) -> str:
+        return f'{self._collection_path}/{self.id}'
+
+    @property
+    def parent(self) -> MemoryCollectionReference:
+        return self._client.collection(self._collection_path)
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def collection(self, collection_id: str) -> MemoryCollectionReference:
+        return self._client.collection(f'{self.path}/{collection_id}')
+
+    def get(self, field_paths=None, transaction=None) -> MemoryDocumentSnapshot:
+        snapshot = self._client._read(self)
+        if transaction is not None:
+            transaction._record_read(snapshot)
+        return snapshot
+
+    def create(self, document_data: Dict[str, Any]) -> MemoryWriteResult:
+        return self._client._commit([('create', self, document_data, None)])[0]
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False) -> MemoryWriteResult:
+        return self._client._commit([('set', self, document_data, merge)])[0]
+
+    def update(self, field_updates: Dict[str, Any], option=None) -> MemoryWriteResult:
+        return self._client._commit([('update', self, field_updates, None)])[0]
+
+    def delete(self, option=None) -> MemoryWriteResult:
+        return self._client._commit([('delete', self, None, None)])[0]
+
+    def collections(self, page_size: int = None):
+        return self._client._child_collections(self.path)
+
+class MemoryWatch:
+    """Handle for an on_snapshot listener"""
+
+    def __init__(self, client, query: MemoryQuery, callback):
+        self._client = client
+        self._query = query
+        self._callback = callback
+        self.active = True
+
+    def unsubscribe(self):
+        self.active = False
+        with self._client._lock:
+            if self in self._client._watches:
+                self._client._watches.remove(self)
+
+# ===== BATCHES & TRANSACTIONS =====
+
+class MemoryWriteBatch:
+    """Buffers writes and applies them atomically on commit()"""
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference, document_data, None))
+        return self
+
+    def set(self, reference, document_data, merge: bool = False):
+        self._writes.append(('set', reference, document_data, merge))
+        return self
+
+    def update(self, reference, field_updates, option=None):
+        self._writes.append(('update', reference, field_updates, None))
+        return self
+
+    def delete(self, reference, option=None):
+        self._writes.append(('delete', reference, None, None))
+        return self
+
+    def commit(self) -> List[MemoryWriteResult]:
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+    def __len__(self):
+        return len(self._writes)
+
+class MemoryTransaction(MemoryWriteBatch):
+    """Optimistic transaction: commit fails if any document read has since changed"""
+
+    def __init__(self, client, max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._read_versions: Dict[str, Any] = {}
+
+    def _record_read(self, snapshot: MemoryDocumentSnapshot):
+        self._read_versions.setdefault(snapshot.reference.path, snapshot.update_time)
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            return iter([ref_or_query.get(transaction=self)])
+        return ref_or_query.stream(transaction=self)
+
+    def get_all(self, references):
+        return self._client.get_all(references, transaction=self)
+
+    def commit(self) -> List[MemoryWriteResult]:
+        if self._read_only and self._writes:
+            raise ValueError("Cannot write in a read-only transaction")
+        writes, self._writes = self._writes, []
+        read_versions, self._read_versions = self._read_versions, {}
+        return self._client._commit(writes, read_versions=read_versions)
+
+    def rollback(self):
+        self._writes = []
+        self._read_versions = {}
+
+# ===== CLIENT =====
+
+class MemoryClient:
+    """Firestore-compatible client holding all data in process memory"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stores: Dict[str, _CollectionStore] = {}
+        self._last_time = datetime.min
+        # Snapshot listeners; events are queued under _lock and delivered in commit order
+        self._watches: List[MemoryWatch] = []
+        self._pending_events = deque()
+        self._delivery_lock = threading.RLock()
+
+    def _now(self) -> datetime:
+        """Strictly increasing commit timestamps, so update_time works as a version"""
+        now = datetime.utcnow()
+        if now <= self._last_time:
+            now = self._last_time + timedelta(microseconds=1)
+        self._last_time = now
+        return now
+
+    def collection(self, collection_path: str) -> MemoryCollectionReference:
+        return MemoryCollectionReference(self, collection_path.strip('/'))
+
+    def document(self, document_path: str) -> MemoryDocumentReference:
+        collection_path, document_id = document_path.strip('/').rsplit('/', 1)
+        return MemoryDocumentReference(self, collection_path, document_id)
+
+    def collections(self):
+        with self._lock:
+            return [self.collection(path) for path in self._stores if '/' not in path]
+
+    def _child_collections(self, document_path: str):
+        prefix = document_path + '/'
+        with self._lock:
+            return [self.collection(path) for path in self._stores
+                    if path.startswith(prefix) and '/' not in path[len(prefix):]]
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> MemoryTransaction:
+        return MemoryTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def run_transaction(self, callback, *args, max_attempts: int = 5, **kwargs):
+        """Run callback(transaction, ...) and commit it, retrying on conflicts"""
+        for attempt in range(max_attempts):
+            transaction = self.transaction(max_attempts=max_attempts)
+            try:
+                result = callback(transaction, *args, **kwargs)
+                transaction.commit()
+                return result
+            except exceptions.Aborted:
+                transaction.rollback()
+                if attempt == max_attempts - 1:
+                    raise
+            except Exception:
+                transaction.rollback()
+                raise
+
+    def get_all(self, references: Iterable[MemoryDocumentReference], field_paths=None, transaction=None):
+        """Read many documents in one call; duplicates are returned once"""
+        seen = set()
+        snapshots = []
+        with self._lock:
+            for reference in references:
+                if reference.path in seen:
+                    continue
+                seen.add(reference.path)
+                snapshots.append(reference.get(transaction=transaction))
+        return iter(snapshots)
+
+    def _read(self, reference: MemoryDocumentReference) -> MemoryDocumentSnapshot:
+        with self._lock:
+            store = self._stores.get(reference._collection_path)
+            stored = store.documents.get(reference.id) if store else None
+            read_time = self._now()
+            if stored is None:
+                return MemoryDocumentSnapshot(reference, None, read_time=read_time)
+            return MemoryDocumentSnapshot(reference, _copy(stored.data), stored.create_time,
+                                          stored.update_time, read_time)
+
+    def _commit(self, writes, read_versions: Dict[str, Any] = None) -> List[MemoryWriteResult]:
+        """Validate then apply a group of writes atomically"""
+        with self._lock:
+            for path, version in (read_versions or {}).items():
+                collection_path, document_id = path.rsplit('/', 1)
+                store = self._stores.get(collection_path)
+                stored = store.documents.get(document_id) if store else None
+                current = stored.update_time if stored else None
+                if current != version:
+                    raise exceptions.Aborted(f"Transaction conflict on {path}")
+
+            now = self._now()
+            # Stage all writes first so a failing write leaves nothing applied
+            staged = {}
+            for operation, reference, data, merge in writes:
+                path = reference.path
+                if path in staged:
+                    current = staged[path]
+                else:
+                    store = self._stores.get(reference._collection_path)
+                    stored = store.documents.get(reference.id) if store else None
+                    current = _copy(stored.data) if stored else None
+
+                if operation == 'create':
+                    if current is not None:
+                        raise exceptions.AlreadyExists(f"Document already exists: {path}")
+                    current = _resolve_map(data, now)
+                elif operation == 'set':
+                    if merge and current is not None:
+                        _merge_map(current, data, now)
+                    else:
+                        current = _resolve_map(data, now)
+                elif operation == 'update':
+                    if current is None:
+                        raise exceptions.NotFound(f"No document to update: {path}")
+                    _update_paths(current, data, now)
+                elif operation == 'delete':
+                    current = None
+                staged[path] = current
+
+            results = []
+            written = []
+            for path, data in staged.items():
+                collection_path, document_id = path.rsplit('/', 1)
+                store = self._stores.setdefault(collection_path, _CollectionStore())
+                previous = store.write(document_id, data, now)
+                written.append((collection_path, document_id, previous.data if previous else None, data))
+            for _ in writes:
+                results.append(MemoryWriteResult(now))
+
+            if self._watches:
+                self._pending_events.append((written, now))
+
+        self._deliver_events()
+        return results
+
+    def _watch(self, query: MemoryQuery, callback) -> MemoryWatch:
+        """Register a snapshot listener and deliver its initial snapshot"""
+        watch = MemoryWatch(self, query, callback)
+        with self._delivery_lock:
+            # Drain earlier events first so the listener starts from a consistent state
+            self._deliver_events()
+            with self._lock:
+                self._watches.append(watch)
+            docs = query._run()
+            changes = [DocumentChange(ChangeType.ADDED, doc, -1, index) for index, doc in enumerate(docs)]
+            callback(docs, changes, self._now())
+        return watch
+
+    def _deliver_events(self):
+        """Deliver queued write events to listeners, one commit at a time, in order"""
+        with self._delivery_lock:
+            while True:
+                with self._lock:
+                    if not self._pending_events:
+                        return
+                    written, read_time = self._pending_events.popleft()
+                    watches = list(self._watches)
+
+                for watch in watches:
+                    if not watch.active:
+                        continue
+                    query = watch._query
+                    changes = []
+                    for collection_path, document_id, before, after in written:
+                        if collection_path != query._path:
+                            continue
+                        was_included = query._includes(document_id, before)
+                        is_included = query._includes(document_id, after)
+                        if not (was_included or is_included):
+                            continue
+                        reference = MemoryDocumentReference(self, collection_path, document_id)
+                        if is_included:
+                            change_type = ChangeType.MODIFIED if was_included else ChangeType.ADDED
+                            document = MemoryDocumentSnapshot(reference, _copy(after), update_time=read_time, read_time=read_time)
+                        else:
+                            change_type = ChangeType.REMOVED
+                            document = MemoryDocumentSnapshot(reference, _copy(before), read_time=read_time)
+                        changes.append(DocumentChange(change_type, document, -1, -1))
+
+                    if changes:
+                        try:
+                            watch._callback(query._run(), changes, read_time)
+                        except Exception as e:
+                            print(f"⚠️  Snapshot listener failed: {str(e)}")
+
+    def reset(self):
+        """Drop all data (useful between benchmark runs)"""
+        with self._lock:
+            self._stores.clear()
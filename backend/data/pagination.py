@@ -0,0 +1,76 @@
+# backend/data/pagination.py
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+DESCENDING = 'DESCENDING'
+ASCENDING = 'ASCENDING'
+
+MAX_PAGE_SIZE = 100
+
+class PageCursor:
+    """Position after the last document of a page: its sort value and document ID"""
+
+    def __init__(self, value, document_id: str):
+        self.value = value
+        self.document_id = document_id
+
+def encode_cursor(value, document_id: str) -> str:
+    """Encode a sort value and document ID as an opaque, URL-safe cursor"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        payload = {'t': value.isoformat(), 'id': document_id}
+    else:
+        payload = {'v': value, 'id': document_id}
+
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: Optional[str]) -> Optional[PageCursor]:
+    """Decode a cursor from encode_cursor (raises ValueError if it's malformed)"""
+    if not cursor:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+        value = datetime.fromisoformat(payload['t']) if 't' in payload else payload['v']
+        document_id = payload['id']
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(document_id, str) or not document_id:
+        raise ValueError("Invalid cursor")
+
+    return PageCursor(value, document_id)
+
+def clamp_page_size(limit: Optional[int], default: int) -> int:
+    """Keep a client-supplied page size within 1..MAX_PAGE_SIZE"""
+    if not limit or limit < 1:
+        return default
+    return min(limit, MAX_PAGE_SIZE)
+
+def paginate(query, collection_ref, order_field: str, limit: int,
+             cursor: Optional[PageCursor] = None, direction: str = DESCENDING) -> Tuple[List[Any], Optional[str]]:
+    """Run one page of a query ordered by order_field, returning (snapshots, next_cursor)
+
+    The document ID is a secondary sort key, so pages stay stable when many
+    documents share a sort value. One extra document is read to tell whether
+    another page exists; next_cursor is None on the last page.
+    """
+    query = query.order_by(order_field, direction=direction).order_by('__name__', direction=direction)
+
+    if cursor is not None:
+        query = query.start_after([cursor.value, collection_ref.document(cursor.document_id)])
+
+    snapshots = list(query.limit(limit + 1).stream())
+
+    next_cursor = None
+    if len(snapshots) > limit:
+        snapshots = snapshots[:limit]
+        last = snapshots[-1]
+        next_cursor = encode_cursor(last.get(order_field), last.id)
+
+    return snapshots, next_cursor
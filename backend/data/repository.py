@@ -0,0 +1,56 @@
+# backend/data/repository.py
+import os
+import threading
+
+# Data backend: 'firestore' (default) or 'memory' (in-process, Firestore-compatible)
+DATA_BACKEND = os.getenv('DATA_BACKEND', 'firestore').lower()
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Get the process-wide data backend client
+
+    Both backends expose the google-cloud-firestore client API (collection,
+    document, where/order_by/limit/start_after queries, batch, transaction,
+    get_all), so services use either one without changes.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if DATA_BACKEND == 'memory':
+                    from data.memory_store import MemoryClient
+                    _backend = MemoryClient()
+                    print("🧠 Using in-memory data backend")
+                else:
+                    from config.firebase import get_db
+                    _backend = get_db()
+    return _backend
+
+def set_backend(backend):
+    """Install a data backend (e.g. a MemoryClient for tests and benchmarks)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def is_memory_backend(backend) -> bool:
+    """Check whether a client is the in-memory backend"""
+    return hasattr(backend, 'run_transaction')
+
+def run_in_transaction(backend, callback, *args, max_attempts: int = 5, **kwargs):
+    """Run callback(transaction, *args, **kwargs) in a transaction on either backend
+
+    The callback may run several times if the transaction conflicts with a
+    concurrent write, so it must not have side effects outside the transaction.
+    """
+    if is_memory_backend(backend):
+        return backend.run_transaction(callback, *args, max_attempts=max_attempts, **kwargs)
+
+    from firebase_admin import firestore
+
+    @firestore.transactional
+    def _run(transaction):
+        return callback(transaction, *args, **kwargs)
+
+    return _run(backend.transaction(max_attempts=max_attempts))
@@ -1,160 +1,215 @@
-from flask import request, jsonify
+from flask import request, jsonify, g
 from functools import wraps
-from config.firebase import get_auth
+import copy
+import hashlib
+import os
+import time
+from cachetools import TLRUCache
+from config.firebase import ROLE_CLAIMS_ENABLED, get_token_verifier
 from models.roles import UserRole, Permission, RoleHelper
+from utils.cache import CountingCache, MISSING
+
+# Decoded ID tokens keyed by SHA-256 of the raw token. Each entry expires at
+# the token's own `exp` claim, so a cached token is never served past expiry.
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+
+# In claims mode the role comes from the token, so tokens are verified with a
+# revocation check, and cached tokens are re-verified at least this often
+# (seconds). Revoking a user's tokens (done when a role change takes
+# permissions away) therefore reaches every worker within this interval.
+TOKEN_REVOCATION_CHECK_INTERVAL = int(os.getenv('TOKEN_REVOCATION_CHECK_INTERVAL', '300'))
+
+def _token_expiry(key, claims, now):
+    expires_at = claims.get('exp', now)
+    if ROLE_CLAIMS_ENABLED:
+        expires_at = min(expires_at, now + TOKEN_REVOCATION_CHECK_INTERVAL)
+    return expires_at
+
+token_cache = CountingCache(TLRUCache(
+    maxsize=TOKEN_CACHE_SIZE,
+    ttu=_token_expiry,
+    timer=time.time
+))
+
+def verify_token(token):
+    """Verify an ID token, serving repeat tokens from the verified-token cache"""
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    decoded_token = token_cache.get(key)
+    if decoded_token is MISSING:
+        decoded_token = get_token_verifier().verify_id_token(token, check_revoked=ROLE_CLAIMS_ENABLED)
+        token_cache.set(key, decoded_token)
+    
+    # Hand out a copy so callers can't mutate the cached entry
+    return copy.deepcopy(decoded_token)
+
+def get_token_cache_stats():
+    """Get verified-token cache hit/miss counters"""
+    return token_cache.stats()
+
+class AuthContext:
+    """Authentication state for the current request, resolved at most once"""
+    
+    def __init__(self, token):
+        self.token = token
+        self.user = None
+        self.error = None
+        self.verifications = 0
+        self.role_lookups = 0
+        self._role = MISSING
+        self._permission_mask = None
+        
+        if token:
+            try:
+                self.verifications += 1
+                self.user = verify_token(token)
+            except Exception as e:
+                self.error = e
+    
+    @property
+    def is_authenticated(self):
+        return self.user is not None
+    
+    @property
+    def role(self):
+        """User role, looked up on first access"""
+        if self._role is MISSING and self.user is not None:
+            # Lazy import to avoid circular imports
+            from services.role_service import role_service
+            self.role_lookups += 1
+            self._role = role_service.get_role_from_token(self.user)
+        return None if self._role is MISSING else self._role
+    
+    @property
+    def permission_mask(self):
+        """Permission bitmask granted by the user's role"""
+        if self._permission_mask is None:
+            role = self.role
+            self._permission_mask = RoleHelper.get_role_permission_mask(role) if role else 0
+        return self._permission_mask
+
+def get_auth_context():
+    """Get the current request's auth context, creating it on first use"""
+    auth_context = g.get('auth_context')
+    
+    if auth_context is None:
+        token = request.headers.get('Authorization')
+        
+        # Remove 'Bearer ' prefix if present
+        if token and token.startswith('Bearer '):
+            token = token[7:]
+        
+        auth_context = AuthContext(token)
+        g.auth_context = auth_context
+        
+        # Keep request attributes for code that reads them directly
+        request.user = auth_context.user
+    
+    return auth_context
 
 def require_auth(f):
     """Basic authentication decorator"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        token = request.headers.get('Authorization')
+        auth_context = get_auth_context()
         
-        if not token:
+        if not auth_context.token:
             return jsonify({'error': 'No token provided'}), 401
         
-        try:
-            # Remove 'Bearer ' prefix if present
-            if token.startswith('Bearer '):
-                token = token[7:]
-            
-            # Verify JWT token with Firebase Admin SDK
-            auth_service = get_auth()
-            decoded_token = auth_service.verify_id_token(token)
-            request.user = decoded_token
-            return f(*args, **kwargs)
-        except Exception as e:
-            return jsonify({'error': 'Invalid token', 'details': str(e)}), 401
+        if not auth_context.is_authenticated:
+            return jsonify({'error': 'Invalid token', 'details': str(auth_context.error)}), 401
+        
+        return f(*args, **kwargs)
     
     return decorated_function
 
+def _resolve_role(auth_context):
+    """Authenticate and resolve the role, returning (role, error_response)"""
+    if not auth_context.token:
+        return None, (jsonify({'error': 'No token provided'}), 401)
+    
+    if not auth_context.is_authenticated:
+        return None, (jsonify({'error': 'Authentication failed', 'details': str(auth_context.error)}), 401)
+    
+    try:
+        user_role = auth_context.role
+    except Exception as e:
+        return None, (jsonify({'error': 'Authentication failed', 'details': str(e)}), 401)
+    
+    if not user_role:
+        return None, (jsonify({'error': 'No role assigned to user'}), 403)
+    
+    # Add role to request for use in endpoint
+    request.user_role = user_role
+    return user_role, None
+
 def require_role(*allowed_roles):
     """Decorator to require specific roles for accessing endpoints"""
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # First check authentication
-            token = request.headers.get('Authorization')
+            user_role, error_response = _resolve_role(get_auth_context())
+            if error_response:
+                return error_response
             
-            if not token:
-                return jsonify({'error': 'No token provided'}), 401
+            # Check if user has required role
+            if user_role not in allowed_roles:
+                return jsonify({
+                    'error': 'Insufficient permissions',
+                    'required_roles': [role.value for role in allowed_roles],
+                    'user_role': user_role.value
+                }), 403
             
-            try:
-                # Remove 'Bearer ' prefix if present
-                if token.startswith('Bearer '):
-                    token = token[7:]
-                
-                # Verify JWT token
-                auth_service = get_auth()
-                decoded_token = auth_service.verify_id_token(token)
-                request.user = decoded_token
-                
-                # Get user role - lazy import to avoid circular imports
-                from services.role_service import role_service
-                uid = decoded_token['uid']
-                user_role = role_service.get_user_role(uid)
-                
-                if not user_role:
-                    return jsonify({'error': 'No role assigned to user'}), 403
-                
-                # Check if user has required role
-                if user_role not in allowed_roles:
-                    return jsonify({
-                        'error': 'Insufficient permissions',
-                        'required_roles': [role.value for role in allowed_roles],
-                        'user_role': user_role.value
-                    }), 403
-                
-                # Add role to request for use in endpoint
-                request.user_role = user_role
-                
-                return f(*args, **kwargs)
-            except Exception as e:
-                return jsonify({'error': 'Authentication failed', 'details': str(e)}), 401
+            return f(*args, **kwargs)
         
         return decorated_function
     return decorator
 
 def require_permission(*required_permissions):
     """Decorator to require specific permissions for accessing endpoints"""
+    # Compile the requirement once, when the route is decorated
+    required_mask = RoleHelper.get_permissions_mask(required_permissions)
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # First check authentication
-            token = request.headers.get('Authorization')
+            auth_context = get_auth_context()
+            user_role, error_response = _resolve_role(auth_context)
+            if error_response:
+                return error_response
             
-            if not token:
-                return jsonify({'error': 'No token provided'}), 401
+            # Check if user has all required permissions
+            user_mask = auth_context.permission_mask
             
-            try:
-                # Remove 'Bearer ' prefix if present
-                if token.startswith('Bearer '):
-                    token = token[7:]
-                
-                # Verify JWT token
-                auth_service = get_auth()
-                decoded_token = auth_service.verify_id_token(token)
-                request.user = decoded_token
-                
-                # Get user role - lazy import to avoid circular imports
-                from services.role_service import role_service
-                uid = decoded_token['uid']
-                user_role = role_service.get_user_role(uid)
-                
-                if not user_role:
-                    return jsonify({'error': 'No role assigned to user'}), 403
-                
-                # Check if user has all required permissions
-                user_permissions = RoleHelper.get_role_permissions(user_role)
-                
-                missing_permissions = []
-                for permission in required_permissions:
-                    if permission not in user_permissions:
-                        missing_permissions.append(permission.value)
-                
-                if missing_permissions:
-                    return jsonify({
-                        'error': 'Insufficient permissions',
-                        'missing_permissions': missing_permissions,
-                        'user_role': user_role.value
-                    }), 403
-                
-                # Add role to request for use in endpoint
-                request.user_role = user_role
-                
-                return f(*args, **kwargs)
-            except Exception as e:
-                return jsonify({'error': 'Authentication failed', 'details': str(e)}), 401
+            if user_mask & required_mask != required_mask:
+                missing_permissions = RoleHelper.get_missing_permissions(user_mask, required_permissions)
+                return jsonify({
+                    'error': 'Insufficient permissions',
+                    'missing_permissions': [permission.value for permission in missing_permissions],
+                    'user_role': user_role.value
+                }), 403
+            
+            return f(*args, **kwargs)
         
         return decorated_function
     return decorator
 
 def require_admin(f):
     """Decorator to require admin role"""
-    @require_role(UserRole.ADMIN)
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        return f(*args, **kwargs)
-    return decorated_function
+    return require_role(UserRole.ADMIN)(f)
 
 def require_restaurant_or_admin(f):
     """Decorator to require restaurant or admin role"""
-    @require_role(UserRole.RESTAURANT, UserRole.ADMIN)
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        return f(*args, **kwargs)
-    return decorated_function
+    return require_role(UserRole.RESTAURANT, UserRole.ADMIN)(f)
 
 def require_agent_or_admin(f):
     """Decorator to require agent or admin role"""
-    @require_role(UserRole.AGENT, UserRole.ADMIN)
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        return f(*args, **kwargs)
-    return decorated_function
+    return require_role(UserRole.AGENT, UserRole.ADMIN)(f)
 
 def get_current_user():
     """Get current authenticated user from request"""
-    return getattr(request, 'user', None)
+    auth_context = g.get('auth_context')
+    return auth_context.user if auth_context else None
 
 def get_current_user_id():
     """Get current authenticated user ID"""
@@ -163,7 +218,8 @@ def get_current_user_id():
 
 def get_current_user_role():
     """Get current authenticated user role"""
-    return getattr(request, 'user_role', None)
+    auth_context = g.get('auth_context')
+    return auth_context.role if auth_context else None
 
 def check_role_hierarchy(f):
     """Decorator to check if current user can manage target user based on role hierarchy"""
@@ -186,5 +242,4 @@ def check_role_hierarchy(f):
                 }), 403
         
         return f(*args, **kwargs)
-    return decorated_function
-
+    return decorated_function
\ No newline at end of file
@@ -0,0 +1,56 @@
+from flask import request
+import gzip
+import os
+
+# brotli is optional: without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+# Encodings in server preference order
+CONTENT_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        # Brotli quality runs 0-11; map the shared level onto it
+        return brotli.compress(data, quality=min(11, COMPRESSION_LEVEL + 2))
+    return gzip.compress(data, compresslevel=COMPRESSION_LEVEL)
+
+def compress_response(response):
+    """Compress a response body with the best encoding the client accepts"""
+    if (response.status_code < 200 or response.status_code >= 300 or response.status_code == 204 or
+            response.direct_passthrough or response.is_streamed or
+            'Content-Encoding' in response.headers or
+            response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = request.accept_encodings.best_match(CONTENT_ENCODINGS)
+    if encoding is None:
+        return response
+
+    response.set_data(_compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+
+    # A strong ETag names exact bytes, so each encoding gets its own
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+
+    return response
+
+def init_compression(app):
+    """Compress the app's responses (gzip, and brotli if installed)"""
+    app.after_request(compress_response)
@@ -0,0 +1,84 @@
+from flask import request, make_response
+from functools import wraps
+import hashlib
+import os
+from datetime import timezone
+from middleware.compression import CONTENT_ENCODINGS
+
+# Seconds a shared cache (reverse proxy, CDN) may serve a public response without revalidating
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '30'))
+
+def make_etag(version) -> str:
+    """Strong ETag for the current URL (path and query string) at a content version
+
+    The version must come from the content itself (a digest, or a stored
+    field such as updated_at), never from a per-process counter: workers
+    and restarts would hand out equal tags for different content.
+    """
+    query = '&'.join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+    raw = f"{request.path}?{query}|{version!r}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+def conditional(version, last_modified=None, public: bool = False, max_age: int = HTTP_CACHE_MAX_AGE):
+    """Serve a GET route with ETag / Last-Modified validators and a Cache-Control policy
+
+    version(**view_args) returns the content version of the response (None
+    disables caching for that request); last_modified(**view_args), if
+    given, returns a datetime. When the client already holds that version
+    (If-None-Match, or If-Modified-Since without an ETag), a 304 is returned
+    without calling the view, so nothing is loaded or serialized.
+
+    public responses may be stored by shared caches for max_age seconds;
+    others (e.g. behind require_role, so always sent with credentials) are
+    private and revalidated on every use. Put this below require_role so
+    authorization still runs first.
+    """
+    if public:
+        cache_control = f"public, max-age={max_age}"
+    else:
+        cache_control = "private, no-cache"
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                current_version = version(**kwargs)
+            except Exception as e:
+                print(f"⚠️  Could not get content version: {str(e)}")
+                current_version = None
+            if current_version is None:
+                return f(*args, **kwargs)
+
+            etag = make_etag(current_version)
+            modified_at = last_modified(**kwargs) if last_modified is not None else None
+            if modified_at is not None:
+                # HTTP dates have whole seconds; stored timestamps are naive UTC or aware
+                modified_at = modified_at.replace(microsecond=0)
+                if modified_at.tzinfo is None:
+                    modified_at = modified_at.replace(tzinfo=timezone.utc)
+
+            not_modified = False
+            if request.if_none_match:
+                # The client may hold a compressed variant, tagged with its encoding
+                for candidate in [etag] + [f"{etag}-{encoding}" for encoding in CONTENT_ENCODINGS]:
+                    if request.if_none_match.contains(candidate):
+                        etag, not_modified = candidate, True
+                        break
+            elif modified_at is not None and request.if_modified_since is not None:
+                not_modified = modified_at <= request.if_modified_since
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if modified_at is not None:
+                response.last_modified = modified_at
+            response.headers['Cache-Control'] = cache_control
+            return response
+
+        return decorated_function
+    return decorator
@@ -103,6 +103,14 @@ ROLE_PERMISSIONS = {
     ]
 }
 
+# Permission bitmasks compiled once at import - a permission check is a single AND
+PERMISSION_BITS = {permission: 1 << index for index, permission in enumerate(Permission)}
+
+ROLE_PERMISSION_MASKS = {
+    role: sum(PERMISSION_BITS[permission] for permission in set(permissions))
+    for role, permissions in ROLE_PERMISSIONS.items()
+}
+
 class RoleHelper:
     """Helper class for role-related operations"""
     
@@ -111,11 +119,33 @@ class RoleHelper:
         """Get permissions for a specific role"""
         return ROLE_PERMISSIONS.get(role, [])
     
+    @staticmethod
+    def get_role_permission_mask(role: UserRole) -> int:
+        """Get the compiled permission bitmask for a role"""
+        return ROLE_PERMISSION_MASKS.get(role, 0)
+    
+    @staticmethod
+    def get_permissions_mask(permissions) -> int:
+        """Compile a collection of permissions into a bitmask"""
+        mask = 0
+        for permission in permissions:
+            mask |= PERMISSION_BITS[permission]
+        return mask
+    
+    @staticmethod
+    def get_mask_permissions(mask: int) -> List[Permission]:
+        """Expand a permission bitmask into its permissions (in declaration order)"""
+        return [permission for permission, bit in PERMISSION_BITS.items() if mask & bit]
+    
+    @staticmethod
+    def get_missing_permissions(role_mask: int, permissions) -> List[Permission]:
+        """Get the permissions not covered by a role bitmask"""
+        return [permission for permission in permissions if not role_mask & PERMISSION_BITS[permission]]
+    
     @staticmethod
     def has_permission(role: UserRole, permission: Permission) -> bool:
         """Check if a role has a specific permission"""
-        role_permissions = RoleHelper.get_role_permissions(role)
-        return permission in role_permissions
+        return bool(ROLE_PERMISSION_MASKS.get(role, 0) & PERMISSION_BITS[permission])
     
     @staticmethod
     def get_role_description(role: UserRole) -> str:
@@ -142,18 +142,26 @@ def get_delivery_history():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         limit = request.args.get('limit', 50, type=int)
+        cursor = request.args.get('cursor')
         
-        history = agent_service.get_delivery_history(
+        page = agent_service.get_delivery_history(
             agent_id, 
             start_date, 
             end_date, 
-            limit
+            limit,
+            cursor
         )
         
         return jsonify({
             'success': True,
-            'data': history
+            'data': page['orders'],
+            'next_cursor': page['next_cursor']
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify
-from middleware.auth import require_auth, get_current_user, get_current_user_id
-from config.firebase import get_auth
+from middleware.auth import require_auth, get_current_user, get_current_user_id, verify_token as verify_id_token
 from services.profile_service import profile_service
 
 # Create Blueprint
@@ -20,9 +19,8 @@ def verify_token():
         
         token = data['token']
         
-        # Verify token with Firebase Admin SDK
-        auth_service = get_auth()
-        decoded_token = auth_service.verify_id_token(token)
+        # Verify token with the configured verifier (Admin SDK or local keys), through the token cache
+        decoded_token = verify_id_token(token)
         
         return jsonify({
             'success': True,
@@ -2,10 +2,14 @@
 from flask import Blueprint, request, jsonify
 from functools import wraps
 from middleware.auth import get_current_user_id, require_role
+from middleware.http_cache import conditional
 from models.roles import UserRole
 from services.customer_service import customer_service
 from services.restaurant_service import restaurant_service
-from config.firebase import db
+from services.autocomplete_service import autocomplete_service
+from services.cart_store import CartVersionConflict
+from utils.prefix_index import MAX_SUGGESTIONS
+from utils.geo import parse_coordinates
 
 customer_bp = Blueprint('customer', __name__, url_prefix='/api/customer')
 
@@ -13,6 +17,7 @@ customer_bp = Blueprint('customer', __name__, url_prefix='/api/customer')
 # ===== RESTAURANT DISCOVERY =====
 
 @customer_bp.route('/restaurants', methods=['GET'])
+@conditional(lambda: customer_service.get_catalog_version(), public=True)
 def get_available_restaurants():
     """Get list of available restaurants for customers"""
     try:
@@ -35,12 +40,32 @@ def get_available_restaurants():
             except ValueError:
                 pass
         
-        restaurants = customer_service.get_available_restaurants(filters)
+        # Customer location: only restaurants delivering there, nearest first
+        coordinates = parse_coordinates(request.args.get('lat'), request.args.get('lng'))
+        if coordinates:
+            filters['lat'], filters['lng'] = coordinates
+        
+        # Pagination is opt-in: without a limit every restaurant is returned
+        sort = request.args.get('sort')
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = min(max(limit, 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        results = customer_service.get_available_restaurants(filters, sort, limit, offset)
         
         return jsonify({
             'success': True,
-            'data': restaurants
+            'data': results['restaurants'],
+            'next_offset': results['next_offset'],
+            'limit': limit,
+            'offset': offset
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -90,6 +115,11 @@ def add_delivery_address():
             'message': 'Address added successfully',
             'data': address
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -111,6 +141,11 @@ def update_delivery_address(address_id):
             'message': 'Address updated successfully',
             'data': updated_address
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -214,11 +249,82 @@ def search_restaurants():
                 'error': 'Search query is required'
             }), 400
         
-        results = customer_service.search_restaurants(query)
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        results = customer_service.search_restaurants(query, limit, offset)
+        
+        return jsonify({
+            'success': True,
+            'data': results['restaurants'],
+            'total': results['total'],
+            'limit': limit,
+            'offset': offset
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@customer_bp.route('/search/dishes', methods=['GET'])
+@require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+def search_dishes():
+    """Search menu items across all restaurants"""
+    try:
+        query = request.args.get('q', '')
+        if not query.strip():
+            return jsonify({
+                'success': False,
+                'error': 'Search query is required'
+            }), 400
+        
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        filters = {}
+        for flag in ('is_vegetarian', 'is_vegan', 'is_available'):
+            value = request.args.get(flag)
+            if value is not None:
+                filters[flag] = value.lower() == 'true'
+        
+        for bound in ('min_price', 'max_price'):
+            value = request.args.get(bound, type=float)
+            if value is not None:
+                filters[bound] = value
+        
+        exclude_allergens = request.args.get('exclude_allergens')
+        if exclude_allergens:
+            filters['exclude_allergens'] = {allergen.strip().lower() for allergen in exclude_allergens.split(',') if allergen.strip()}
+        
+        results = customer_service.search_dishes(query, filters, limit, offset)
+        
+        return jsonify({
+            'success': True,
+            'data': results['dishes'],
+            'total': results['total'],
+            'limit': limit,
+            'offset': offset
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@customer_bp.route('/autocomplete', methods=['GET'])
+@require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+def autocomplete():
+    """Suggest restaurant, cuisine and dish names for a search box prefix"""
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = min(max(request.args.get('limit', 5, type=int), 1), MAX_SUGGESTIONS)
+        
+        suggestions = autocomplete_service.suggest(prefix, limit)
         
         return jsonify({
             'success': True,
-            'data': results
+            'data': suggestions
         })
     except Exception as e:
         return jsonify({
@@ -229,6 +335,7 @@ def search_restaurants():
 @customer_bp.route('/cuisines', methods=['GET'])
 @customer_bp.route('/cuisines', methods=['GET'])
 @require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+@conditional(lambda: customer_service.get_catalog_version())
 def get_cuisine_types():
     """Get available cuisine types"""
     try:
@@ -245,6 +352,7 @@ def get_cuisine_types():
         }), 500
 @customer_bp.route('/restaurants/<restaurant_id>', methods=['GET'])
 @require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+@conditional(customer_service.get_restaurant_version, last_modified=customer_service.get_restaurant_updated_at)
 def get_restaurant_details(restaurant_id):
     """Get detailed information about a specific restaurant"""
     try:
@@ -262,6 +370,7 @@ def get_restaurant_details(restaurant_id):
 
 @customer_bp.route('/restaurants/<restaurant_id>/menu', methods=['GET'])
 @require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+@conditional(customer_service.get_menu_version)
 def get_restaurant_menu(restaurant_id):
     """Get restaurant menu for customers"""
     try:
@@ -313,6 +422,33 @@ def create_order():
             'error': 'Internal server error'
         }), 500
 
+@customer_bp.route('/orders/quote', methods=['POST'])
+@require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+def quote_order():
+    """Price an order ({restaurant_id, items}) or many carts ({carts: [...]}) on the server"""
+    try:
+        data = request.get_json() or {}
+        
+        if 'carts' in data:
+            result = customer_service.quote_orders(data['carts'])
+        else:
+            result = customer_service.quote_order(data.get('restaurant_id'), data.get('items'))
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @customer_bp.route('/orders', methods=['GET'])
 @require_role(UserRole.CUSTOMER, UserRole.ADMIN)
 def get_customer_orders():
@@ -321,13 +457,20 @@ def get_customer_orders():
         uid = get_current_user_id()
         status = request.args.get('status')
         limit = request.args.get('limit', 20, type=int)
+        cursor = request.args.get('cursor')
         
-        orders = customer_service.get_customer_orders(uid, status, limit)
+        page = customer_service.get_customer_orders(uid, status, limit, cursor)
         
         return jsonify({
             'success': True,
-            'data': orders
+            'data': page['orders'],
+            'next_cursor': page['next_cursor']
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -461,6 +604,37 @@ def save_pending_cart():
             'error': str(e)
         }), 500
 
+@customer_bp.route('/cart', methods=['PATCH'])
+@require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+def patch_cart():
+    """Apply a batch of cart operations against the client's cart version"""
+    try:
+        uid = get_current_user_id()
+        data = request.get_json() or {}
+        
+        result = customer_service.patch_cart(uid, data.get('version'), data.get('ops'))
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+    except CartVersionConflict as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'current_version': e.current_version
+        }), 409
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @customer_bp.route('/cart/sync', methods=['POST'])
 @require_role(UserRole.CUSTOMER, UserRole.ADMIN)
 def sync_cart():
@@ -372,14 +372,21 @@ def get_restaurant_orders():
         uid = get_current_user_id()
         status = request.args.get('status')
         limit = request.args.get('limit', 50, type=int)
+        cursor = request.args.get('cursor')
         
-        orders = restaurant_service.get_restaurant_orders(uid, status, limit)
+        page = restaurant_service.get_restaurant_orders(uid, status, limit, cursor)
         
         return jsonify({
             'success': True,
-            'data': orders,
-            'count': len(orders)
+            'data': page['orders'],
+            'count': len(page['orders']),
+            'next_cursor': page['next_cursor']
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
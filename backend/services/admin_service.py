@@ -3,11 +3,12 @@ from datetime import datetime, timedelta
 from firebase_admin import firestore
 from models.user_role import UserRole
 from services.role_service import role_service
+from data.repository import get_backend
 import json
 
 class AdminService:
-    def __init__(self):
-        self.db = firestore.client()
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_backend()
         self.users_collection = self.db.collection('users')
         self.restaurants_collection = self.db.collection('restaurants')
         self.orders_collection = self.db.collection('orders')
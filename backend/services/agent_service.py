@@ -1,12 +1,19 @@
 # backend/services/agent_service.py - COMPLETE FIXED VERSION
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from config.firebase import db
+from data.repository import get_backend
+from data.identity_map import get_document, set_document
+from data.batch_reader import BatchReader
+from data.pagination import clamp_page_size, decode_cursor, paginate
+from services.order_lifecycle import allowed_transitions, current_status, order_lifecycle
+from services.claim_arbiter import claim_arbiter
 from firebase_admin import firestore
 
 class AgentService:
-    def __init__(self):
-        self.db = db
+    def __init__(self, db=None, lifecycle=None, arbiter=None):
+        self.db = db if db is not None else get_backend()
+        self.lifecycle = lifecycle if lifecycle is not None else order_lifecycle
+        self.arbiter = arbiter if arbiter is not None else claim_arbiter
 
     # ===== AVAILABLE ORDERS =====
 
@@ -26,65 +33,61 @@ class AgentService:
                 
                 # Check if order is not assigned to any agent
                 if not order_data.get('agent_id'):
-                    # Get restaurant details
-                    restaurant_data = self._get_restaurant_details(order_data.get('restaurant_id'))
-                    order_data['restaurant'] = restaurant_data
-                    
-                    # Calculate estimated delivery fee
-                    order_data['delivery_fee'] = self._calculate_delivery_fee(order_data)
-                    
-                    # Add time since order was created
-                    if 'created_at' in order_data:
-                        order_data['time_since_created'] = self._calculate_time_since(order_data['created_at'])
-                    
                     available_orders.append(order_data)
             
-            # Sort by creation time (oldest first for fairness)
+            # Sort by creation time (oldest first for fairness) and apply limit
             available_orders.sort(key=lambda x: x.get('created_at', datetime.min))
+            available_orders = available_orders[:limit]
             
-            # Apply limit
-            return available_orders[:limit]
+            # Get restaurant details for the whole page in one batched read
+            reader = BatchReader(self.db)
+            for order_data in available_orders:
+                reader.add('restaurants', order_data.get('restaurant_id'))
+            reader.fetch()
+            
+            for order_data in available_orders:
+                order_data['restaurant'] = self._restaurant_details(reader, order_data.get('restaurant_id'))
+                
+                # Calculate estimated delivery fee
+                order_data['delivery_fee'] = self._calculate_delivery_fee(order_data)
+                
+                # Add time since order was created
+                if 'created_at' in order_data:
+                    order_data['time_since_created'] = self._calculate_time_since(order_data['created_at'])
+            
+            return available_orders
         except Exception as e:
             raise Exception(f"Error getting available orders: {str(e)}")
 
     def accept_order(self, agent_id: str, order_id: str, estimated_pickup_minutes: int = 15) -> Dict[str, Any]:
-        """Accept an order for delivery"""
-        try:
-            order_ref = self.db.collection('orders').document(order_id)
-            order_doc = order_ref.get()
-            
-            if not order_doc.exists:
-                raise ValueError("Order not found")
-            
-            order_data = order_doc.to_dict()
-            
-            # Check if order is still available (confirmed OR ready and not assigned)
-            if order_data.get('status') not in ['confirmed', 'ready'] or order_data.get('agent_id'):
+        """Accept an order for delivery
+
+        The assignment is committed in a transaction, so two agents can never
+        both get an order; agents racing another claim in this process are
+        refused before reaching Firestore.
+        """
+        def check(order_data):
+            # Still available: confirmed or ready and not assigned
+            if order_data.get('agent_id'):
+                self.arbiter.mark_taken(order_id, order_data['agent_id'])
                 raise ValueError("Order is no longer available")
-            
-            # Update order with agent assignment
-            now = datetime.utcnow()
-            estimated_pickup = now + timedelta(minutes=estimated_pickup_minutes)
-            
-            update_data = {
-                'agent_id': agent_id,
-                'status': 'assigned_to_agent',
-                'assigned_at': now,
-                'estimated_pickup_time': estimated_pickup,
-                'updated_at': now
-            }
-            
-            order_ref.update(update_data)
+            if 'assigned_to_agent' not in allowed_transitions(current_status(order_data), 'agent'):
+                raise ValueError("Order is no longer available")
+        
+        try:
+            estimated_pickup = datetime.utcnow() + timedelta(minutes=estimated_pickup_minutes)
+            with self.arbiter.claim(order_id, agent_id):
+                updated_order = self.lifecycle.transition(order_id, 'assigned_to_agent', 'agent', agent_id,
+                                                          check=check,
+                                                          updates={'agent_id': agent_id,
+                                                                   'estimated_pickup_time': estimated_pickup})
             
             # Update agent status to busy
             self._update_agent_status_internal(agent_id, 'busy')
             
-            # Return updated order
-            updated_order = order_data.copy()
-            updated_order.update(update_data)
-            updated_order['id'] = order_id
-            
             return updated_order
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error accepting order: {str(e)}")
 
@@ -102,26 +105,40 @@ class AgentService:
                 order_data = doc.to_dict()
                 order_data['id'] = doc.id
                 
-                # Get restaurant details
-                restaurant_data = self._get_restaurant_details(order_data.get('restaurant_id'))
-                order_data['restaurant'] = restaurant_data
-                
                 # Get customer details from order data first (better info), then fallback
-                customer_info = {
+                order_data['customer'] = {
                     'name': order_data.get('customer_name') or order_data.get('receiver_name', 'Customer'),
                     'phone': order_data.get('customer_phone') or order_data.get('receiver_phone', ''),
                     'email': order_data.get('customer_email', '')
                 }
                 
-                # If customer info not in order, try to get from customer service
-                if not customer_info['name'] or customer_info['name'] == 'Customer':
-                    customer_details = self._get_customer_details(order_data.get('customer_id'))
-                    customer_info.update(customer_details)
-                
-                order_data['customer'] = customer_info
-                
                 active_orders.append(order_data)
             
+            # Orders missing customer info fall back to the customer's profile
+            needs_customer = [
+                order_data for order_data in active_orders
+                if not order_data['customer']['name'] or order_data['customer']['name'] == 'Customer'
+            ]
+            
+            # Batch restaurant and user lookups for all orders into one read
+            reader = BatchReader(self.db)
+            for order_data in active_orders:
+                reader.add('restaurants', order_data.get('restaurant_id'))
+            for order_data in needs_customer:
+                reader.add('users', order_data.get('customer_id'))
+            reader.fetch()
+            
+            # Customers without a users document are looked up in customers, again in one read
+            for order_data in needs_customer:
+                if not reader.get('users', order_data.get('customer_id')):
+                    reader.add('customers', order_data.get('customer_id'))
+            reader.fetch()
+            
+            for order_data in active_orders:
+                order_data['restaurant'] = self._restaurant_details(reader, order_data.get('restaurant_id'))
+            for order_data in needs_customer:
+                order_data['customer'].update(self._customer_details(reader, order_data.get('customer_id')))
+            
             # Sort by assigned time (oldest first)
             active_orders.sort(key=lambda x: x.get('assigned_at', datetime.min))
             
@@ -131,118 +148,88 @@ class AgentService:
 
     def update_delivery_status(self, agent_id: str, order_id: str, status: str, location: Optional[Dict] = None) -> Dict[str, Any]:
         """Update delivery status"""
-        try:
-            order_ref = self.db.collection('orders').document(order_id)
-            order_doc = order_ref.get()
-            
-            if not order_doc.exists:
-                raise ValueError("Order not found")
-            
-            order_data = order_doc.to_dict()
-            
+        def check(order_data):
             # Verify agent owns this order
             if order_data.get('agent_id') != agent_id:
                 raise ValueError("You are not assigned to this order")
-            
-            # Validate status progression
-            current_status = order_data.get('status')
-            if not self._is_valid_status_transition(current_status, status):
-                raise ValueError(f"Invalid status transition from {current_status} to {status}")
-            
-            # Update order
-            now = datetime.utcnow()
-            update_data = {
-                'status': status,
-                'updated_at': now
-            }
-            
-            # Add status-specific timestamps
-            if status == 'picked_up':
-                update_data['picked_up_at'] = now
-            elif status == 'on_way':
-                update_data['on_way_at'] = now
-            elif status == 'delivered':
-                update_data['delivered_at'] = now
-                # Calculate delivery fee and add to agent earnings
-                self._process_delivery_completion(agent_id, order_data)
-                # Set agent back to available
-                self._update_agent_status_internal(agent_id, 'available')
+        
+        try:
+            update_data = {}
             
             # Add location if provided
             if location:
                 update_data['current_location'] = location
-                update_data['location_updated_at'] = now
+                update_data['location_updated_at'] = datetime.utcnow()
             
-            order_ref.update(update_data)
+            updated_order = self.lifecycle.transition(order_id, status, 'agent', agent_id, check=check,
+                                                      updates=update_data)
             
-            # Return updated order
-            updated_order = order_data.copy()
-            updated_order.update(update_data)
-            updated_order['id'] = order_id
+            if status == 'delivered':
+                # Calculate delivery fee and add to agent earnings
+                self._process_delivery_completion(agent_id, updated_order)
+                # Set agent back to available
+                self._update_agent_status_internal(agent_id, 'available')
             
             return updated_order
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error updating delivery status: {str(e)}")
 
     # ===== DELIVERY HISTORY & EARNINGS =====
     
     def get_delivery_history(self, agent_id: str, start_date: Optional[str] = None, 
-                           end_date: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get agent's delivery history"""
+                           end_date: Optional[str] = None, limit: int = 50,
+                           cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get one page of the agent's delivery history, newest first"""
+        page_cursor = decode_cursor(cursor)
         try:
             orders_ref = self.db.collection('orders')
             
             # Start with basic query - agent_id and status
             query = orders_ref.where('agent_id', '==', agent_id).where('status', '==', 'delivered')
             
-            # Don't add date filters to avoid index issues - we'll filter in memory if needed
-            query = query.limit(limit * 2)  # Get more records to filter later
+            # Date filters run in Firestore, on the same field the page is ordered by
+            start_dt = self._parse_date_filter(start_date)
+            if start_dt:
+                query = query.where('delivered_at', '>=', start_dt)
+            
+            end_dt = self._parse_date_filter(end_date)
+            if end_dt:
+                query = query.where('delivered_at', '<=', end_dt)
+            
+            snapshots, next_cursor = paginate(query, orders_ref, 'delivered_at', clamp_page_size(limit, 50), page_cursor)
             
             history = []
-            for doc in query.stream():
+            for doc in snapshots:
                 order_data = doc.to_dict()
                 order_data['id'] = doc.id
-                
-                # Manual date filtering if needed
-                delivered_at = order_data.get('delivered_at')
-                if delivered_at:
-                    # Convert string to datetime if needed
-                    if isinstance(delivered_at, str):
-                        try:
-                            delivered_at = datetime.fromisoformat(delivered_at.replace('Z', '+00:00'))
-                        except:
-                            continue
-                    
-                    # Apply date filters manually
-                    if start_date:
-                        try:
-                            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                            if delivered_at < start_dt:
-                                continue
-                        except:
-                            pass
-                    
-                    if end_date:
-                        try:
-                            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                            if delivered_at > end_dt:
-                                continue
-                        except:
-                            pass
-                
-                # Get restaurant details
-                order_data['restaurant'] = self._get_restaurant_details(order_data.get('restaurant_id'))
-                
                 history.append(order_data)
             
-            # Sort by delivered_at (newest first) and limit
-            history.sort(key=lambda x: x.get('delivered_at', datetime.min), reverse=True)
-            return history[:limit]
+            # Get restaurant details for the page in one batched read
+            reader = BatchReader(self.db)
+            for order_data in history:
+                reader.add('restaurants', order_data.get('restaurant_id'))
+            reader.fetch()
+            
+            for order_data in history:
+                order_data['restaurant'] = self._restaurant_details(reader, order_data.get('restaurant_id'))
+            
+            return {'orders': history, 'next_cursor': next_cursor}
             
         except Exception as e:
             print(f"Error getting delivery history: {str(e)}")
             # Return mock data for now
-            return self._get_mock_delivery_history()
+            return {'orders': self._get_mock_delivery_history(), 'next_cursor': None}
+
+    def _parse_date_filter(self, value: Optional[str]) -> Optional[datetime]:
+        """Parse an ISO date filter, ignoring values that don't parse"""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
 
     def _get_mock_delivery_history(self) -> List[Dict[str, Any]]:
         """Return mock delivery history for development"""
@@ -340,7 +327,7 @@ class AgentService:
         try:
             # Get user basic info
             users_ref = self.db.collection('users').document(agent_id)
-            user_doc = users_ref.get()
+            user_doc = get_document(users_ref)
             
             if not user_doc.exists:
                 # Create a basic user profile if it doesn't exist
@@ -352,14 +339,14 @@ class AgentService:
                     'created_at': datetime.utcnow(),
                     'updated_at': datetime.utcnow()
                 }
-                users_ref.set(basic_user_data)
+                set_document(users_ref, basic_user_data)
                 user_data = basic_user_data
             else:
                 user_data = user_doc.to_dict()
 
             # Get agent-specific data
             agents_ref = self.db.collection('agents').document(agent_id)
-            agent_doc = agents_ref.get()
+            agent_doc = get_document(agents_ref)
             
             if not agent_doc.exists:
                 # Create default agent profile
@@ -374,7 +361,7 @@ class AgentService:
                     'created_at': datetime.utcnow(),
                     'updated_at': datetime.utcnow()
                 }
-                agents_ref.set(default_agent_data)
+                set_document(agents_ref, default_agent_data)
                 agent_data = default_agent_data
             else:
                 agent_data = agent_doc.to_dict()
@@ -414,7 +401,7 @@ class AgentService:
             if user_updates:
                 user_updates['updated_at'] = datetime.utcnow()
                 # Use set with merge=True to create document if it doesn't exist
-                self.db.collection('users').document(agent_id).set(user_updates, merge=True)
+                set_document(self.db.collection('users').document(agent_id), user_updates, merge=True)
             
             # Update agent-specific data
             agent_updates = {}
@@ -426,7 +413,7 @@ class AgentService:
             if agent_updates:
                 agent_updates['updated_at'] = datetime.utcnow()
                 # Use set with merge=True to create document if it doesn't exist
-                self.db.collection('agents').document(agent_id).set(agent_updates, merge=True)
+                set_document(self.db.collection('agents').document(agent_id), agent_updates, merge=True)
             
             # Return updated profile
             return self.get_agent_profile(agent_id)
@@ -477,53 +464,26 @@ class AgentService:
             update_data['current_location'] = location
             update_data['location_updated_at'] = datetime.utcnow()
         
-        self.db.collection('agents').document(agent_id).set(update_data, merge=True)
+        set_document(self.db.collection('agents').document(agent_id), update_data, merge=True)
         
         return update_data
 
-    def _get_restaurant_details(self, restaurant_id: str) -> Dict[str, Any]:
-        """Get restaurant details"""
-        try:
-            restaurant_ref = self.db.collection('restaurants').document(restaurant_id)
-            restaurant_doc = restaurant_ref.get()
-            
-            if restaurant_doc.exists:
-                return restaurant_doc.to_dict()
-            return {'name': 'Unknown Restaurant'}
-        except:
-            return {'name': 'Unknown Restaurant'}
+    def _restaurant_details(self, reader: BatchReader, restaurant_id: str) -> Dict[str, Any]:
+        """Get restaurant details from a fetched batch"""
+        return reader.get('restaurants', restaurant_id) or {'name': 'Unknown Restaurant'}
 
-    def _get_customer_details(self, customer_id: str) -> Dict[str, Any]:
-        """Get customer details with proper info"""
-        try:
-            # First try to get from users collection
-            user_ref = self.db.collection('users').document(customer_id)
-            user_doc = user_ref.get()
-            
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                return {
-                    'name': user_data.get('name', 'Customer'),
-                    'phone': user_data.get('phone', ''),
-                    'email': user_data.get('email', '')
-                }
-            
-            # If not found in users, try customers collection
-            customer_ref = self.db.collection('customers').document(customer_id)
-            customer_doc = customer_ref.get()
-            
-            if customer_doc.exists:
-                customer_data = customer_doc.to_dict()
-                return {
-                    'name': customer_data.get('name', 'Customer'),
-                    'phone': customer_data.get('phone', ''),
-                    'email': customer_data.get('email', '')
-                }
-            
-            return {'name': 'Customer', 'phone': '', 'email': ''}
-        except Exception as e:
-            print(f"Error getting customer details: {str(e)}")
-            return {'name': 'Customer', 'phone': '', 'email': ''}
+    def _customer_details(self, reader: BatchReader, customer_id: str) -> Dict[str, Any]:
+        """Get customer details from a fetched batch (users first, then customers)"""
+        user_data = reader.get('users', customer_id) or reader.get('customers', customer_id)
+        
+        if user_data:
+            return {
+                'name': user_data.get('name', 'Customer'),
+                'phone': user_data.get('phone', ''),
+                'email': user_data.get('email', '')
+            }
+        
+        return {'name': 'Customer', 'phone': '', 'email': ''}
 
     def _calculate_delivery_fee(self, order_data: Dict[str, Any]) -> float:
         """Calculate delivery fee for an order"""
@@ -534,29 +494,19 @@ class AgentService:
         # For now, return base fee - you can integrate with maps API for real distance
         return base_fee
 
-    def _is_valid_status_transition(self, current_status: str, new_status: str) -> bool:
-        """Validate if status transition is allowed"""
-        valid_transitions = {
-            'assigned_to_agent': ['picked_up'],
-            'picked_up': ['on_way'],
-            'on_way': ['delivered']
-        }
-        
-        return new_status in valid_transitions.get(current_status, [])
-
     def _process_delivery_completion(self, agent_id: str, order_data: Dict[str, Any]):
         """Process delivery completion - update agent stats and earnings"""
         try:
             agent_ref = self.db.collection('agents').document(agent_id)
             
             # Update agent stats
-            agent_doc = agent_ref.get()
+            agent_doc = get_document(agent_ref)
             current_stats = agent_doc.to_dict() if agent_doc.exists else {}
             
             total_deliveries = current_stats.get('total_deliveries', 0) + 1
             total_earnings = current_stats.get('total_earnings', 0.0) + order_data.get('delivery_fee', 0.0)
             
-            agent_ref.set({
+            set_document(agent_ref, {
                 'total_deliveries': total_deliveries,
                 'total_earnings': total_earnings,
                 'last_delivery_at': datetime.utcnow(),
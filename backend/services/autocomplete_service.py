@@ -0,0 +1,109 @@
+# backend/services/autocomplete_service.py
+import threading
+from typing import Any, Dict, Optional
+from services.catalog_service import catalog_service
+from services.search_service import search_service
+from utils.prefix_index import PrefixIndex, normalize_phrase
+
+class AutocompleteService:
+    """Search-box suggestions for restaurant names, cuisines and dish names
+
+    Each kind has its own prefix index, fed by the catalog and dish index
+    listeners, so suggestions follow every restaurant and menu change
+    without a rebuild. Restaurants rank by rating; cuisines and dishes by
+    how many restaurants or menu items share the name.
+    """
+
+    def __init__(self, catalog=None, search=None):
+        self.catalog = catalog if catalog is not None else catalog_service
+        self.search = search if search is not None else search_service
+
+        self.restaurants = PrefixIndex()
+        self.cuisines = PrefixIndex()
+        self.dishes = PrefixIndex()
+
+        # _lock only guards the counts below and is never held while calling
+        # the catalog or the dish index, which call back into this service
+        self._lock = threading.RLock()
+        self._subscribed = False
+        self._subscribe_lock = threading.Lock()
+        # restaurant_id -> cuisine key, item_id -> dish name key
+        self._restaurant_cuisines: Dict[str, str] = {}
+        self._dish_names: Dict[str, str] = {}
+        # name key -> [display name, count]
+        self._cuisine_counts: Dict[str, list] = {}
+        self._dish_counts: Dict[str, list] = {}
+
+    def _ensure_subscribed(self):
+        """Build the indexes on first use; they are then updated per change"""
+        if self._subscribed:
+            return
+        with self._subscribe_lock:
+            if not self._subscribed:
+                self.catalog.add_listener(self._on_restaurant_change)
+                self.search.add_dish_listener(self._on_dish_change)
+                self._subscribed = True
+
+    def _on_restaurant_change(self, restaurant_id: str, restaurant_data: Optional[Dict[str, Any]],
+                              card: Optional[Dict[str, Any]]):
+        with self._lock:
+            if card is None:
+                self.restaurants.remove(restaurant_id)
+                cuisine = None
+            else:
+                self.restaurants.put(restaurant_id, card['name'], card.get('rating') or 0)
+                cuisine = restaurant_data.get('cuisine_type') or restaurant_data.get('cuisine')
+
+            self._recount(self.cuisines, self._cuisine_counts, self._restaurant_cuisines, restaurant_id, cuisine)
+
+    def _on_dish_change(self, item_id: str, dish: Optional[Dict[str, Any]]):
+        with self._lock:
+            name = dish.get('name') if dish is not None else None
+            self._recount(self.dishes, self._dish_counts, self._dish_names, item_id, name)
+
+    def _recount(self, index: PrefixIndex, counts: Dict[str, list], owners: Dict[str, str],
+                 owner_id: str, name: Optional[str]):
+        """Move one restaurant or menu item's name from its previous entry to a new one"""
+        key = normalize_phrase(name)
+        previous_key = owners.get(owner_id)
+        if previous_key == key:
+            return
+
+        if previous_key is not None:
+            del owners[owner_id]
+            entry = counts[previous_key]
+            entry[1] -= 1
+            if entry[1] > 0:
+                index.put(previous_key, entry[0], entry[1])
+            else:
+                del counts[previous_key]
+                index.remove(previous_key)
+
+        if key:
+            owners[owner_id] = key
+            entry = counts.setdefault(key, [name.strip(), 0])
+            entry[1] += 1
+            index.put(key, entry[0], entry[1])
+
+    def suggest(self, prefix: str, limit: int = 5) -> Dict[str, Any]:
+        """Get the top restaurant, cuisine and dish name suggestions for a prefix"""
+        self._ensure_subscribed()
+        return {
+            'restaurants': [{'id': restaurant_id, 'name': name, 'rating': rating}
+                            for restaurant_id, name, rating in self.restaurants.suggest(prefix, limit)],
+            'cuisines': [{'name': name, 'restaurants': count}
+                         for _, name, count in self.cuisines.suggest(prefix, limit)],
+            'dishes': [{'name': name, 'menu_items': count}
+                       for _, name, count in self.dishes.suggest(prefix, limit)]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index sizes"""
+        return {
+            'restaurants': len(self.restaurants),
+            'cuisines': len(self.cuisines),
+            'dishes': len(self.dishes)
+        }
+
+# Create a singleton instance
+autocomplete_service = AutocompleteService()
@@ -0,0 +1,223 @@
+# backend/services/cart_store.py
+import atexit
+import copy
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+from cachetools import TTLCache
+from data.repository import get_backend
+
+# Seconds a cart change may wait before it is written; 0 writes every change through
+CART_FLUSH_INTERVAL = float(os.getenv('CART_FLUSH_INTERVAL', '2'))
+
+# Carts kept in memory once written (carts with unwritten changes are always kept),
+# and for how many seconds; 0 reads every cart without unwritten changes from Firestore
+CART_CACHE_SIZE = int(os.getenv('CART_CACHE_SIZE', '10000'))
+CART_CACHE_TTL = float(os.getenv('CART_CACHE_TTL', '5'))
+
+# Firestore accepts at most 500 writes per batch
+MAX_BATCH_WRITES = 500
+
+# Stands in for "this customer has no cart" in the cache and the pending writes
+_NO_CART = None
+
+# Locks serializing changes to the same cart (customers hash onto one of these)
+CART_LOCK_STRIPES = 64
+
+class CartVersionConflict(ValueError):
+    """A cart change was based on an older version of the cart"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Cart has changed (current version {current_version})")
+        self.current_version = current_version
+
+class CartStore:
+    """Write-behind store for pending_carts
+
+    Carts are read from and changed in memory; a background thread writes
+    each changed cart once per flush interval, however many times it
+    changed, in one batch for all carts. flush() writes a customer's cart
+    at once (checkout does this), and everything pending is written when
+    the process exits.
+
+    Each process has its own store. With several worker processes, a
+    change made on one worker is seen by the others only once it has been
+    flushed and their cached copy (kept CART_CACHE_TTL seconds) has expired,
+    and modify() only serializes changes within one process: two workers
+    changing the same cart at once each write their own result, and the
+    last flush wins. CART_FLUSH_INTERVAL=0 removes the write delay but not
+    the stale reads or the lost updates. Route each customer's requests to
+    one worker (sticky sessions); without that, CART_CACHE_TTL=0 and
+    CART_FLUSH_INTERVAL=0 keep the staleness to a single request, but
+    concurrent changes from different workers can still overwrite each other.
+    """
+
+    def __init__(self, db=None, collection: str = 'pending_carts', flush_interval: float = CART_FLUSH_INTERVAL,
+                 cache_size: int = CART_CACHE_SIZE, cache_ttl: float = CART_CACHE_TTL):
+        self.db = db if db is not None else get_backend()
+        self.collection = collection
+        self.flush_interval = flush_interval
+
+        self._lock = threading.RLock()
+        # Serializes writes, so an older snapshot of a cart never lands after a newer one
+        self._flush_lock = threading.Lock()
+        # Written carts only, briefly: another worker may change them in Firestore
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # customer_id -> cart to write, or _NO_CART to delete
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._cart_locks = [threading.RLock() for _ in range(CART_LOCK_STRIPES)]
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher = None
+
+        self.reads = 0
+        self.cache_hits = 0
+        self.changes = 0
+        self.writes = 0
+        self.failed_flushes = 0
+
+    # ===== READS AND CHANGES =====
+
+    def get(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a customer's cart, or None if they have none"""
+        with self._lock:
+            if customer_id in self._pending:
+                self.cache_hits += 1
+                return copy.deepcopy(self._pending[customer_id])
+            if customer_id in self._cache:
+                self.cache_hits += 1
+                return copy.deepcopy(self._cache[customer_id])
+
+        doc = self.db.collection(self.collection).document(customer_id).get()
+        cart = doc.to_dict() if doc.exists else _NO_CART
+
+        with self._lock:
+            self.reads += 1
+            # A change made while we were reading wins over what we read
+            if customer_id in self._pending:
+                return copy.deepcopy(self._pending[customer_id])
+            self._cache[customer_id] = cart
+            return copy.deepcopy(cart)
+
+    def put(self, customer_id: str, cart: Dict[str, Any]):
+        """Replace a customer's cart; it is written within the flush interval"""
+        self._change(customer_id, copy.deepcopy(cart))
+
+    def delete(self, customer_id: str):
+        """Delete a customer's cart; it is deleted within the flush interval"""
+        self._change(customer_id, _NO_CART)
+
+    def modify(self, customer_id: str, change: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]):
+        """Atomically replace a cart with change(current cart), which may raise to leave it as is
+
+        change gets a copy of the cart (None if there is none) and returns
+        the new cart (None deletes it). No other change to the same cart
+        can happen in between in this process.
+        """
+        with self._cart_lock(customer_id):
+            new_cart = change(self.get(customer_id))
+            if new_cart is None:
+                self.delete(customer_id)
+            else:
+                self.put(customer_id, new_cart)
+            return new_cart
+
+    def _cart_lock(self, customer_id: str):
+        return self._cart_locks[hash(customer_id) % CART_LOCK_STRIPES]
+
+    def _change(self, customer_id: str, cart: Optional[Dict[str, Any]]):
+        with self._cart_lock(customer_id), self._lock:
+            self._pending[customer_id] = cart
+            self._cache[customer_id] = cart
+            self.changes += 1
+
+        if self.flush_interval <= 0:
+            self.flush(customer_id)
+        else:
+            self._ensure_flusher()
+
+    # ===== FLUSHING =====
+
+    def flush(self, customer_id: str = None) -> int:
+        """Write pending changes now (one customer's, or everyone's); returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                if customer_id is None:
+                    pending, self._pending = self._pending, {}
+                elif customer_id in self._pending:
+                    pending = {customer_id: self._pending.pop(customer_id)}
+                else:
+                    return 0
+
+            items = list(pending.items())
+            written = 0
+            try:
+                for start in range(0, len(items), MAX_BATCH_WRITES):
+                    batch = self.db.batch()
+                    for cart_customer_id, cart in items[start:start + MAX_BATCH_WRITES]:
+                        doc_ref = self.db.collection(self.collection).document(cart_customer_id)
+                        if cart is _NO_CART:
+                            batch.delete(doc_ref)
+                        else:
+                            batch.set(doc_ref, cart)
+                    batch.commit()
+                    written += len(items[start:start + MAX_BATCH_WRITES])
+            except Exception as e:
+                # Put back whatever wasn't written, unless it has changed again since
+                with self._lock:
+                    self.failed_flushes += 1
+                    for cart_customer_id, cart in items[written:]:
+                        self._pending.setdefault(cart_customer_id, cart)
+                    self.writes += written
+                print(f"⚠️  Cart flush failed ({len(items) - written} carts kept for retry): {str(e)}")
+                return written
+
+            with self._lock:
+                self.writes += written
+            return written
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name='cart-flusher', daemon=True)
+                self._flusher.start()
+                atexit.register(self.close)
+
+    def _run_flusher(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Cart flusher error: {str(e)}")
+
+    def close(self):
+        """Stop the background flusher and write everything pending"""
+        self._stopped.set()
+        self._wake.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=self.flush_interval + 5)
+        written = self.flush()
+        if written:
+            print(f"🛒 Flushed {written} pending carts on shutdown")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get read/write counters; writes_saved is changes coalesced into fewer writes"""
+        with self._lock:
+            return {
+                'cached_carts': len(self._cache),
+                'pending_writes': len(self._pending),
+                'reads': self.reads,
+                'cache_hits': self.cache_hits,
+                'changes': self.changes,
+                'writes': self.writes,
+                'writes_saved': max(0, self.changes - self.writes - len(self._pending)),
+                'failed_flushes': self.failed_flushes
+            }
+
+# Create a singleton instance
+cart_store = CartStore()
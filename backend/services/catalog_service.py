@@ -0,0 +1,306 @@
+# backend/services/catalog_service.py
+import bisect
+import heapq
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from data.repository import get_backend
+from utils.cache import content_digest
+
+# Seconds to wait for the listener's initial snapshot before falling back to a one-off scan
+CATALOG_LOAD_TIMEOUT = float(os.getenv('CATALOG_LOAD_TIMEOUT', '10'))
+
+def format_restaurant(restaurant_id: str, restaurant_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Format restaurant data consistently for the frontend"""
+    return {
+        'id': restaurant_id,
+        'name': restaurant_data.get('restaurant_name', restaurant_data.get('name', 'Unknown Restaurant')),
+        'description': restaurant_data.get('description', 'Delicious food awaits you'),
+        'cuisine': restaurant_data.get('cuisine_type', restaurant_data.get('cuisine', 'Various')),
+        'rating': restaurant_data.get('rating', 4.0),
+        'delivery_time': restaurant_data.get('estimated_delivery_time', restaurant_data.get('delivery_time', '30-45 min')),
+        'delivery_fee': restaurant_data.get('delivery_fee', 2.99),
+        'min_order': restaurant_data.get('min_order_amount', restaurant_data.get('min_order', 15.00)),
+        'is_open': restaurant_data.get('is_open', True),
+        'image_url': restaurant_data.get('logo_url', restaurant_data.get('image_url', '/api/placeholder/300/200')),
+        'address': restaurant_data.get('address_line_1', restaurant_data.get('address', '')),
+        'city': restaurant_data.get('city', ''),
+        'state': restaurant_data.get('state', ''),
+        'zip_code': restaurant_data.get('zip_code', ''),
+        'phone': restaurant_data.get('phone', ''),
+        'email': restaurant_data.get('email', ''),
+        'website': restaurant_data.get('website', ''),
+        # Full address
+        'full_address': f"{restaurant_data.get('address_line_1', '')} {restaurant_data.get('city', '')} {restaurant_data.get('state', '')} {restaurant_data.get('zip_code', '')}".strip()
+    }
+
+def _number(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def _delivery_minutes(delivery_time) -> float:
+    """Lower bound of a delivery time like '30-45 min' (unparseable times sort last)"""
+    match = re.search(r'\d+(?:\.\d+)?', str(delivery_time))
+    return float(match.group()) if match else float('inf')
+
+# Listing orders, as a sort key computed from a restaurant card (smallest first)
+RESTAURANT_SORTS = {
+    'rating': lambda card: -_number(card.get('rating')),
+    'delivery_time': lambda card: _delivery_minutes(card.get('delivery_time')),
+    'delivery_fee': lambda card: _number(card.get('delivery_fee'))
+}
+
+class CatalogService:
+    """Process-wide restaurant catalog kept current by a snapshot listener
+
+    The restaurants collection is loaded once, then every change is pushed
+    through on_snapshot, so browse endpoints read formatted restaurant cards
+    from memory instead of scanning Firestore. Cards are kept sorted for
+    every listing order, so a page is read off the front of a list instead
+    of sorting the catalog per request. Downstream indexes subscribe with
+    add_listener() and receive each change as it is applied.
+    """
+
+    def __init__(self, db=None, collection: str = 'restaurants', load_timeout: float = CATALOG_LOAD_TIMEOUT):
+        self.db = db if db is not None else get_backend()
+        self.collection = collection
+        self.load_timeout = load_timeout
+
+        self._lock = threading.RLock()
+        # Serialises changes so listeners see them in order; taken before _lock,
+        # and _lock itself is never held while a listener runs
+        self._listener_lock = threading.RLock()
+        self._start_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._watch = None
+
+        self._restaurants: Dict[str, Dict[str, Any]] = {}
+        self._cards: Dict[str, Dict[str, Any]] = {}
+        # restaurant_id -> digest of its document, and the XOR of them all: both only
+        # depend on the documents, so every process agrees on them
+        self._digests: Dict[str, str] = {}
+        self._catalog_digest = 0
+        self._cuisine_counts: Dict[str, int] = {}
+        # sort -> {restaurant_id: sort key}, and sort -> sorted [(sort key, restaurant_id)]
+        self._sort_keys: Dict[str, Dict[str, Any]] = {sort: {} for sort in RESTAURANT_SORTS}
+        self._sorted: Dict[str, List[tuple]] = {sort: [] for sort in RESTAURANT_SORTS}
+        self._listeners: List[Callable] = []
+        self.version = 0
+
+    # ===== LIFECYCLE =====
+
+    def start(self):
+        """Subscribe to the restaurants collection (idempotent)"""
+        if self._watch is not None:
+            return
+
+        with self._start_lock:
+            if self._watch is not None:
+                return
+
+            self._watch = self.db.collection(self.collection).on_snapshot(self._on_snapshot)
+
+            if not self._loaded.wait(self.load_timeout):
+                # The listener keeps running and will catch up; serve a one-off scan meanwhile
+                print("⚠️  Restaurant catalog snapshot is late - loading with a one-off scan")
+                for doc in self.db.collection(self.collection).stream():
+                    self._apply(doc.id, doc.to_dict())
+                self._loaded.set()
+
+            print(f"📚 Restaurant catalog loaded ({len(self._cards)} restaurants)")
+
+    def stop(self):
+        """Unsubscribe from the restaurants collection"""
+        with self._start_lock:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+                self._loaded.clear()
+
+    def _on_snapshot(self, docs, changes, read_time):
+        """Apply changed documents from the listener"""
+        for change in changes:
+            if change.type.name == 'REMOVED':
+                self._apply(change.document.id, None)
+            else:
+                self._apply(change.document.id, change.document.to_dict())
+        self._loaded.set()
+
+    def _apply(self, restaurant_id: str, restaurant_data: Optional[Dict[str, Any]]):
+        """Store (or remove, when data is None) one restaurant and notify listeners"""
+        with self._listener_lock:
+            with self._lock:
+                card = self._store(restaurant_id, restaurant_data)
+                listeners = list(self._listeners)
+
+            for listener in listeners:
+                try:
+                    listener(restaurant_id, restaurant_data, card)
+                except Exception as e:
+                    print(f"⚠️  Catalog listener failed: {str(e)}")
+
+    def _store(self, restaurant_id: str, restaurant_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Update the catalog for one restaurant and return its new card (call with _lock held)"""
+        previous_card = self._cards.get(restaurant_id)
+        if previous_card is not None:
+            self._count_cuisine(previous_card, -1)
+
+        self.version += 1
+
+        previous_digest = self._digests.pop(restaurant_id, None)
+        if previous_digest is not None:
+            self._catalog_digest ^= int(previous_digest, 16)
+
+        if restaurant_data is None:
+            self._restaurants.pop(restaurant_id, None)
+            self._cards.pop(restaurant_id, None)
+            card = None
+        else:
+            card = format_restaurant(restaurant_id, restaurant_data)
+            self._restaurants[restaurant_id] = restaurant_data
+            self._cards[restaurant_id] = card
+            self._digests[restaurant_id] = digest = content_digest([restaurant_id, restaurant_data])
+            self._catalog_digest ^= int(digest, 16)
+            self._count_cuisine(card, 1)
+
+        self._resort(restaurant_id, card)
+        return card
+
+    def _resort(self, restaurant_id: str, card: Optional[Dict[str, Any]]):
+        """Move one restaurant to its place in every sorted listing"""
+        for sort, sort_key in RESTAURANT_SORTS.items():
+            keys = self._sort_keys[sort]
+            ranked = self._sorted[sort]
+
+            previous_key = keys.pop(restaurant_id, None)
+            if previous_key is not None:
+                del ranked[bisect.bisect_left(ranked, (previous_key, restaurant_id))]
+
+            if card is not None:
+                keys[restaurant_id] = key = sort_key(card)
+                bisect.insort(ranked, (key, restaurant_id))
+
+    def _count_cuisine(self, card: Dict[str, Any], delta: int):
+        # Cuisine types only count restaurants that actually set one
+        restaurant_data = self._restaurants.get(card['id'], {})
+        cuisine = restaurant_data.get('cuisine_type') or restaurant_data.get('cuisine')
+        if not cuisine:
+            return
+        count = self._cuisine_counts.get(cuisine, 0) + delta
+        if count > 0:
+            self._cuisine_counts[cuisine] = count
+        else:
+            self._cuisine_counts.pop(cuisine, None)
+
+    def add_listener(self, listener: Callable):
+        """Subscribe to changes as listener(restaurant_id, data, card); data and card are None on removal
+
+        The listener is first called once for every restaurant already loaded,
+        so an index built from it starts complete.
+        """
+        self.start()
+        with self._listener_lock:
+            with self._lock:
+                self._listeners.append(listener)
+                current = [(restaurant_id, restaurant_data, self._cards[restaurant_id])
+                           for restaurant_id, restaurant_data in self._restaurants.items()]
+            for restaurant_id, restaurant_data, card in current:
+                listener(restaurant_id, restaurant_data, card)
+
+    # ===== READS =====
+
+    def get_restaurants(self) -> List[Dict[str, Any]]:
+        """Get all restaurant cards, highest rated first"""
+        self.start()
+        with self._lock:
+            return [dict(self._cards[rid]) for _, rid in self._sorted['rating']]
+
+    def select(self, sort: str = 'rating', count: Optional[int] = None,
+               accept: Optional[Callable[[Dict[str, Any], Dict[str, Any]], bool]] = None) -> List[str]:
+        """Get the IDs of the first count restaurants in a listing order (all if count is None)
+
+        accept(card, restaurant_data), if given, filters restaurants; it must
+        not modify its arguments. The walk stops as soon as count are found.
+        """
+        self.start()
+        with self._lock:
+            selected = []
+            for _, restaurant_id in self._sorted[sort]:
+                if count is not None and len(selected) >= count:
+                    break
+                if accept is None or accept(self._cards[restaurant_id], self._restaurants[restaurant_id]):
+                    selected.append(restaurant_id)
+            return selected
+
+    def select_among(self, restaurant_ids: Iterable[str], count: Optional[int] = None,
+                     accept: Optional[Callable[[Dict[str, Any], Dict[str, Any]], bool]] = None,
+                     sort: str = 'rating', key: Optional[Callable[[str], Any]] = None) -> List[str]:
+        """Rank a subset of restaurants and keep the first count (all if count is None)
+
+        Ranks by a listing order, or by key(restaurant_id) if given, using
+        heap selection so only count restaurants are ever fully ordered.
+        """
+        self.start()
+        with self._lock:
+            sort_keys = self._sort_keys[sort]
+            candidates = [rid for rid in restaurant_ids
+                          if rid in self._cards and (accept is None or accept(self._cards[rid], self._restaurants[rid]))]
+            rank = (lambda rid: (key(rid), rid)) if key is not None else (lambda rid: (sort_keys[rid], rid))
+
+            if count is None:
+                return sorted(candidates, key=rank)
+            return heapq.nsmallest(count, candidates, key=rank)
+
+    def get_restaurant(self, restaurant_id: str) -> Optional[Dict[str, Any]]:
+        """Get one restaurant card, or None if it isn't in the catalog"""
+        self.start()
+        with self._lock:
+            card = self._cards.get(restaurant_id)
+            return dict(card) if card is not None else None
+
+    def has_restaurant(self, restaurant_id: str) -> bool:
+        """Check whether a restaurant is in the catalog"""
+        self.start()
+        with self._lock:
+            return restaurant_id in self._cards
+
+    def get_digest(self, restaurant_id: str) -> Optional[str]:
+        """Get a digest of a restaurant's document, or None if it isn't in the catalog"""
+        self.start()
+        with self._lock:
+            return self._digests.get(restaurant_id)
+
+    def get_catalog_digest(self) -> str:
+        """Get a digest of the whole catalog, which changes with any restaurant's content"""
+        self.start()
+        with self._lock:
+            return f"{self._catalog_digest:032x}"
+
+    def get_restaurant_data(self, restaurant_id: str) -> Optional[Dict[str, Any]]:
+        """Get a restaurant's raw document data, or None if it isn't in the catalog"""
+        self.start()
+        with self._lock:
+            restaurant_data = self._restaurants.get(restaurant_id)
+            return dict(restaurant_data) if restaurant_data is not None else None
+
+    def get_cuisine_types(self) -> List[str]:
+        """Get the cuisine types set by at least one restaurant"""
+        self.start()
+        with self._lock:
+            return sorted(self._cuisine_counts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get catalog size and change counters"""
+        with self._lock:
+            return {
+                'loaded': self._loaded.is_set(),
+                'restaurants': len(self._cards),
+                'version': self.version,
+                'listeners': len(self._listeners)
+            }
+
+# Create a singleton instance
+catalog_service = CatalogService()
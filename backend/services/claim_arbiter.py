@@ -0,0 +1,79 @@
+# backend/services/claim_arbiter.py
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+from cachetools import TTLCache
+
+# Seconds an order seen as taken is refused locally without asking Firestore
+CLAIM_MEMORY_SECONDS = int(os.getenv('CLAIM_MEMORY_SECONDS', '600'))
+
+# Taken orders remembered at once
+CLAIM_MEMORY_SIZE = int(os.getenv('CLAIM_MEMORY_SIZE', '10000'))
+
+class ClaimArbiter:
+    """Settles agents racing for the same order inside this process
+
+    Only one claim per order is sent to Firestore at a time: the others
+    are refused at once instead of piling into transactions that would
+    conflict and retry. Orders known to be taken (claimed here, or seen
+    with an agent by a claim) are refused without a round trip. The
+    transaction still decides; this only keeps losing contenders away.
+    """
+
+    def __init__(self, memory_seconds: int = CLAIM_MEMORY_SECONDS, memory_size: int = CLAIM_MEMORY_SIZE):
+        self._lock = threading.Lock()
+        # order_id -> agent whose claim is being committed
+        self._in_flight: Dict[str, str] = {}
+        # order_id -> agent the order was assigned to
+        self._taken = TTLCache(maxsize=memory_size, ttl=memory_seconds)
+
+        self.granted = 0
+        self.won = 0
+        self.refused_in_flight = 0
+        self.refused_taken = 0
+
+    @contextmanager
+    def claim(self, order_id: str, agent_id: str):
+        """Hold an order while agent_id's claim is committed; raises ValueError if another agent has it"""
+        with self._lock:
+            if order_id in self._in_flight:
+                self.refused_in_flight += 1
+                raise ValueError("Order is no longer available")
+            if order_id in self._taken:
+                self.refused_taken += 1
+                raise ValueError("Order is no longer available")
+            self._in_flight[order_id] = agent_id
+            self.granted += 1
+
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self._in_flight.pop(order_id, None)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(order_id, None)
+            self._taken[order_id] = agent_id
+            self.won += 1
+
+    def mark_taken(self, order_id: str, agent_id: str):
+        """Record that an order was found assigned to an agent"""
+        with self._lock:
+            self._taken[order_id] = agent_id
+
+    def stats(self) -> Dict[str, Any]:
+        """Get claim counters for monitoring"""
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'taken_orders': len(self._taken),
+                'granted': self.granted,
+                'won': self.won,
+                'refused_in_flight': self.refused_in_flight,
+                'refused_taken': self.refused_taken
+            }
+
+# Create a singleton instance
+claim_arbiter = ClaimArbiter()
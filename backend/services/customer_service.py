@@ -1,12 +1,37 @@
 # backend/services/customer_service.py
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+import copy
 import uuid
 from firebase_admin import firestore
+from data.repository import get_backend
+from data.identity_map import get_document, set_document, update_document, delete_document
+from data.batch_reader import BatchReader
+from data.pagination import clamp_page_size, decode_cursor, paginate
+from services.catalog_service import RESTAURANT_SORTS, catalog_service, format_restaurant
+from services.search_service import search_service
+from services.delivery_area_service import delivery_area_service
+from services.geocoding_service import ADDRESS_FIELDS, locate_address
+from services.menu_cache import menu_cache
+from services.cart_store import CartVersionConflict, cart_store
+from services.pricing_service import pricing_service
+from services.order_lifecycle import allowed_transitions, current_status, order_lifecycle
+from utils.cache import MISSING, content_digest
+
+# Operations accepted by patch_cart
+CART_OPERATIONS = ('add', 'set_qty', 'remove', 'clear')
 
 class CustomerService:
-    def __init__(self):
-        self.db = firestore.client()
+    def __init__(self, db=None, catalog=None, search=None, delivery_areas=None, carts=None, pricing=None,
+                 lifecycle=None, menus=None):
+        self.db = db if db is not None else get_backend()
+        self.lifecycle = lifecycle if lifecycle is not None else order_lifecycle
+        self.carts = carts if carts is not None else cart_store
+        self.pricing = pricing if pricing is not None else pricing_service
+        self.catalog = catalog if catalog is not None else catalog_service
+        self.search = search if search is not None else search_service
+        self.delivery_areas = delivery_areas if delivery_areas is not None else delivery_area_service
+        self.menus = menus if menus is not None else menu_cache
         self.customers_collection = 'customers'
         self.orders_collection = 'orders'
         self.restaurants_collection = 'restaurants'
@@ -15,87 +40,99 @@ class CustomerService:
 
     # ===== RESTAURANT DISCOVERY =====
         
-    def get_available_restaurants(self, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Get list of available restaurants with optional filters"""
+    def get_available_restaurants(self, filters: Dict[str, Any] = None, sort: str = None,
+                                  limit: int = None, offset: int = 0) -> Dict[str, Any]:
+        """Get one page of available restaurants with optional filters, in the requested order
+
+        sort is rating (default), delivery_time, delivery_fee or distance
+        (default, and only allowed, when filtering by lat/lng). Without a
+        limit every matching restaurant is returned.
+        """
+        filters = filters or {}
+        located = filters.get('lat') is not None
+        sort = sort or ('distance' if located else 'rating')
+        if sort == 'distance' and not located:
+            raise ValueError("Sorting by distance requires lat and lng")
+        if sort != 'distance' and sort not in RESTAURANT_SORTS:
+            raise ValueError(f"Invalid sort. Must be one of: {', '.join(list(RESTAURANT_SORTS) + ['distance'])}")
+        
         try:
-            restaurants_ref = self.db.collection(self.restaurants_collection)
-            
-            # Start with base query
-            query = restaurants_ref
+            # Served from the live catalog: no Firestore reads
+            accept = self._restaurant_filter(filters)
+            
+            # One extra restaurant tells whether another page exists
+            count = offset + limit + 1 if limit is not None else None
+            
+            distances = None
+            if located:
+                # Only restaurants delivering to the customer's location
+                distances = dict(self.delivery_areas.restaurants_delivering_to(filters['lat'], filters['lng']))
+                if sort == 'distance':
+                    ranked = self.catalog.select_among(distances, count, accept, key=distances.get)
+                else:
+                    ranked = self.catalog.select_among(distances, count, accept, sort=sort)
+            else:
+                ranked = self.catalog.select(sort, count, accept)
             
-            # Apply database-level filters
-            if filters:
-                if filters.get('is_open') is not None:
-                    query = query.where('is_open', '==', filters['is_open'])
+            if limit is None:
+                page_ids, next_offset = ranked[offset:], None
+            else:
+                page_ids = ranked[offset:offset + limit]
+                next_offset = offset + limit if len(ranked) > offset + limit else None
             
+            # Only the returned page is copied out of the catalog
             restaurants = []
-            for doc in query.stream():
-                restaurant_data = doc.to_dict()
-                restaurant_data['id'] = doc.id
-                
-                # Apply post-query filters
-                if filters:
-                    # Search filter
-                    if filters.get('search'):
-                        search_term = filters['search'].lower()
-                        name = restaurant_data.get('restaurant_name', restaurant_data.get('name', '')).lower()
-                        desc = restaurant_data.get('description', '').lower()
-                        cuisine = restaurant_data.get('cuisine_type', restaurant_data.get('cuisine', '')).lower()
-                        
-                        name_match = search_term in name
-                        desc_match = search_term in desc
-                        cuisine_match = search_term in cuisine
-                        
-                        if not (name_match or desc_match or cuisine_match):
-                            continue
-                    
-                    # Cuisine filter
-                    if filters.get('cuisine'):
-                        restaurant_cuisine = restaurant_data.get('cuisine_type', restaurant_data.get('cuisine', ''))
-                        if restaurant_cuisine.lower() != filters['cuisine'].lower():
-                            continue
-                    
-                    # Rating filter
-                    if filters.get('min_rating'):
-                        if restaurant_data.get('rating', 0) < filters['min_rating']:
-                            continue
-                
-                # Format restaurant data for frontend consumption
-                formatted_restaurant = {
-                    'id': restaurant_data['id'],
-                    'name': restaurant_data.get('restaurant_name', restaurant_data.get('name', 'Unknown Restaurant')),
-                    'description': restaurant_data.get('description', 'Delicious food awaits you'),
-                    'cuisine': restaurant_data.get('cuisine_type', restaurant_data.get('cuisine', 'Various')),
-                    'rating': restaurant_data.get('rating', 4.0),
-                    'delivery_time': restaurant_data.get('estimated_delivery_time', restaurant_data.get('delivery_time', '30-45 min')),
-                    'delivery_fee': restaurant_data.get('delivery_fee', 2.99),
-                    'min_order': restaurant_data.get('min_order_amount', restaurant_data.get('min_order', 15.00)),
-                    'is_open': restaurant_data.get('is_open', True),
-                    'image_url': restaurant_data.get('logo_url', restaurant_data.get('image_url', '/api/placeholder/300/200')),
-                    'address': restaurant_data.get('address_line_1', restaurant_data.get('address', '')),
-                    'city': restaurant_data.get('city', ''),
-                    'state': restaurant_data.get('state', ''),
-                    'zip_code': restaurant_data.get('zip_code', ''),
-                    'phone': restaurant_data.get('phone', ''),
-                    'email': restaurant_data.get('email', ''),
-                    'website': restaurant_data.get('website', '')
-                }
-                
-                restaurants.append(formatted_restaurant)
-            
-            # Sort restaurants by rating (highest first)
-            restaurants.sort(key=lambda x: x.get('rating', 0), reverse=True)
-            
-            return restaurants
+            for restaurant_id in page_ids:
+                restaurant = self.catalog.get_restaurant(restaurant_id)
+                if restaurant is not None:
+                    if distances is not None:
+                        restaurant['distance'] = round(distances[restaurant_id], 2)
+                    restaurants.append(restaurant)
+            
+            return {'restaurants': restaurants, 'next_offset': next_offset}
         except Exception as e:
             print(f"Error getting available restaurants: {str(e)}")
-            raise Exception(f"Error getting available restaurants: {str(e)}")    
+            raise Exception(f"Error getting available restaurants: {str(e)}")
+    
+    def _restaurant_filter(self, filters: Dict[str, Any]):
+        """Build an accept(card, restaurant_data) check for listing filters (None if there are none)"""
+        is_open = filters.get('is_open')
+        cuisine = (filters.get('cuisine') or '').lower()
+        min_rating = filters.get('min_rating')
+        
+        # Search filter, answered by the search index
+        search_matches = None
+        if filters.get('search'):
+            search_matches = set(self.search.match_restaurant_ids(filters['search']))
+        
+        if is_open is None and not cuisine and not min_rating and search_matches is None:
+            return None
         
+        def accept(restaurant: Dict[str, Any], restaurant_data: Dict[str, Any]) -> bool:
+            if is_open is not None and restaurant['is_open'] != is_open:
+                return False
+            if search_matches is not None and restaurant['id'] not in search_matches:
+                return False
+            if cuisine:
+                restaurant_cuisine = restaurant_data.get('cuisine_type', restaurant_data.get('cuisine', ''))
+                if str(restaurant_cuisine).lower() != cuisine:
+                    return False
+            if min_rating and restaurant.get('rating', 0) < min_rating:
+                return False
+            return True
+        
+        return accept
+    
     def get_restaurant_details(self, restaurant_id: str) -> Dict[str, Any]:
         """Get detailed information about a specific restaurant"""
         try:
+            restaurant = self.catalog.get_restaurant(restaurant_id)
+            if restaurant is not None:
+                return restaurant
+            
+            # Not in the catalog yet (e.g. created moments ago): read it directly
             doc_ref = self.db.collection(self.restaurants_collection).document(restaurant_id)
-            doc = doc_ref.get()
+            doc = get_document(doc_ref)
             
             if not doc.exists:
                 raise ValueError("Restaurant not found")
@@ -103,66 +140,22 @@ class CustomerService:
             restaurant_data = doc.to_dict()
             restaurant_data['id'] = doc.id
             
-            # Format restaurant data consistently
-            formatted_restaurant = {
-                'id': restaurant_data['id'],
-                'name': restaurant_data.get('restaurant_name', restaurant_data.get('name', 'Unknown Restaurant')),
-                'description': restaurant_data.get('description', 'Delicious food awaits you'),
-                'cuisine': restaurant_data.get('cuisine_type', restaurant_data.get('cuisine', 'Various')),
-                'rating': restaurant_data.get('rating', 4.0),
-                'delivery_time': restaurant_data.get('estimated_delivery_time', restaurant_data.get('delivery_time', '30-45 min')),
-                'delivery_fee': restaurant_data.get('delivery_fee', 2.99),
-                'min_order': restaurant_data.get('min_order_amount', restaurant_data.get('min_order', 15.00)),
-                'is_open': restaurant_data.get('is_open', True),
-                'image_url': restaurant_data.get('logo_url', restaurant_data.get('image_url', '/api/placeholder/300/200')),
-                'address': restaurant_data.get('address_line_1', restaurant_data.get('address', '')),
-                'city': restaurant_data.get('city', ''),
-                'state': restaurant_data.get('state', ''),
-                'zip_code': restaurant_data.get('zip_code', ''),
-                'phone': restaurant_data.get('phone', ''),
-                'email': restaurant_data.get('email', ''),
-                'website': restaurant_data.get('website', ''),
-                # Full address
-                'full_address': f"{restaurant_data.get('address_line_1', '')} {restaurant_data.get('city', '')} {restaurant_data.get('state', '')} {restaurant_data.get('zip_code', '')}".strip()
-            }
-            
-            return formatted_restaurant
+            return self._format_restaurant_details(restaurant_data)
         except Exception as e:
             print(f"Error getting restaurant details: {str(e)}")
             raise Exception(f"Error getting restaurant details: {str(e)}")
     
+    def _format_restaurant_details(self, restaurant_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Format restaurant data consistently"""
+        return format_restaurant(restaurant_data['id'], restaurant_data)
+    
     def get_restaurant_menu(self, restaurant_id: str) -> Dict[str, Any]:
         """Get restaurant menu for customers"""
         try:
             # Get restaurant info
             restaurant = self.get_restaurant_details(restaurant_id)
             
-            # Get menu categories
-            categories_ref = self.db.collection('menu_categories')
-            query = categories_ref.where('restaurant_id', '==', restaurant_id).where('is_active', '==', True)
-            
-            categories = []
-            for doc in query.stream():
-                category_data = doc.to_dict()
-                category_data['id'] = doc.id
-                
-                # Get menu items for this category
-                items_ref = self.db.collection('menu_items')
-                items_query = items_ref.where('restaurant_id', '==', restaurant_id).where('category_id', '==', doc.id).where('is_available', '==', True)
-                
-                items = []
-                for item_doc in items_query.stream():
-                    item_data = item_doc.to_dict()
-                    item_data['id'] = item_doc.id
-                    items.append(item_data)
-                
-                # Sort items by name
-                items.sort(key=lambda x: x.get('name', ''))
-                category_data['items'] = items
-                categories.append(category_data)
-            
-            # Sort categories by sort_order
-            categories.sort(key=lambda x: x.get('sort_order', 0))
+            categories, _ = self._get_menu_categories(restaurant_id)
             
             return {
                 'restaurant': restaurant,
@@ -170,6 +163,74 @@ class CustomerService:
             }
         except Exception as e:
             raise Exception(f"Error getting restaurant menu: {str(e)}")
+    
+    def _get_menu_categories(self, restaurant_id: str) -> Tuple[List[Dict[str, Any]], str]:
+        """Get a restaurant's menu categories and a digest of them, from the menu cache while current"""
+        # Read the version before the menu, so a menu cached under it is never older than it
+        version = self._get_menu_cache_version(restaurant_id)
+        
+        cached = self.menus.get(restaurant_id, version)
+        if cached is MISSING:
+            categories = self._load_menu_categories(restaurant_id)
+            cached = (categories, content_digest(categories))
+            self.menus.set(restaurant_id, version, cached)
+        return cached
+    
+    def _get_menu_cache_version(self, restaurant_id: str):
+        restaurant_data = self.catalog.get_restaurant_data(restaurant_id) or {}
+        return self.menus.version(restaurant_id, restaurant_data.get('menu_version', 0))
+    
+    def _load_menu_categories(self, restaurant_id: str) -> List[Dict[str, Any]]:
+        """Load active categories with their available items: one query each, grouped in memory"""
+        categories_query = self.db.collection('menu_categories').where('restaurant_id', '==', restaurant_id).where('is_active', '==', True)
+        items_query = self.db.collection('menu_items').where('restaurant_id', '==', restaurant_id).where('is_available', '==', True)
+        
+        items_by_category = {}
+        for item_doc in items_query.stream():
+            item_data = item_doc.to_dict()
+            item_data['id'] = item_doc.id
+            items_by_category.setdefault(item_data.get('category_id'), []).append(item_data)
+        
+        categories = []
+        for doc in categories_query.stream():
+            category_data = doc.to_dict()
+            category_data['id'] = doc.id
+            
+            # Sort items by name
+            items = items_by_category.get(doc.id, [])
+            items.sort(key=lambda x: x.get('name', ''))
+            category_data['items'] = items
+            categories.append(category_data)
+        
+        # Sort categories by sort_order
+        categories.sort(key=lambda x: x.get('sort_order', 0))
+        return categories
+
+    # ===== CONTENT VERSIONS (for HTTP caching) =====
+    
+    # Content versions for HTTP validators: digests of the content itself, so every
+    # worker (and every restart) tags the same response with the same ETag
+    
+    def get_catalog_version(self) -> str:
+        """Version of the restaurant listing and cuisine types"""
+        return self.catalog.get_catalog_digest()
+    
+    def get_restaurant_version(self, restaurant_id: str) -> Optional[str]:
+        """Version of one restaurant's details, or None if it isn't in the catalog"""
+        return self.catalog.get_digest(restaurant_id)
+    
+    def get_menu_version(self, restaurant_id: str) -> Optional[tuple]:
+        """Version of one restaurant's menu page (details and menu), or None if it isn't in the catalog"""
+        digest = self.catalog.get_digest(restaurant_id)
+        if digest is None:
+            return None
+        return digest, self._get_menu_categories(restaurant_id)[1]
+    
+    def get_restaurant_updated_at(self, restaurant_id: str) -> Optional[datetime]:
+        """When a restaurant's profile was last updated, if recorded"""
+        restaurant_data = self.catalog.get_restaurant_data(restaurant_id) or {}
+        updated_at = restaurant_data.get('updated_at')
+        return updated_at if isinstance(updated_at, datetime) else None
 
     # ===== ORDER MANAGEMENT =====
     
@@ -179,28 +240,46 @@ class CustomerService:
                 order_id = f"order_{uuid.uuid4().hex[:12]}"
                 order_number = f"ORD{datetime.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:6].upper()}"
                 
+                # Checkout: persist the cart's latest state before the order is placed
+                self.carts.flush(customer_id)
+                
+                # Price the order from the menu; amounts sent by the client are never stored
+                quote = self.pricing.quote(order_data['restaurant_id'], order_data['items'])
+                client_total = order_data.get('total')
+                price_mismatch = None
+                if client_total is not None and abs(float(client_total) - quote['total']) > 0.01:
+                    # The client may already have been charged this amount; keep the gap on the order for follow-up
+                    print(f"⚠️  Order {order_id}: client total {client_total} differs from priced total {quote['total']}")
+                    price_mismatch = {
+                        'client_total': float(client_total),
+                        'priced_total': quote['total'],
+                        'difference': round(float(client_total) - quote['total'], 2)
+                    }
+                
                 order_doc = {
                     'id': order_id,
                     'order_number': order_number,
                     'customer_id': customer_id,
                     'restaurant_id': order_data['restaurant_id'],
-                    'items': order_data['items'],
+                    'items': quote['items'],
                     'delivery_address': order_data['delivery_address'],
                     'special_instructions': order_data.get('special_instructions', ''),
                     'payment_method': order_data.get('payment_method', 'online'),
-                    'subtotal': order_data['subtotal'],
-                    'delivery_fee': order_data['delivery_fee'],
-                    'tax': order_data['tax'],
-                    'total': order_data['total'],
+                    'subtotal': quote['subtotal'],
+                    'delivery_fee': quote['delivery_fee'],
+                    'tax_rate': quote['tax_rate'],
+                    'tax': quote['tax'],
+                    'total': quote['total'],
+                    'client_total': client_total,
                     'cf_link_id': order_data.get('cf_link_id'),  # Store the Cashfree link ID
-                    'order_status': 'CONFIRMED' if order_data.get('payment_method') == 'cash' else 'CONFIRMED',
                     'payment_status': 'PAID' if order_data.get('payment_method') == 'cash' else 'PAID',
-                    'created_at': datetime.utcnow(),
-                    'updated_at': datetime.utcnow()
+                    'created_at': datetime.utcnow()
                 }
+                if price_mismatch:
+                    order_doc['price_mismatch'] = price_mismatch
                 
-                # Store order in database
-                self.db.collection('orders').document(order_id).set(order_doc)
+                # Store order in database, with its first status event
+                order_doc = self.lifecycle.create(order_id, order_doc, 'confirmed', 'customer', customer_id)
                 
                 return {
                     'success': True,
@@ -214,11 +293,21 @@ class CustomerService:
                     'error': str(e)
                 }
     
+    def quote_order(self, restaurant_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Price an order the way create_order will"""
+        return self.pricing.quote(restaurant_id, items)
+    
+    def quote_orders(self, carts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Price many carts at once; each result has success and data or error"""
+        if not isinstance(carts, list):
+            raise ValueError("carts must be a list")
+        return self.pricing.quote_many(carts)
+    
     def _get_delivery_address_details(self, address_id: str) -> Dict[str, Any]:
         """Get delivery address details"""
         try:
             doc_ref = self.db.collection(self.addresses_collection).document(address_id)
-            doc = doc_ref.get()
+            doc = get_document(doc_ref)
             
             if not doc.exists:
                 raise ValueError("Delivery address not found")
@@ -243,8 +332,10 @@ class CustomerService:
 
 
     
-    def get_customer_orders(self, customer_id: str, status: str = None, limit: int = 20) -> List[Dict[str, Any]]:
-        """Get customer's order history"""
+    def get_customer_orders(self, customer_id: str, status: str = None, limit: int = 20,
+                            cursor: str = None) -> Dict[str, Any]:
+        """Get one page of the customer's order history, newest first"""
+        page_cursor = decode_cursor(cursor)
         try:
             orders_ref = self.db.collection(self.orders_collection)
             query = orders_ref.where('customer_id', '==', customer_id)
@@ -252,18 +343,15 @@ class CustomerService:
             if status:
                 query = query.where('status', '==', status)
             
-            # Get orders (limit applied in Python since we can't order by created_at without index)
+            snapshots, next_cursor = paginate(query, orders_ref, 'created_at', clamp_page_size(limit, 20), page_cursor)
+            
             orders = []
-            for doc in query.stream():
+            for doc in snapshots:
                 order_data = doc.to_dict()
                 order_data['id'] = doc.id
                 orders.append(order_data)
             
-            # Sort by created_at in Python
-            orders.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
-            
-            # Apply limit
-            return orders[:limit]
+            return {'orders': orders, 'next_cursor': next_cursor}
         except Exception as e:
             raise Exception(f"Error getting customer orders: {str(e)}")
     
@@ -271,7 +359,7 @@ class CustomerService:
         """Get detailed information about a specific order"""
         try:
             doc_ref = self.db.collection(self.orders_collection).document(order_id)
-            doc = doc_ref.get()
+            doc = get_document(doc_ref)
             
             if not doc.exists:
                 raise ValueError("Order not found")
@@ -289,26 +377,17 @@ class CustomerService:
     
     def cancel_order(self, customer_id: str, order_id: str) -> Dict[str, Any]:
         """Cancel an order"""
-        try:
-            # Get order details
-            order = self.get_order_details(customer_id, order_id)
-            
-            # Check if order can be cancelled
-            if order['status'] not in ['pending', 'confirmed']:
+        def check(order_data):
+            if order_data.get('customer_id') != customer_id:
+                raise ValueError("Order not found")
+            if 'cancelled' not in allowed_transitions(current_status(order_data), 'customer'):
                 raise ValueError("Order cannot be cancelled at this stage")
-            
-            # Update order status
-            doc_ref = self.db.collection(self.orders_collection).document(order_id)
-            doc_ref.update({
-                'status': 'cancelled',
-                'cancelled_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
-            })
-            
-            order['status'] = 'cancelled'
-            order['cancelled_at'] = datetime.utcnow()
-            
-            return order
+        
+        try:
+            return self.lifecycle.transition(order_id, 'cancelled', 'customer', customer_id, check=check,
+                                             updates={'cancellation_reason': 'Cancelled by customer'})
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error cancelling order: {str(e)}")
 
@@ -318,7 +397,7 @@ class CustomerService:
         """Get customer profile"""
         try:
             doc_ref = self.db.collection(self.customers_collection).document(customer_id)
-            doc = doc_ref.get()
+            doc = get_document(doc_ref)
             
             if doc.exists:
                 profile_data = doc.to_dict()
@@ -331,7 +410,7 @@ class CustomerService:
                     'created_at': datetime.utcnow(),
                     'updated_at': datetime.utcnow()
                 }
-                doc_ref.set(profile_data)
+                set_document(doc_ref, profile_data)
             
             profile_data['id'] = customer_id
             
@@ -359,7 +438,7 @@ class CustomerService:
             
             # Update document
             doc_ref = self.db.collection(self.customers_collection).document(customer_id)
-            doc_ref.update(update_data)
+            update_document(doc_ref, update_data)
             
             # Return updated profile
             return self.get_customer_profile(customer_id)
@@ -403,6 +482,10 @@ class CustomerService:
                 'updated_at': datetime.utcnow()
             }
             
+            location = locate_address(address_data)
+            if location:
+                address_doc['location'] = location
+            
             # If this is set as default, unset other defaults
             if address_doc['is_default']:
                 addresses_ref = self.db.collection(self.addresses_collection)
@@ -417,6 +500,8 @@ class CustomerService:
             
             address_doc['id'] = address_id
             return address_doc
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error adding delivery address: {str(e)}")
 
@@ -425,7 +510,7 @@ class CustomerService:
         try:
             # Verify address belongs to customer
             doc_ref = self.db.collection(self.addresses_collection).document(address_id)
-            doc = doc_ref.get()
+            doc = get_document(doc_ref)
             
             if not doc.exists or doc.to_dict().get('customer_id') != customer_id:
                 raise ValueError("Address not found")
@@ -441,6 +526,14 @@ class CustomerService:
                 if field in address_data:
                     update_data[field] = address_data[field]
             
+            if any(field in address_data for field in ADDRESS_FIELDS):
+                location = locate_address({**doc.to_dict(), **address_data})
+                if location:
+                    update_data['location'] = location
+                elif 'location' in doc.to_dict():
+                    # The stored point belongs to the previous address
+                    update_data['location'] = firestore.DELETE_FIELD
+            
             # If setting as default, unset other defaults
             if update_data.get('is_default'):
                 addresses_ref = self.db.collection(self.addresses_collection)
@@ -451,14 +544,16 @@ class CustomerService:
                         doc.reference.update({'is_default': False})
             
             # Update address
-            doc_ref.update(update_data)
+            update_document(doc_ref, update_data)
             
             # Return updated address
-            updated_doc = doc_ref.get()
+            updated_doc = get_document(doc_ref)
             address_data = updated_doc.to_dict()
             address_data['id'] = address_id
             
             return address_data
+        except ValueError:
+            raise
         except Exception as e: 
             raise Exception(f"Error updating delivery address: {str(e)}")
 
@@ -467,13 +562,13 @@ class CustomerService:
         try:
             # Verify address belongs to customer
             doc_ref = self.db.collection(self.addresses_collection).document(address_id)
-            doc = doc_ref.get()
+            doc = get_document(doc_ref)
             
             if not doc.exists or doc.to_dict().get('customer_id') != customer_id:
                 raise ValueError("Address not found")
             
             # Delete address
-            doc_ref.delete()
+            delete_document(doc_ref)
             return True
         except Exception as e:
             raise Exception(f"Error deleting delivery address: {str(e)}")
@@ -491,15 +586,22 @@ class CustomerService:
                 favorite_data = doc.to_dict()
                 favorite_restaurant_ids.append(favorite_data['restaurant_id'])
             
-            # Get restaurant details for favorites
+            # Get restaurant details for all favorites in one batched read
+            reader = BatchReader(self.db)
+            for restaurant_id in favorite_restaurant_ids:
+                reader.add(self.restaurants_collection, restaurant_id)
+            reader.fetch()
+            
             favorites = []
             for restaurant_id in favorite_restaurant_ids:
-                try:
-                    restaurant = self.get_restaurant_details(restaurant_id)
-                    favorites.append(restaurant)
-                except:
-                    # Skip if restaurant no longer exists
+                restaurant_data = reader.get(self.restaurants_collection, restaurant_id)
+                
+                # Skip if restaurant no longer exists
+                if restaurant_data is None:
                     continue
+                
+                restaurant_data['id'] = restaurant_id
+                favorites.append(self._format_restaurant_details(restaurant_data))
             
             return favorites
         except Exception as e:
@@ -543,41 +645,25 @@ class CustomerService:
 
     # ===== SEARCH & DISCOVERY =====
     
-    def search_restaurants(self, query: str) -> List[Dict[str, Any]]:
-        """Search restaurants by query"""
+    def search_restaurants(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Search restaurants by query, best match first"""
         try:
-            # Get all restaurants and filter in Python (since Firestore doesn't support full-text search)
-            restaurants = self.get_available_restaurants()
-            
-            search_term = query.lower()
-            results = []
-            
-            for restaurant in restaurants:
-                name_match = search_term in restaurant.get('name', '').lower()
-                desc_match = search_term in restaurant.get('description', '').lower()
-                cuisine_match = search_term in restaurant.get('cuisine', '').lower()
-                
-                if name_match or desc_match or cuisine_match:
-                    results.append(restaurant)
-            
-            return results
+            # Full-text index over the live catalog (Firestore doesn't support full-text search)
+            return self.search.search_restaurants(query, limit=limit, offset=offset)
         except Exception as e:
             raise Exception(f"Error searching restaurants: {str(e)}")
     
+    def search_dishes(self, query: str, filters: Dict[str, Any] = None, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Search menu items across all restaurants, best match first"""
+        try:
+            return self.search.search_dishes(query, filters, limit=limit, offset=offset)
+        except Exception as e:
+            raise Exception(f"Error searching dishes: {str(e)}")
+    
     def get_cuisine_types(self) -> List[str]:
         """Get available cuisine types"""
         try:
-            restaurants_ref = self.db.collection(self.restaurants_collection)
-            cuisines = set()
-            
-            for doc in restaurants_ref.stream():
-                restaurant_data = doc.to_dict()
-                # Check both possible field names
-                cuisine = restaurant_data.get('cuisine_type') or restaurant_data.get('cuisine')
-                if cuisine:
-                    cuisines.add(cuisine)
-            
-            return sorted(list(cuisines))
+            return self.catalog.get_cuisine_types()
         except Exception as e:
             print(f"Error getting cuisine types: {str(e)}")
             raise Exception(f"Error getting cuisine types: {str(e)}")
@@ -590,80 +676,70 @@ class CustomerService:
     def get_pending_cart(self, customer_id: str) -> Dict[str, Any]:
         """Get customer's pending cart"""
         try:
-            doc_ref = self.db.collection('pending_carts').document(customer_id)
-            doc = doc_ref.get()
+            # Hot carts are served from the write-behind cart store
+            cart_data = self.carts.get(customer_id)
             
-            if doc.exists:
-                cart_data = doc.to_dict()
+            if cart_data is not None:
                 cart_data['id'] = customer_id
                 return cart_data
             else:
                 # Return empty cart structure
-                return {
-                    'customer_id': customer_id,
-                    'restaurant_id': None,
-                    'restaurant_info': None,
-                    'items': [],
-                    'created_at': None,
-                    'updated_at': None
-                }
+                return self._empty_cart(customer_id)
         except Exception as e:
             raise Exception(f"Error getting pending cart: {str(e)}")
 
     def save_pending_cart(self, customer_id: str, cart_data: Dict[str, Any]) -> Dict[str, Any]:
         """Save customer's pending cart"""
         try:
-            # Prepare cart document
-            cart_doc = {
+            return self._modify_cart(customer_id, lambda current_cart: cart_data)
+        except Exception as e:
+            raise Exception(f"Error saving pending cart: {str(e)}")
+
+    def _modify_cart(self, customer_id: str, change) -> Dict[str, Any]:
+        """Replace a cart through the cart store, stamping timestamps and the next version
+
+        change(current cart) gets a copy of the cart (an empty one if there
+        is none) and returns the new restaurant_id, restaurant_info and
+        items. It runs inside CartStore.modify(), so no other change to the
+        cart lands in between.
+        """
+        def apply(existing_cart):
+            current_cart = existing_cart or self._empty_cart(customer_id)
+            cart_data = change(current_cart)
+            
+            # Keep created_at from the existing cart, or set it on a new one; every save is a new version
+            now = datetime.utcnow()
+            return {
                 'customer_id': customer_id,
                 'restaurant_id': cart_data.get('restaurant_id'),
                 'restaurant_info': cart_data.get('restaurant_info'),
                 'items': cart_data.get('items', []),
-                'updated_at': datetime.utcnow()
+                'version': current_cart.get('version', 0) + 1,
+                'created_at': current_cart.get('created_at') or now,
+                'updated_at': now
             }
-            
-            # Set created_at only if it's a new cart
-            doc_ref = self.db.collection('pending_carts').document(customer_id)
-            existing_doc = doc_ref.get()
-            
-            if not existing_doc.exists:
-                cart_doc['created_at'] = datetime.utcnow()
-            
-            # Save or update cart
-            doc_ref.set(cart_doc)
-            
-            cart_doc['id'] = customer_id
-            return cart_doc
-        except Exception as e:
-            raise Exception(f"Error saving pending cart: {str(e)}")
+        
+        # Written to Firestore by the cart store's next flush
+        cart_doc = self.carts.modify(customer_id, apply)
+        cart_doc['id'] = customer_id
+        return cart_doc
 
     def clear_pending_cart(self, customer_id: str) -> bool:
         """Clear customer's pending cart"""
         try:
-            doc_ref = self.db.collection('pending_carts').document(customer_id)
-            doc_ref.delete()
+            self.carts.delete(customer_id)
             return True
         except Exception as e:
             raise Exception(f"Error clearing pending cart: {str(e)}")
 
     def add_item_to_cart(self, customer_id: str, restaurant_id: str, restaurant_info: Dict, item_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add item to customer's pending cart"""
-        try:
-            # Get current cart
-            current_cart = self.get_pending_cart(customer_id)
-            
+        def add(current_cart):
             # If cart has items from different restaurant, clear it
             if (current_cart.get('restaurant_id') and 
                 current_cart['restaurant_id'] != restaurant_id and 
                 len(current_cart.get('items', [])) > 0):
-                current_cart = {
-                    'customer_id': customer_id,
-                    'restaurant_id': None,
-                    'restaurant_info': None,
-                    'items': [],
-                    'created_at': None,
-                    'updated_at': None
-                }
+                current_cart['items'] = []
             
             # Set restaurant info
             current_cart['restaurant_id'] = restaurant_id
@@ -693,18 +769,16 @@ class CustomerService:
                 })
             
             current_cart['items'] = items
-            
-            # Save updated cart
-            return self.save_pending_cart(customer_id, current_cart)
+            return current_cart
+        
+        try:
+            return self._modify_cart(customer_id, add)
         except Exception as e:
             raise Exception(f"Error adding item to cart: {str(e)}")
 
     def remove_item_from_cart(self, customer_id: str, item_id: str) -> Dict[str, Any]:
         """Remove item from customer's pending cart"""
-        try:
-            # Get current cart
-            current_cart = self.get_pending_cart(customer_id)
-            
+        def remove(current_cart):
             # Remove item
             items = current_cart.get('items', [])
             items = [item for item in items if item['id'] != item_id]
@@ -714,21 +788,16 @@ class CustomerService:
             if len(items) == 0:
                 current_cart['restaurant_id'] = None
                 current_cart['restaurant_info'] = None
-            
-            # Save updated cart
-            return self.save_pending_cart(customer_id, current_cart)
+            return current_cart
+        
+        try:
+            return self._modify_cart(customer_id, remove)
         except Exception as e:
             raise Exception(f"Error removing item from cart: {str(e)}")
 
     def update_cart_item_quantity(self, customer_id: str, item_id: str, quantity: int) -> Dict[str, Any]:
         """Update item quantity in customer's pending cart"""
-        try:
-            if quantity <= 0:
-                return self.remove_item_from_cart(customer_id, item_id)
-            
-            # Get current cart
-            current_cart = self.get_pending_cart(customer_id)
-            
+        def set_quantity(current_cart):
             # Update item quantity
             items = current_cart.get('items', [])
             for item in items:
@@ -737,9 +806,13 @@ class CustomerService:
                     break
             
             current_cart['items'] = items
+            return current_cart
+        
+        try:
+            if quantity <= 0:
+                return self.remove_item_from_cart(customer_id, item_id)
             
-            # Save updated cart
-            return self.save_pending_cart(customer_id, current_cart)
+            return self._modify_cart(customer_id, set_quantity)
         except Exception as e:
             raise Exception(f"Error updating cart item quantity: {str(e)}")
 
@@ -757,5 +830,136 @@ class CustomerService:
         except Exception as e:
             raise Exception(f"Error syncing cart: {str(e)}")
 
+    def _empty_cart(self, customer_id: str) -> Dict[str, Any]:
+        return {
+            'customer_id': customer_id,
+            'restaurant_id': None,
+            'restaurant_info': None,
+            'items': [],
+            'version': 0,
+            'created_at': None,
+            'updated_at': None
+        }
+
+    def _validate_cart_operations(self, version: Any, operations: Any) -> List[Dict[str, Any]]:
+        """Check a cart patch before anything is applied (raises ValueError)"""
+        if not isinstance(version, int) or isinstance(version, bool):
+            raise ValueError("version is required and must be an integer")
+        if not isinstance(operations, list) or not operations:
+            raise ValueError("ops must be a non-empty list")
+        
+        for operation in operations:
+            op = operation.get('op') if isinstance(operation, dict) else None
+            if op not in CART_OPERATIONS:
+                raise ValueError(f"Invalid op. Must be one of: {', '.join(CART_OPERATIONS)}")
+            
+            if op == 'add':
+                item = operation.get('item')
+                if not isinstance(item, dict) or not item.get('id') or not item.get('name') or item.get('price') is None:
+                    raise ValueError("add requires an item with id, name and price")
+                quantity = item.get('quantity', 1)
+                if not isinstance(quantity, int) or quantity < 1:
+                    raise ValueError("add quantity must be a positive integer")
+            elif op in ('set_qty', 'remove'):
+                if not operation.get('item_id'):
+                    raise ValueError(f"{op} requires item_id")
+                if op == 'set_qty' and (not isinstance(operation.get('quantity'), int) or operation['quantity'] < 0):
+                    raise ValueError("set_qty quantity must be a non-negative integer")
+        
+        return operations
+
+    def patch_cart(self, customer_id: str, version: int, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply a batch of cart operations (add, set_qty, remove, clear) made against a cart version
+
+        All operations apply or none do. Raises CartVersionConflict if the
+        cart is no longer at version, and ValueError for an invalid batch.
+        Returns the new version with only the lines that changed.
+        """
+        operations = self._validate_cart_operations(version, operations)
+        changes = {}
+        
+        def apply(cart):
+            cart = cart or self._empty_cart(customer_id)
+            current_version = cart.get('version', 0)
+            if current_version != version:
+                raise CartVersionConflict(current_version)
+            
+            items = {item['id']: item for item in cart.get('items', [])}
+            before = copy.deepcopy(items)
+            restaurant_id, restaurant_info = cart.get('restaurant_id'), cart.get('restaurant_info')
+            
+            for operation in operations:
+                op = operation['op']
+                if op == 'add':
+                    item = operation['item']
+                    add_restaurant_id = operation.get('restaurant_id') or restaurant_id
+                    
+                    # Items from a different restaurant start a new cart
+                    if restaurant_id and add_restaurant_id != restaurant_id and items:
+                        items = {}
+                    if add_restaurant_id != restaurant_id or operation.get('restaurant_info') is not None:
+                        restaurant_info = operation.get('restaurant_info')
+                    restaurant_id = add_restaurant_id
+                    
+                    if item['id'] in items:
+                        items[item['id']]['quantity'] += item.get('quantity', 1)
+                    else:
+                        items[item['id']] = {
+                            'id': item['id'],
+                            'name': item['name'],
+                            'price': item['price'],
+                            'quantity': item.get('quantity', 1),
+                            'description': item.get('description', ''),
+                            'image_url': item.get('image_url', '')
+                        }
+                elif op == 'set_qty':
+                    if operation['item_id'] not in items:
+                        raise ValueError(f"Item {operation['item_id']} is not in the cart")
+                    if operation['quantity'] == 0:
+                        del items[operation['item_id']]
+                    else:
+                        items[operation['item_id']]['quantity'] = operation['quantity']
+                elif op == 'remove':
+                    items.pop(operation['item_id'], None)
+                elif op == 'clear':
+                    items = {}
+            
+            # If cart is empty, clear restaurant info
+            if not items:
+                restaurant_id = restaurant_info = None
+            
+            changes['restaurant_changed'] = restaurant_id != cart.get('restaurant_id') or restaurant_info != cart.get('restaurant_info')
+            changes['changed'] = [item for item_id, item in items.items() if before.get(item_id) != item]
+            changes['removed'] = [item_id for item_id in before if item_id not in items]
+            
+            now = datetime.utcnow()
+            return {
+                'customer_id': customer_id,
+                'restaurant_id': restaurant_id,
+                'restaurant_info': restaurant_info,
+                'items': list(items.values()),
+                'version': current_version + 1,
+                'created_at': cart.get('created_at') or now,
+                'updated_at': now
+            }
+        
+        try:
+            new_cart = self.carts.modify(customer_id, apply)
+        except ValueError:
+            # Stale version or an operation that doesn't fit the cart: nothing was applied
+            raise
+        except Exception as e:
+            raise Exception(f"Error updating cart: {str(e)}")
+        
+        result = {
+            'version': new_cart['version'],
+            'restaurant_id': new_cart['restaurant_id'],
+            'changed': changes['changed'],
+            'removed': changes['removed']
+        }
+        if changes['restaurant_changed']:
+            result['restaurant_info'] = new_cart['restaurant_info']
+        return result
+
 # Create a singleton instance
 customer_service = CustomerService()
\ No newline at end of file
@@ -0,0 +1,59 @@
+# backend/services/delivery_area_service.py
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from services.catalog_service import catalog_service
+from utils.geo import GridIndex
+
+# Side of a spatial index cell, in miles
+GEO_CELL_MILES = float(os.getenv('GEO_CELL_MILES', '5'))
+
+# Delivery radius (miles) assumed for restaurants whose settings don't set one
+DEFAULT_DELIVERY_RADIUS = 5.0
+
+class DeliveryAreaService:
+    """Which restaurants deliver to a location
+
+    Each located restaurant's delivery area (its location plus
+    settings.delivery_radius, in miles) sits in a grid index fed by the
+    catalog listener, so a lookup only measures distances to restaurants
+    in nearby cells.
+    """
+
+    def __init__(self, catalog=None, cell_miles: float = GEO_CELL_MILES):
+        self.catalog = catalog if catalog is not None else catalog_service
+        self.index = GridIndex(cell_miles)
+        self._subscribed = False
+        self._subscribe_lock = threading.Lock()
+
+    def _ensure_indexed(self):
+        """Build the index from the catalog on first use; it is then updated per change"""
+        if self._subscribed:
+            return
+        with self._subscribe_lock:
+            if not self._subscribed:
+                self.catalog.add_listener(self._on_restaurant_change)
+                self._subscribed = True
+
+    def _on_restaurant_change(self, restaurant_id: str, restaurant_data: Optional[Dict[str, Any]],
+                              card: Optional[Dict[str, Any]]):
+        location = (restaurant_data or {}).get('location') or {}
+        if location.get('lat') is None or location.get('lng') is None:
+            self.index.remove(restaurant_id)
+            return
+
+        settings = restaurant_data.get('settings') or {}
+        radius = float(settings.get('delivery_radius') or DEFAULT_DELIVERY_RADIUS)
+        self.index.put(restaurant_id, float(location['lat']), float(location['lng']), radius)
+
+    def restaurants_delivering_to(self, lat: float, lng: float) -> List[Tuple[str, float]]:
+        """Get (restaurant_id, distance in miles) for restaurants whose delivery area covers a point, nearest first"""
+        self._ensure_indexed()
+        return self.index.covering(lat, lng)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size"""
+        return {'located_restaurants': len(self.index)}
+
+# Create a singleton instance
+delivery_area_service = DeliveryAreaService()
@@ -0,0 +1,113 @@
+# backend/services/geocoding_service.py
+import hashlib
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+from utils.geo import parse_coordinates
+
+# Optional JSON file of {"zip_code": [lat, lng]} centroids; when set, listed ZIP codes are geocoded from it
+GEOCODER_ZIP_CENTROIDS = os.getenv('GEOCODER_ZIP_CENTROIDS', '')
+
+# Tests and offline runs only: invent a stable point for any other address
+GEOCODER_SYNTHETIC = os.getenv('GEOCODER_SYNTHETIC', 'false').lower() == 'true'
+
+# Area synthetic points are placed in: south,west,north,east
+GEOCODER_LOCAL_BOUNDS = os.getenv('GEOCODER_LOCAL_BOUNDS', '40.50,-74.25,40.90,-73.70')
+
+# Address fields that feed geocoding; a write touching any of them re-locates the address
+ADDRESS_FIELDS = ('address_line_1', 'address', 'city', 'state', 'zip_code', 'latitude', 'longitude')
+
+class Geocoder(ABC):
+    """Turns a postal address into coordinates"""
+
+    @abstractmethod
+    def geocode(self, address: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        """Get (lat, lng) for an address dict (address_line_1, city, state, zip_code), or None"""
+
+class LocalGeocoder(Geocoder):
+    """Offline geocoder backed by a ZIP code centroid table
+
+    Resolves only ZIP codes the table lists. With synthetic, it also makes
+    up a stable point inside the configured bounds from the ZIP code (or
+    city and state) of any other address, so addresses sharing a ZIP code
+    land together; those points are not real, so this is for tests and
+    offline runs only.
+    """
+
+    def __init__(self, centroids: Dict[str, Tuple[float, float]] = None, synthetic: bool = False,
+                 bounds: str = GEOCODER_LOCAL_BOUNDS):
+        if centroids is None:
+            centroids = {}
+            if GEOCODER_ZIP_CENTROIDS:
+                with open(GEOCODER_ZIP_CENTROIDS) as centroid_file:
+                    centroids = json.load(centroid_file)
+        self.centroids = {str(zip_code): tuple(point) for zip_code, point in centroids.items()}
+        self.synthetic = synthetic
+        self.south, self.west, self.north, self.east = (float(value) for value in bounds.split(','))
+
+    def geocode(self, address: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        zip_code = str(address.get('zip_code') or '').strip()
+        if zip_code in self.centroids:
+            return self.centroids[zip_code]
+        if not self.synthetic:
+            return None
+
+        area = zip_code or ' '.join(str(address.get(field) or '').strip().lower() for field in ('city', 'state')).strip()
+        if not area:
+            return None
+
+        digest = hashlib.sha256(area.encode('utf-8')).digest()
+        lat_fraction = int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF
+        lng_fraction = int.from_bytes(digest[4:8], 'big') / 0xFFFFFFFF
+        return (round(self.south + (self.north - self.south) * lat_fraction, 6),
+                round(self.west + (self.east - self.west) * lng_fraction, 6))
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+_geocoder_configured = False
+
+def get_geocoder() -> Optional[Geocoder]:
+    """Get the process-wide geocoder, or None if none is configured
+
+    Unless one was installed, a LocalGeocoder is used when a centroid table
+    or GEOCODER_SYNTHETIC is configured.
+    """
+    global _geocoder, _geocoder_configured
+    if not _geocoder_configured:
+        with _geocoder_lock:
+            if not _geocoder_configured:
+                if _geocoder is None and (GEOCODER_ZIP_CENTROIDS or GEOCODER_SYNTHETIC):
+                    _geocoder = LocalGeocoder(synthetic=GEOCODER_SYNTHETIC)
+                if _geocoder is None:
+                    print("⚠️  No geocoder configured - addresses are only located from sent coordinates")
+                _geocoder_configured = True
+    return _geocoder
+
+def set_geocoder(geocoder: Optional[Geocoder]):
+    """Install a geocoder (e.g. one backed by a maps API), or None for none"""
+    global _geocoder, _geocoder_configured
+    with _geocoder_lock:
+        _geocoder = geocoder
+        _geocoder_configured = True
+
+def locate_address(address: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """Get an address's location as {'lat', 'lng'}
+
+    Coordinates sent with the address (latitude/longitude, e.g. from the
+    device) win; otherwise the address is geocoded. Returns None if it
+    can't be placed, including when no geocoder is configured.
+    """
+    coordinates = parse_coordinates(address.get('latitude'), address.get('longitude'))
+    geocoder = get_geocoder() if coordinates is None else None
+    if geocoder is not None:
+        try:
+            coordinates = geocoder.geocode(address)
+        except Exception as e:
+            print(f"⚠️  Geocoding failed: {str(e)}")
+            return None
+    if coordinates is None:
+        return None
+    return {'lat': coordinates[0], 'lng': coordinates[1]}
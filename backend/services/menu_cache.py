@@ -0,0 +1,50 @@
+# backend/services/menu_cache.py
+import os
+import threading
+from typing import Any, Dict, Tuple
+from cachetools import LRUCache
+from utils.cache import CountingCache, MISSING
+
+# Restaurants whose assembled menu is kept in memory
+MENU_CACHE_SIZE = int(os.getenv('MENU_CACHE_SIZE', '500'))
+
+class MenuCache:
+    """Assembled customer menus per restaurant, tagged with the menu version they were built at
+
+    Every menu write bumps the restaurant's menu_version field (seen by all
+    processes through the catalog listener) and this process's local
+    version (seen at once), so a cached menu is served only while both
+    still match. Cached menus are shared between requests, so callers must
+    not modify them.
+    """
+
+    def __init__(self, maxsize: int = MENU_CACHE_SIZE):
+        self._menus = CountingCache(LRUCache(maxsize=maxsize))
+        self._lock = threading.Lock()
+        self._local_versions: Dict[str, int] = {}
+
+    def version(self, restaurant_id: str, stored_version: int) -> Tuple[int, int]:
+        """Get the current menu version key for a restaurant"""
+        with self._lock:
+            return stored_version, self._local_versions.get(restaurant_id, 0)
+
+    def bump(self, restaurant_id: str):
+        """Mark a restaurant's menu as changed in this process"""
+        with self._lock:
+            self._local_versions[restaurant_id] = self._local_versions.get(restaurant_id, 0) + 1
+
+    def get(self, restaurant_id: str, version: Tuple[int, int]) -> Any:
+        """Get the cached menu built at version, or MISSING"""
+        return self._menus.get((restaurant_id, version))
+
+    def set(self, restaurant_id: str, version: Tuple[int, int], menu: Any):
+        """Cache a menu built at version"""
+        # Menus of older versions are never asked for again and age out of the LRU
+        self._menus.set((restaurant_id, version), menu)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for monitoring"""
+        return self._menus.stats()
+
+# Create a singleton instance
+menu_cache = MenuCache()
@@ -0,0 +1,192 @@
+# backend/services/order_lifecycle.py
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from firebase_admin import firestore
+from data.repository import get_backend, run_in_transaction
+from data.identity_map import current_identity_map
+
+# Who may move an order from one status to the next: status -> {next status: roles}
+ORDER_TRANSITIONS = {
+    'pending': {
+        'confirmed': ('restaurant',),
+        'cancelled': ('customer', 'restaurant')
+    },
+    'confirmed': {
+        'preparing': ('restaurant',),
+        'ready': ('restaurant',),
+        'assigned_to_agent': ('agent',),
+        'cancelled': ('customer', 'restaurant')
+    },
+    'preparing': {
+        'ready': ('restaurant',),
+        'cancelled': ('restaurant',)
+    },
+    'ready': {
+        'assigned_to_agent': ('agent',),
+        'picked_up': ('restaurant',),
+        'delivered': ('restaurant',),
+        'cancelled': ('restaurant',)
+    },
+    'assigned_to_agent': {
+        'picked_up': ('agent',),
+        'cancelled': ('restaurant',)
+    },
+    'picked_up': {
+        'on_way': ('agent',),
+        'delivered': ('restaurant',),
+        'cancelled': ('restaurant',)
+    },
+    'on_way': {
+        'delivered': ('agent',),
+        'cancelled': ('restaurant',)
+    },
+    'delivered': {},
+    'cancelled': {}
+}
+
+ORDER_STATUSES = tuple(ORDER_TRANSITIONS)
+
+# Field recording when an order entered a status (default: <status>_at)
+STATUS_TIMESTAMP_FIELDS = {
+    'assigned_to_agent': 'assigned_at'
+}
+
+def status_timestamp_field(status: str) -> str:
+    return STATUS_TIMESTAMP_FIELDS.get(status, f'{status}_at')
+
+def current_status(order_data: Dict[str, Any]) -> Optional[str]:
+    """Get an order's status (orders created before status was unified only have order_status)"""
+    status = order_data.get('status')
+    if status is None and order_data.get('order_status'):
+        status = str(order_data['order_status']).lower()
+    return status
+
+def allowed_transitions(status: str, role: str = None) -> List[str]:
+    """Get the statuses an order can move to next (for one role, or any)"""
+    return [
+        next_status for next_status, roles in ORDER_TRANSITIONS.get(status, {}).items()
+        if role is None or role in roles
+    ]
+
+class OrderLifecycle:
+    """The single place order status changes
+
+    A transition reads the order and writes it in one transaction, so it
+    only commits if the order is still in the status it was checked in;
+    a concurrent change makes it retry against the new status (and fail if
+    the transition is no longer allowed). Each change sets the status's
+    timestamp field and appends an event to the order's status_events
+    subcollection in the same commit. The updated order is returned from
+    the transaction, so callers never re-read it.
+    """
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_backend()
+        self.orders_collection = 'orders'
+        self.events_collection = 'status_events'
+
+    def create(self, order_id: str, order_data: Dict[str, Any], status: str, role: str,
+               actor_id: str = None) -> Dict[str, Any]:
+        """Store a new order in its first status, with its first status event"""
+        if status not in ORDER_TRANSITIONS:
+            raise ValueError(f"Invalid status: {status}")
+
+        now = datetime.utcnow()
+        order_data = dict(order_data, status=status, updated_at=now)
+        order_data[status_timestamp_field(status)] = now
+
+        order_ref = self.db.collection(self.orders_collection).document(order_id)
+        batch = self.db.batch()
+        batch.set(order_ref, order_data)
+        batch.set(order_ref.collection(self.events_collection).document(),
+                  self._event(None, status, role, actor_id, now))
+        batch.commit()
+
+        self._forget(order_ref)
+        return order_data
+
+    def transition(self, order_id: str, new_status: str, role: str, actor_id: str = None,
+                   check: Callable[[Dict[str, Any]], None] = None, updates: Dict[str, Any] = None,
+                   reason: str = None) -> Dict[str, Any]:
+        """Move an order to new_status if its current status allows it for this role
+
+        check(order_data), if given, runs inside the transaction and raises
+        ValueError to refuse (e.g. the order belongs to someone else).
+        updates are extra fields written with the status. Returns the
+        order as written, with its id. Raises ValueError if the order is
+        missing or the transition isn't allowed.
+        """
+        if new_status not in ORDER_TRANSITIONS:
+            raise ValueError(f"Invalid status. Must be one of: {', '.join(ORDER_STATUSES)}")
+
+        order_ref = self.db.collection(self.orders_collection).document(order_id)
+        try:
+            return run_in_transaction(self.db, self._transition, order_ref, new_status, role, actor_id,
+                                      check, updates or {}, reason)
+        finally:
+            # Written outside the request's identity map, so it must not serve its old copy
+            self._forget(order_ref)
+
+    def _transition(self, transaction, order_ref, new_status: str, role: str, actor_id: Optional[str],
+                    check: Optional[Callable], updates: Dict[str, Any], reason: Optional[str]) -> Dict[str, Any]:
+        snapshot = order_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            raise ValueError("Order not found")
+
+        order_data = snapshot.to_dict()
+        if check is not None:
+            check(order_data)
+
+        status = current_status(order_data)
+        if role not in ORDER_TRANSITIONS.get(status, {}).get(new_status, ()):
+            raise ValueError(f"Invalid status transition from {status} to {new_status}")
+
+        now = datetime.utcnow()
+        update_data = dict(updates)
+        update_data['status'] = new_status
+        update_data[status_timestamp_field(new_status)] = now
+        update_data['updated_at'] = now
+        if 'order_status' in order_data:
+            update_data['order_status'] = firestore.DELETE_FIELD
+
+        transaction.update(order_ref, update_data)
+        transaction.set(order_ref.collection(self.events_collection).document(),
+                        self._event(status, new_status, role, actor_id, now, reason))
+
+        order_data.update(update_data)
+        order_data.pop('order_status', None)
+        order_data['id'] = order_ref.id
+        return order_data
+
+    def get_events(self, order_id: str) -> List[Dict[str, Any]]:
+        """Get an order's status events, oldest first"""
+        events_ref = (self.db.collection(self.orders_collection).document(order_id)
+                      .collection(self.events_collection))
+
+        events = []
+        for doc in events_ref.order_by('at').stream():
+            event = doc.to_dict()
+            event['id'] = doc.id
+            events.append(event)
+        return events
+
+    def _event(self, from_status: Optional[str], to_status: str, role: str, actor_id: Optional[str],
+               at: datetime, reason: str = None) -> Dict[str, Any]:
+        event = {
+            'from_status': from_status,
+            'to_status': to_status,
+            'role': role,
+            'actor_id': actor_id,
+            'at': at
+        }
+        if reason:
+            event['reason'] = reason
+        return event
+
+    def _forget(self, order_ref):
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            identity_map.evict(order_ref)
+
+# Create a singleton instance
+order_lifecycle = OrderLifecycle()
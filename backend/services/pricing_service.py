@@ -0,0 +1,208 @@
+# backend/services/pricing_service.py
+import os
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from typing import Any, Dict, List, Tuple
+from cachetools import LRUCache
+from data.repository import get_backend
+from data.identity_map import get_document
+from services.catalog_service import catalog_service
+from services.menu_cache import menu_cache
+from utils.cache import CountingCache, MISSING
+
+# Restaurants whose menu prices are kept in memory
+PRICE_CACHE_SIZE = int(os.getenv('PRICE_CACHE_SIZE', '2000'))
+
+# Used when a restaurant hasn't saved its settings yet (same as a new profile's)
+DEFAULT_PRICING_SETTINGS = {
+    'delivery_fee': 2.99,
+    'min_order_amount': 15.0,
+    'tax_rate': 8.25
+}
+
+# Largest quantity of one item in an order
+MAX_LINE_QUANTITY = 100
+
+def _to_cents(value, field: str) -> int:
+    """Convert a money amount to whole cents (half up), rejecting negative or non-numeric values"""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid {field}: {value!r}")
+    if not amount.is_finite() or amount < 0:
+        raise ValueError(f"Invalid {field}: {value!r}")
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def _to_amount(cents: int) -> float:
+    return cents / 100
+
+class PricingService:
+    """Prices orders on the server from menu_items prices and the restaurant's settings
+
+    Each restaurant's prices are loaded with one query and cached under its
+    menu version (the same version the customer menu cache uses), so a menu
+    change is priced in at once and an order costs no reads per item.
+    Settings (tax_rate, delivery_fee, min_order_amount) come from the live
+    restaurant catalog. Amounts are summed in integer cents, and tax is
+    rounded half up once per order.
+    """
+
+    def __init__(self, db=None, catalog=None, cache_size: int = PRICE_CACHE_SIZE):
+        self.db = db if db is not None else get_backend()
+        self.catalog = catalog if catalog is not None else catalog_service
+        self.items_collection = 'menu_items'
+        self.restaurants_collection = 'restaurants'
+        self._prices = CountingCache(LRUCache(maxsize=cache_size))
+
+    # ===== PRICING =====
+
+    def quote(self, restaurant_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Price an order's items; raises ValueError for unknown or unavailable items and bad quantities"""
+        if not restaurant_id:
+            raise ValueError("restaurant_id is required")
+        settings = self._get_settings(restaurant_id)
+        return self._quote(restaurant_id, items, self._get_price_table(restaurant_id), settings)
+
+    def quote_many(self, carts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Price many carts ({restaurant_id, items}) at once
+
+        Prices and settings are looked up once per restaurant, however many
+        carts it has. Returns one result per cart, in order: {'success': True,
+        'data': quote} or {'success': False, 'error': message}.
+        """
+        carts_by_restaurant = defaultdict(list)
+        for position, cart in enumerate(carts):
+            carts_by_restaurant[(cart or {}).get('restaurant_id')].append(position)
+
+        results = [None] * len(carts)
+        for restaurant_id, positions in carts_by_restaurant.items():
+            try:
+                if not restaurant_id:
+                    raise ValueError("restaurant_id is required")
+                settings = self._get_settings(restaurant_id)
+                price_table = self._get_price_table(restaurant_id)
+            except ValueError as e:
+                for position in positions:
+                    results[position] = {'success': False, 'error': str(e)}
+                continue
+
+            for position in positions:
+                try:
+                    quote = self._quote(restaurant_id, carts[position].get('items'), price_table, settings)
+                    results[position] = {'success': True, 'data': quote}
+                except ValueError as e:
+                    results[position] = {'success': False, 'error': str(e)}
+        return results
+
+    def _quote(self, restaurant_id: str, items: Any, price_table: Dict[str, Tuple[int, str, bool]],
+               settings: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(items, list) or not items:
+            raise ValueError("Order has no items")
+
+        lines = []
+        subtotal_cents = 0
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError("Each item must be an object")
+            item_id = item.get('menu_item_id') or item.get('id')
+            quantity = item.get('quantity', 1)
+            if isinstance(quantity, bool) or not isinstance(quantity, int) or not 1 <= quantity <= MAX_LINE_QUANTITY:
+                raise ValueError(f"Quantity must be a whole number from 1 to {MAX_LINE_QUANTITY}")
+
+            entry = price_table.get(item_id)
+            if entry is None:
+                raise ValueError(f"Menu item not found: {item_id}")
+            price_cents, name, is_available = entry
+            if not is_available:
+                raise ValueError(f"{name} is currently unavailable")
+
+            line_cents = price_cents * quantity
+            subtotal_cents += line_cents
+            # Keep what the client sent (description, image_url, notes...); only the prices are the server's
+            line = dict(item)
+            line.setdefault('name', name)
+            line.update({
+                'menu_item_id': item_id,
+                'price': _to_amount(price_cents),
+                'quantity': quantity,
+                'line_total': _to_amount(line_cents)
+            })
+            lines.append(line)
+
+        if subtotal_cents < settings['min_order_cents']:
+            raise ValueError(f"Minimum order amount is {_to_amount(settings['min_order_cents']):.2f}")
+
+        tax_cents = int((subtotal_cents * settings['tax_rate'] / 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+        delivery_fee_cents = settings['delivery_fee_cents']
+
+        return {
+            'restaurant_id': restaurant_id,
+            'items': lines,
+            'subtotal': _to_amount(subtotal_cents),
+            'delivery_fee': _to_amount(delivery_fee_cents),
+            'tax_rate': float(settings['tax_rate']),
+            'tax': _to_amount(tax_cents),
+            'total': _to_amount(subtotal_cents + delivery_fee_cents + tax_cents)
+        }
+
+    # ===== PRICES AND SETTINGS =====
+
+    def _get_price_table(self, restaurant_id: str) -> Dict[str, Tuple[int, str, bool]]:
+        """Get {item_id: (price in cents, name, is_available)} at the restaurant's current menu version"""
+        restaurant_data = self.catalog.get_restaurant_data(restaurant_id) or {}
+        # Read the version before the prices, so prices cached under it are never older than it
+        version = menu_cache.version(restaurant_id, restaurant_data.get('menu_version', 0))
+
+        price_table = self._prices.get((restaurant_id, version))
+        if price_table is MISSING:
+            price_table = self._load_price_table(restaurant_id)
+            # Tables of older versions are never asked for again and age out of the LRU
+            self._prices.set((restaurant_id, version), price_table)
+        return price_table
+
+    def _load_price_table(self, restaurant_id: str) -> Dict[str, Tuple[int, str, bool]]:
+        query = self.db.collection(self.items_collection).where('restaurant_id', '==', restaurant_id)
+
+        price_table = {}
+        for doc in query.stream():
+            item_data = doc.to_dict()
+            try:
+                price_cents = _to_cents(item_data.get('price'), 'price')
+            except ValueError:
+                print(f"⚠️  Menu item {doc.id} has an invalid price - it can't be ordered")
+                continue
+            price_table[doc.id] = (price_cents, item_data.get('name', ''), item_data.get('is_available', True))
+        return price_table
+
+    def _get_settings(self, restaurant_id: str) -> Dict[str, Any]:
+        """Get the restaurant's pricing settings in cents (tax_rate stays a percentage)"""
+        restaurant_data = self.catalog.get_restaurant_data(restaurant_id)
+        if restaurant_data is None:
+            # Not in the catalog yet (e.g. created moments ago): read it directly
+            doc = get_document(self.db.collection(self.restaurants_collection).document(restaurant_id))
+            if not doc.exists:
+                raise ValueError("Restaurant not found")
+            restaurant_data = doc.to_dict()
+
+        settings = restaurant_data.get('settings') or {}
+
+        def setting(field: str):
+            value = settings.get(field, restaurant_data.get(field))
+            return DEFAULT_PRICING_SETTINGS[field] if value is None else value
+
+        tax_rate = Decimal(str(setting('tax_rate')))
+        if not tax_rate.is_finite() or tax_rate < 0:
+            raise ValueError("Restaurant has an invalid tax rate")
+
+        return {
+            'tax_rate': tax_rate,
+            'delivery_fee_cents': _to_cents(setting('delivery_fee'), 'delivery fee'),
+            'min_order_cents': _to_cents(setting('min_order_amount'), 'minimum order amount')
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for monitoring"""
+        return self._prices.stats()
+
+# Create a singleton instance
+pricing_service = PricingService()
@@ -1,17 +1,18 @@
 from firebase_admin import firestore
-from config.firebase import get_db
+from data.repository import get_backend
+from data.identity_map import get_document, set_document, update_document
 from utils.validators import validate_profile_data
 
 class ProfileService:
-    def __init__(self):
-        self.db = get_db()
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_backend()
         self.collection = 'profiles'
     
     def get_profile(self, uid):
         """Get user profile by UID"""
         try:
             profile_ref = self.db.collection(self.collection).document(uid)
-            profile_doc = profile_ref.get()
+            profile_doc = get_document(profile_ref)
             
             if profile_doc.exists:
                 return profile_doc.to_dict()
@@ -35,7 +36,7 @@ class ProfileService:
             }
             
             profile_ref = self.db.collection(self.collection).document(uid)
-            profile_ref.set(profile_data)
+            set_document(profile_ref, profile_data)
             
             return profile_data
         except Exception as e:
@@ -64,7 +65,7 @@ class ProfileService:
             
             # Update profile
             profile_ref = self.db.collection(self.collection).document(uid)
-            profile_ref.update(filtered_data)
+            update_document(profile_ref, filtered_data)
             
             return list(filtered_data.keys())
         except Exception as e:
@@ -74,7 +75,7 @@ class ProfileService:
         """Update user avatar URL"""
         try:
             profile_ref = self.db.collection(self.collection).document(uid)
-            profile_ref.update({
+            update_document(profile_ref, {
                 'avatar_url': avatar_url,
                 'updated_at': firestore.SERVER_TIMESTAMP
             })
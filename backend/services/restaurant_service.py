@@ -1,11 +1,18 @@
 from firebase_admin import firestore
-from config.firebase import get_db
+from data.repository import get_backend
+from data.pagination import clamp_page_size, decode_cursor, paginate
+from services.search_service import DISH_FIELD_WEIGHTS, search_service
+from services.geocoding_service import ADDRESS_FIELDS, locate_address
+from services.menu_cache import menu_cache
+from services.order_lifecycle import order_lifecycle
+from utils.search_index import SearchIndex
+from data.identity_map import get_document, set_document, update_document, delete_document
 from typing import Optional, Dict, List, Any
-from datetime import datetime
+from datetime import datetime, timezone
 
 class RestaurantService:
-    def __init__(self):
-        self.db = get_db()
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_backend()
         self.restaurants_collection = 'restaurants'
         self.categories_collection = 'menu_categories'
         self.menu_items_collection = 'menu_items'
@@ -16,7 +23,7 @@ class RestaurantService:
         """Get restaurant profile by ID, create if doesn't exist"""
         try:
             restaurant_ref = self.db.collection(self.restaurants_collection).document(restaurant_id)
-            restaurant_doc = restaurant_ref.get()
+            restaurant_doc = get_document(restaurant_ref)
             
             if restaurant_doc.exists:
                 data = restaurant_doc.to_dict()
@@ -84,7 +91,7 @@ class RestaurantService:
             
             # Save to database
             restaurant_ref = self.db.collection(self.restaurants_collection).document(restaurant_id)
-            restaurant_ref.set(default_profile)
+            set_document(restaurant_ref, default_profile)
             
             # Return with ID
             default_profile['id'] = restaurant_id
@@ -97,28 +104,42 @@ class RestaurantService:
         """Update restaurant profile, create if doesn't exist"""
         try:
             restaurant_ref = self.db.collection(self.restaurants_collection).document(restaurant_id)
-            restaurant_doc = restaurant_ref.get()
+            restaurant_doc = get_document(restaurant_ref)
             
             # Add updated timestamp
             update_data['updated_at'] = datetime.utcnow()
             
+            # Re-locate the restaurant when its address changes (feeds delivery area lookups)
+            if any(field in update_data for field in ADDRESS_FIELDS):
+                current_data = restaurant_doc.to_dict() if restaurant_doc.exists else {}
+                location = locate_address({**current_data, **update_data})
+                if location:
+                    update_data['location'] = location
+                elif 'location' in current_data:
+                    # The stored point belongs to the previous address
+                    update_data['location'] = firestore.DELETE_FIELD
+            update_data.pop('latitude', None)
+            update_data.pop('longitude', None)
+            
             if restaurant_doc.exists:
                 # Update existing profile
-                restaurant_ref.update(update_data)
+                update_document(restaurant_ref, update_data)
             else:
                 # Create new profile with update data
                 default_profile = self._create_default_restaurant_profile(restaurant_id)
                 # Merge update data with defaults
                 merged_data = {**default_profile, **update_data}
-                restaurant_ref.set(merged_data)
+                set_document(restaurant_ref, merged_data)
             
             # Return updated profile
-            updated_doc = restaurant_ref.get()
+            updated_doc = get_document(restaurant_ref)
             updated_data = updated_doc.to_dict()
             updated_data['id'] = restaurant_id
             
             return updated_data
             
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error updating restaurant profile: {str(e)}")
 
@@ -259,6 +280,7 @@ class RestaurantService:
             category_id = doc_ref[1].id
             
             new_category['id'] = category_id
+            self._menu_changed(restaurant_id)
             return new_category
         except Exception as e:
             raise Exception(f"Error creating menu category: {str(e)}")
@@ -270,12 +292,13 @@ class RestaurantService:
             update_data['updated_at'] = datetime.utcnow()
             
             category_ref = self.db.collection(self.categories_collection).document(category_id)
-            category_ref.update(update_data)
+            update_document(category_ref, update_data)
             
             # Return updated category
-            updated_doc = category_ref.get()
+            updated_doc = get_document(category_ref)
             updated_data = updated_doc.to_dict()
             updated_data['id'] = category_id
+            self._menu_changed(updated_data.get('restaurant_id'))
             return updated_data
         except Exception as e:
             raise Exception(f"Error updating menu category: {str(e)}")
@@ -292,12 +315,25 @@ class RestaurantService:
             
             # Delete category
             category_ref = self.db.collection(self.categories_collection).document(category_id)
-            category_ref.delete()
+            category_doc = get_document(category_ref)
+            delete_document(category_ref)
             
+            if category_doc.exists:
+                self._menu_changed(category_doc.to_dict().get('restaurant_id'))
             return True
         except Exception as e:
             raise Exception(f"Error deleting menu category: {str(e)}")
     
+    def _menu_changed(self, restaurant_id: str):
+        """Bump the restaurant's menu version so cached customer menus are rebuilt"""
+        menu_cache.bump(restaurant_id)
+        try:
+            restaurant_ref = self.db.collection(self.restaurants_collection).document(restaurant_id)
+            update_document(restaurant_ref, {'menu_version': firestore.Increment(1)})
+        except Exception as e:
+            # Other processes pick the change up on the next menu write
+            print(f"⚠️  Could not bump menu version for {restaurant_id}: {str(e)}")
+    
     # ===== MENU ITEM MANAGEMENT =====
     
     def get_menu_items(self, restaurant_id: str, category_id: str = None) -> List[Dict[str, Any]]:
@@ -333,7 +369,7 @@ class RestaurantService:
             # Verify category exists and belongs to restaurant
             category_id = item_data['category_id']
             category_ref = self.db.collection(self.categories_collection).document(category_id)
-            category_doc = category_ref.get()
+            category_doc = get_document(category_ref)
             
             if not category_doc.exists:
                 raise ValueError("Category not found")
@@ -342,9 +378,10 @@ class RestaurantService:
             if category_data.get('restaurant_id') != restaurant_id:
                 raise ValueError("Category does not belong to this restaurant")
             
-            # Get current max sort order for category
-            category_items = self.get_menu_items(restaurant_id, category_id)
-            max_sort_order = max([item.get('sort_order', 0) for item in category_items], default=0)
+            # Append to the end of the category unless a sort order was given
+            sort_order = item_data.get('sort_order')
+            if sort_order is None:
+                sort_order = self._get_max_sort_order(category_id) + 1
             
             new_item = {
                 'restaurant_id': restaurant_id,
@@ -359,7 +396,7 @@ class RestaurantService:
                 'is_vegan': item_data.get('is_vegan', False),
                 'is_available': item_data.get('is_available', True),
                 'prep_time': item_data.get('prep_time', 15),
-                'sort_order': item_data.get('sort_order', max_sort_order + 1),
+                'sort_order': sort_order,
                 'created_at': datetime.utcnow(),
                 'updated_at': datetime.utcnow()
             }
@@ -368,10 +405,17 @@ class RestaurantService:
             item_id = doc_ref[1].id
             
             new_item['id'] = item_id
+            search_service.index_dish(item_id, new_item)
+            self._menu_changed(restaurant_id)
             return new_item
         except Exception as e:
             raise Exception(f"Error creating menu item: {str(e)}")
     
+    def _get_max_sort_order(self, category_id: str) -> int:
+        """Get the highest sort order in a category, reading only that field"""
+        query = self.db.collection(self.menu_items_collection).where('category_id', '==', category_id)
+        return max((doc.to_dict().get('sort_order', 0) for doc in query.select(['sort_order']).stream()), default=0)
+    
     def update_menu_item(self, item_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update menu item"""
         try:
@@ -383,12 +427,14 @@ class RestaurantService:
             update_data['updated_at'] = datetime.utcnow()
             
             item_ref = self.db.collection(self.menu_items_collection).document(item_id)
-            item_ref.update(update_data)
+            update_document(item_ref, update_data)
             
             # Return updated item
-            updated_doc = item_ref.get()
+            updated_doc = get_document(item_ref)
             updated_data = updated_doc.to_dict()
             updated_data['id'] = item_id
+            search_service.index_dish(item_id, updated_data)
+            self._menu_changed(updated_data.get('restaurant_id'))
             return updated_data
         except Exception as e:
             raise Exception(f"Error updating menu item: {str(e)}")
@@ -397,7 +443,12 @@ class RestaurantService:
         """Delete menu item"""
         try:
             item_ref = self.db.collection(self.menu_items_collection).document(item_id)
-            item_ref.delete()
+            item_doc = get_document(item_ref)
+            delete_document(item_ref)
+            search_service.remove_dish(item_id)
+            
+            if item_doc.exists:
+                self._menu_changed(item_doc.to_dict().get('restaurant_id'))
             return True
         except Exception as e:
             raise Exception(f"Error deleting menu item: {str(e)}")
@@ -406,7 +457,7 @@ class RestaurantService:
         """Toggle menu item availability"""
         try:
             item_ref = self.db.collection(self.menu_items_collection).document(item_id)
-            item_doc = item_ref.get()
+            item_doc = get_document(item_ref)
             
             if not item_doc.exists:
                 raise ValueError("Menu item not found")
@@ -414,15 +465,17 @@ class RestaurantService:
             item_data = item_doc.to_dict()
             current_availability = item_data.get('is_available', True)
             
-            item_ref.update({
+            update_document(item_ref, {
                 'is_available': not current_availability,
                 'updated_at': datetime.utcnow()
             })
             
             # Return updated item
-            updated_doc = item_ref.get()
+            updated_doc = get_document(item_ref)
             updated_data = updated_doc.to_dict()
             updated_data['id'] = item_id
+            search_service.index_dish(item_id, updated_data)
+            self._menu_changed(updated_data.get('restaurant_id'))
             return updated_data
         except Exception as e:
             raise Exception(f"Error toggling menu item availability: {str(e)}")
@@ -431,7 +484,7 @@ class RestaurantService:
         """Get menu item by ID"""
         try:
             item_ref = self.db.collection(self.menu_items_collection).document(item_id)
-            item_doc = item_ref.get()
+            item_doc = get_document(item_ref)
             
             if item_doc.exists:
                 item_data = item_doc.to_dict()
@@ -445,7 +498,7 @@ class RestaurantService:
         """Get category by ID"""
         try:
             category_ref = self.db.collection(self.categories_collection).document(category_id)
-            category_doc = category_ref.get()
+            category_doc = get_document(category_ref)
             
             if category_doc.exists:
                 category_data = category_doc.to_dict()
@@ -487,70 +540,53 @@ class RestaurantService:
     def search_menu_items(self, restaurant_id: str, search_term: str) -> List[Dict[str, Any]]:
         """Search menu items by name or description"""
         try:
-            all_items = self.get_menu_items(restaurant_id)
-            search_term = search_term.lower().strip()
-            
-            filtered_items = []
-            for item in all_items:
-                name_match = search_term in item.get('name', '').lower()
-                desc_match = search_term in item.get('description', '').lower()
-                
-                if name_match or desc_match:
-                    filtered_items.append(item)
-            
-            return filtered_items
+            # Read from Firestore, not the per-process dish index: an owner must see items
+            # they just added even when another worker handled the write
+            all_items = {item['id']: item for item in self.get_menu_items(restaurant_id)}
+            
+            # Rank with the same tokenizer, prefix and typo matching as dish search
+            index = SearchIndex(DISH_FIELD_WEIGHTS)
+            for item_id, item in all_items.items():
+                index.add(item_id, {
+                    'name': item.get('name'),
+                    'description': item.get('description'),
+                    'ingredients': ' '.join(str(ingredient) for ingredient in item.get('ingredients') or [])
+                })
+            
+            hits, _ = index.search(search_term, limit=None)
+            return [all_items[item_id] for item_id, _ in hits]
         except Exception as e:
             raise Exception(f"Error searching menu items: {str(e)}")
         
     def get_restaurant_summary(self, restaurant_id: str) -> Dict[str, Any]:
         """Get summary of restaurant's menu and today's performance"""
         try:
-            from datetime import datetime
+            from datetime import timedelta
             
             categories = self.get_menu_categories(restaurant_id)
             all_items = self.get_menu_items(restaurant_id)
-            all_orders = self.get_restaurant_orders(restaurant_id, '')  # Get ALL orders
         
             # Calculate menu summary stats
             total_items = len(all_items)
             total_categories = len(categories)
             
-            # Get today's date
-            today = datetime.now().date()
+            # Read only today's orders instead of the restaurant's whole history.
+            # "Today" is the local date, matched against created_at's own date
+            today_start = datetime.combine(datetime.now().date(), datetime.min.time())
+            query = self.db.collection('orders').where('restaurant_id', '==', restaurant_id)
+            query = query.where('created_at', '>=', today_start)
+            query = query.where('created_at', '<', today_start + timedelta(days=1))
             
-            # Filter orders in Python
             today_orders_count = 0
             today_revenue = 0.0
             
-            for order in all_orders:
-                # Parse order creation date
-                order_date = None
-                if 'created_at' in order:
-                    try:
-                        if isinstance(order['created_at'], str):
-                            # Try common datetime formats
-                            for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f']:
-                                try:
-                                    order_date = datetime.strptime(order['created_at'], fmt).date()
-                                    break
-                                except ValueError:
-                                    continue
-                            
-                            if order_date is None:
-                                order_date = datetime.fromisoformat(order['created_at'].replace('Z', '+00:00')).date()
-                        else:
-                            order_date = order['created_at'].date()
-                    except Exception:
-                        continue
+            for doc in query.select(['total']).stream():
+                today_orders_count += 1
                 
-                # Check if order is from today
-                if order_date and order_date == today:
-                    today_orders_count += 1
-                    
-                    # Add to today's revenue
-                    order_total = order.get('total', 0)
-                    if isinstance(order_total, (int, float)):
-                        today_revenue += float(order_total)
+                # Add to today's revenue
+                order_total = doc.to_dict().get('total', 0)
+                if isinstance(order_total, (int, float)):
+                    today_revenue += float(order_total)
         
             return {
                 'categoriesCount': total_categories,
@@ -586,100 +622,54 @@ class RestaurantService:
 
             # ===== ORDER MANAGEMENT =====
 
-    def get_restaurant_orders(self, restaurant_id: str, status: str = None, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get orders for restaurant with optional status filter (no index required)"""
+    def get_restaurant_orders(self, restaurant_id: str, status: str = None, limit: int = 50,
+                              cursor: str = None) -> Dict[str, Any]:
+        """Get one page of the restaurant's orders, newest first, with optional status filter"""
+        page_cursor = decode_cursor(cursor)
         try:
             orders_ref = self.db.collection('orders')
+            query = orders_ref.where('restaurant_id', '==', restaurant_id)
             
-            # Simple query without ordering to avoid index requirement
             if status:
-                # Query with both restaurant_id and status
-                query = orders_ref.where('restaurant_id', '==', restaurant_id).where('status', '==', status)
-            else:
-                # Query with just restaurant_id
-                query = orders_ref.where('restaurant_id', '==', restaurant_id)
+                query = query.where('status', '==', status)
+            
+            snapshots, next_cursor = paginate(query, orders_ref, 'created_at', clamp_page_size(limit, 50), page_cursor)
             
-            # Get all matching orders (no ordering in Firestore)
             orders = []
-            for doc in query.stream():
+            for doc in snapshots:
                 order_data = doc.to_dict()
                 order_data['id'] = doc.id
-                
-                # Ensure timestamps are properly formatted
-                if 'created_at' in order_data and order_data['created_at']:
-                    if hasattr(order_data['created_at'], 'isoformat'):
-                        order_data['created_at'] = order_data['created_at'].isoformat()
-                    elif hasattr(order_data['created_at'], 'strftime'):
-                        order_data['created_at'] = order_data['created_at'].strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-                
-                if 'updated_at' in order_data and order_data['updated_at']:
-                    if hasattr(order_data['updated_at'], 'isoformat'):
-                        order_data['updated_at'] = order_data['updated_at'].isoformat()
-                    elif hasattr(order_data['updated_at'], 'strftime'):
-                        order_data['updated_at'] = order_data['updated_at'].strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-                
                 orders.append(order_data)
             
-            # Sort in Python by created_at (newest first)
-            orders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
-            # Apply limit in Python
-            return orders[:limit]
-            
+            return {'orders': orders, 'next_cursor': next_cursor}
         except Exception as e:
-            # If no orders exist, create mock orders for testing
-            if "No document to update" in str(e) or not orders:
-                return self._create_mock_orders_data(restaurant_id)[:limit]
             raise Exception(f"Error getting restaurant orders: {str(e)}")
+
     def update_order_status(self, restaurant_id: str, order_id: str, new_status: str) -> Dict[str, Any]:
         """Update order status"""
         try:
-            # Validate status
-            valid_statuses = ['pending', 'confirmed', 'preparing', 'ready', 'picked_up', 'delivered', 'cancelled']
-            if new_status not in valid_statuses:
-                raise ValueError(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
-            
-            # Get order and verify it belongs to restaurant
-            order_ref = self.db.collection('orders').document(order_id)
-            order_doc = order_ref.get()
-            
-            if not order_doc.exists:
-                raise ValueError("Order not found")
-            
-            order_data = order_doc.to_dict()
-            if order_data.get('restaurant_id') != restaurant_id:
-                raise ValueError("Order does not belong to this restaurant")
-            
-            # Update status with timestamp
-            update_data = {
-                'status': new_status,
-                'updated_at': datetime.utcnow(),
-                f'{new_status}_at': datetime.utcnow()  # Track when status was set
-            }
-            
-            order_ref.update(update_data)
-            
-            # Return updated order
-            updated_doc = order_ref.get()
-            updated_data = updated_doc.to_dict()
-            updated_data['id'] = order_id
-            
-            # Format timestamps
-            for key, value in updated_data.items():
-                if key.endswith('_at') and hasattr(value, 'isoformat'):
-                    updated_data[key] = value.isoformat()
-            
-            return updated_data
+            updates = {'cancellation_reason': 'Cancelled by restaurant'} if new_status == 'cancelled' else None
+            return order_lifecycle.transition(order_id, new_status, 'restaurant', restaurant_id,
+                                              check=self._order_owner_check(restaurant_id), updates=updates)
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error updating order status: {str(e)}")
 
+    def _order_owner_check(self, restaurant_id: str):
+        """Refuse status changes to another restaurant's orders"""
+        def check(order_data):
+            if order_data.get('restaurant_id') != restaurant_id:
+                raise ValueError("Order does not belong to this restaurant")
+        return check
+
     def get_restaurant_orders_by_status(self, restaurant_id: str, status: str) -> List[Dict[str, Any]]:
         """Get orders filtered by specific status"""
-        return self.get_restaurant_orders(restaurant_id, status=status)
+        return self.get_restaurant_orders(restaurant_id, status=status)['orders']
 
     def get_pending_orders(self, restaurant_id: str) -> List[Dict[str, Any]]:
         """Get pending orders for restaurant"""
-        return self.get_restaurant_orders(restaurant_id, status='pending')
+        return self.get_restaurant_orders(restaurant_id, status='pending')['orders']
 
     def get_active_orders(self, restaurant_id: str) -> List[Dict[str, Any]]:
         """Get active orders (confirmed, preparing, ready)"""
@@ -692,54 +682,37 @@ class RestaurantService:
             for doc in query.stream():
                 order_data = doc.to_dict()
                 order_data['id'] = doc.id
-                
-                # Format timestamps
-                if 'created_at' in order_data and hasattr(order_data['created_at'], 'isoformat'):
-                    order_data['created_at'] = order_data['created_at'].isoformat()
-                
                 orders.append(order_data)
             
-            # Sort by created_at
-            orders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            # Newest first (orders missing created_at last)
+            orders.sort(key=lambda x: self._created_at_key(x.get('created_at')), reverse=True)
             return orders
         except Exception as e:
             raise Exception(f"Error getting active orders: {str(e)}")
 
+    @staticmethod
+    def _created_at_key(value) -> datetime:
+        """Sortable naive UTC datetime for a stored created_at value"""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return datetime.min
+        if not isinstance(value, datetime):
+            return datetime.min
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
     def cancel_order(self, restaurant_id: str, order_id: str, reason: str = None) -> Dict[str, Any]:
         """Cancel an order"""
         try:
-            # Get order and verify
-            order_ref = self.db.collection('orders').document(order_id)
-            order_doc = order_ref.get()
-            
-            if not order_doc.exists:
-                raise ValueError("Order not found")
-            
-            order_data = order_doc.to_dict()
-            if order_data.get('restaurant_id') != restaurant_id:
-                raise ValueError("Order does not belong to this restaurant")
-            
-            # Check if order can be cancelled
-            current_status = order_data.get('status')
-            if current_status in ['delivered', 'cancelled']:
-                raise ValueError(f"Cannot cancel order with status: {current_status}")
-            
-            # Update to cancelled
-            update_data = {
-                'status': 'cancelled',
-                'cancelled_at': datetime.utcnow(),
-                'cancellation_reason': reason or 'Cancelled by restaurant',
-                'updated_at': datetime.utcnow()
-            }
-            
-            order_ref.update(update_data)
-            
-            # Return updated order
-            updated_doc = order_ref.get()
-            updated_data = updated_doc.to_dict()
-            updated_data['id'] = order_id
-            
-            return updated_data
+            return order_lifecycle.transition(order_id, 'cancelled', 'restaurant', restaurant_id,
+                                              check=self._order_owner_check(restaurant_id),
+                                              updates={'cancellation_reason': reason or 'Cancelled by restaurant'},
+                                              reason=reason)
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error cancelling order: {str(e)}")
 
@@ -811,7 +784,7 @@ class RestaurantService:
             
             # Update restaurant profile with logo URL
             restaurant_ref = self.db.collection('restaurants').document(restaurant_id)
-            restaurant_ref.update({
+            update_document(restaurant_ref, {
                 'logo_url': logo_url,
                 'updated_at': datetime.utcnow()
             })
@@ -1,14 +1,32 @@
-from firebase_admin import firestore
-from config.firebase import get_db
-from models.roles import UserRole, Permission, RoleHelper, RoleSpecificData
+from firebase_admin import firestore, auth
+from config.firebase import ROLE_CLAIMS_ENABLED
+from data.repository import get_backend
+from models.roles import UserRole, Permission, RoleHelper, RoleSpecificData, PERMISSION_BITS
+from utils.cache import CountingCache, MISSING
+from cachetools import TTLCache
 from typing import Optional, Dict, List, Any
 from datetime import datetime
+import copy
+import os
+import time
+
+# Role lookups are cached in-process; writes through this service refresh or
+# invalidate the entry, the TTL bounds staleness for changes made elsewhere
+ROLE_CACHE_SIZE = int(os.getenv('ROLE_CACHE_SIZE', '10000'))
+ROLE_CACHE_TTL = int(os.getenv('ROLE_CACHE_TTL', '300'))
+
+# ID tokens live for an hour, so a role change only needs to be remembered
+# that long to catch tokens still carrying the previous claim
+ID_TOKEN_LIFETIME = 3600
 
 class RoleService:
-    def __init__(self):
-        self.db = get_db()
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_backend()
         self.roles_collection = 'user_roles'
         self.role_data_collection = 'role_specific_data'
+        self._role_cache = CountingCache(TTLCache(maxsize=ROLE_CACHE_SIZE, ttl=ROLE_CACHE_TTL))
+        self._role_data_cache = CountingCache(TTLCache(maxsize=ROLE_CACHE_SIZE, ttl=ROLE_CACHE_TTL))
+        self._role_changed_at = CountingCache(TTLCache(maxsize=ROLE_CACHE_SIZE, ttl=ID_TOKEN_LIFETIME))
     
     def assign_role(self, uid: str, role: UserRole) -> bool:
         """Assign a role to a user"""
@@ -29,6 +47,8 @@ class RoleService:
             # Save to database
             role_ref = self.db.collection(self.roles_collection).document(uid)
             role_ref.set(role_data)
+            self._role_cache.set(uid, role)
+            self._set_role_claim(uid, role)
             
             # Create role-specific data
             self._create_role_specific_data(uid, role)
@@ -40,6 +60,11 @@ class RoleService:
     def get_user_role(self, uid: str) -> Optional[UserRole]:
         """Get user's role"""
         try:
+            cached_role = self._role_cache.get(uid)
+            if cached_role is not MISSING:
+                return cached_role
+            
+            user_role = None
             role_ref = self.db.collection(self.roles_collection).document(uid)
             role_doc = role_ref.get()
             
@@ -48,12 +73,29 @@ class RoleService:
                 if role_data.get('is_active', True):
                     role_str = role_data.get('role')
                     if role_str and UserRole.is_valid_role(role_str):
-                        return UserRole(role_str)
+                        user_role = UserRole(role_str)
             
-            return None
+            self._role_cache.set(uid, user_role)
+            return user_role
         except Exception as e:
             raise Exception(f"Error getting user role: {str(e)}")
     
+    def get_role_from_token(self, decoded_token: Dict[str, Any]) -> Optional[UserRole]:
+        """Resolve a user's role from the `role` custom claim, falling back to user_roles"""
+        uid = decoded_token['uid']
+        
+        if ROLE_CLAIMS_ENABLED:
+            role_str = decoded_token.get('role')
+            changed_at = self._role_changed_at.get(uid)
+            
+            # The claim is stale if this process changed the role after the token was issued
+            is_stale = changed_at is not MISSING and decoded_token.get('iat', 0) <= changed_at
+            
+            if role_str and UserRole.is_valid_role(role_str) and not is_stale:
+                return UserRole(role_str)
+        
+        return self.get_user_role(uid)
+    
     def update_user_role(self, uid: str, new_role: UserRole, updated_by: str = None) -> bool:
         """Update user's role"""
         try:
@@ -70,6 +112,11 @@ class RoleService:
             }
             role_ref.update(update_data)
             
+            # A deactivated user stays deactivated, so cache and claim what is stored, not new_role
+            self._role_cache.pop(uid)
+            stored_role = self.get_user_role(uid)
+            self._set_role_claim(uid, stored_role, revoke=self._loses_permissions(current_role, stored_role))
+            
             # Update role-specific data
             self._update_role_specific_data(uid, current_role, new_role)
             
@@ -85,6 +132,8 @@ class RoleService:
                 'is_active': False,
                 'deactivated_at': datetime.utcnow()
             })
+            self._role_cache.set(uid, None)
+            self._set_role_claim(uid, None, revoke=True)
             return True
         except Exception as e:
             raise Exception(f"Error removing user role: {str(e)}")
@@ -109,29 +158,35 @@ class RoleService:
         """Get user's permissions based on their role"""
         try:
             user_role = self.get_user_role(uid)
-            if user_role:
-                return RoleHelper.get_role_permissions(user_role)
-            return []
+            return RoleHelper.get_mask_permissions(self._permission_mask(user_role))
         except Exception as e:
             raise Exception(f"Error getting user permissions: {str(e)}")
     
     def has_permission(self, uid: str, permission: Permission) -> bool:
         """Check if user has a specific permission"""
         try:
-            user_permissions = self.get_user_permissions(uid)
-            return permission in user_permissions
+            user_role = self.get_user_role(uid)
+            return bool(self._permission_mask(user_role) & PERMISSION_BITS[permission])
         except Exception as e:
             raise Exception(f"Error checking user permission: {str(e)}")
     
+    def _permission_mask(self, role: Optional[UserRole]) -> int:
+        """Permission bitmask of a role (0 for no role)"""
+        return RoleHelper.get_role_permission_mask(role) if role else 0
+    
     def get_role_specific_data(self, uid: str) -> Optional[Dict[str, Any]]:
         """Get role-specific data for a user"""
         try:
-            data_ref = self.db.collection(self.role_data_collection).document(uid)
-            data_doc = data_ref.get()
+            cached_data = self._role_data_cache.get(uid)
+            if cached_data is MISSING:
+                data_ref = self.db.collection(self.role_data_collection).document(uid)
+                data_doc = data_ref.get()
+                
+                cached_data = data_doc.to_dict() if data_doc.exists else None
+                self._role_data_cache.set(uid, cached_data)
             
-            if data_doc.exists:
-                return data_doc.to_dict()
-            return None
+            # Hand out a copy so callers can't mutate the cached entry
+            return copy.deepcopy(cached_data)
         except Exception as e:
             raise Exception(f"Error getting role-specific data: {str(e)}")
     
@@ -141,6 +196,9 @@ class RoleService:
             data_ref = self.db.collection(self.role_data_collection).document(uid)
             data['updated_at'] = datetime.utcnow()
             data_ref.update(data)
+            
+            # Partial update - drop the entry so the next read sees the merged document
+            self._role_data_cache.pop(uid)
             return True
         except Exception as e:
             raise Exception(f"Error updating role-specific data: {str(e)}")
@@ -170,6 +228,7 @@ class RoleService:
             # Save to database
             data_ref = self.db.collection(self.role_data_collection).document(uid)
             data_ref.set(role_data)
+            self._role_data_cache.set(uid, copy.deepcopy(role_data))
             
         except Exception as e:
             print(f"Error creating role-specific data: {str(e)}")
@@ -199,5 +258,54 @@ class RoleService:
         except Exception as e:
             raise Exception(f"Error getting role statistics: {str(e)}")
 
+    def _set_role_claim(self, uid: str, role: Optional[UserRole], revoke: bool = False):
+        """Mirror the user's role into their custom claims (claims mode only)
+
+        Tokens issued before the change still carry the old claim. When the
+        change takes permissions away (revoke), the user's refresh tokens are
+        revoked, so every worker rejects those tokens the next time it
+        verifies them (see TOKEN_REVOCATION_CHECK_INTERVAL in middleware/auth.py).
+        """
+        if not ROLE_CLAIMS_ENABLED:
+            return
+        
+        self._role_changed_at.set(uid, int(time.time()))
+        
+        try:
+            # Preserve any other custom claims already set on the user
+            user_record = auth.get_user(uid)
+            claims = dict(user_record.custom_claims or {})
+            
+            if role:
+                claims['role'] = role.value
+            else:
+                claims.pop('role', None)
+            
+            auth.set_custom_user_claims(uid, claims)
+        except Exception as e:
+            print(f"Error setting role claim: {str(e)}")
+        
+        if revoke:
+            try:
+                auth.revoke_refresh_tokens(uid)
+            except Exception as e:
+                print(f"Error revoking tokens after role change: {str(e)}")
+    
+    def _loses_permissions(self, old_role: Optional[UserRole], new_role: Optional[UserRole]) -> bool:
+        """Check whether moving from old_role to new_role takes any permission away"""
+        return bool(self._permission_mask(old_role) & ~self._permission_mask(new_role))
+    
+    def invalidate_user(self, uid: str):
+        """Drop cached role and role-specific data for a user"""
+        self._role_cache.pop(uid)
+        self._role_data_cache.pop(uid)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get role cache hit/miss counters"""
+        return {
+            'roles': self._role_cache.stats(),
+            'role_data': self._role_data_cache.stats()
+        }
+
 # Create a singleton instance - Firebase is already initialized by app.py
 role_service = RoleService()
\ No newline at end of file
@@ -0,0 +1,234 @@
+# backend/services/search_service.py
+import copy
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from data.repository import get_backend
+from services.catalog_service import catalog_service
+from utils.cache import MISSING
+from utils.search_index import SearchIndex
+
+# A name match outranks a cuisine match, which outranks a description match
+RESTAURANT_FIELD_WEIGHTS = {'name': 3.0, 'cuisine': 2.0, 'description': 1.0}
+
+# A dish name match outranks a description match, which outranks an ingredient match
+DISH_FIELD_WEIGHTS = {'name': 2.0, 'description': 1.0, 'ingredients': 0.5}
+
+# Values assumed for menu items that don't set a dietary/availability flag
+DISH_FLAG_DEFAULTS = {'is_vegetarian': False, 'is_vegan': False, 'is_available': True}
+
+class SearchService:
+    """Full-text search over restaurants (fed by the live catalog) and menu items
+
+    The dish index is loaded from menu_items once per process. This
+    process's menu item writes update it at once (index_dish / remove_dish);
+    writes made by other processes bump the restaurant's menu_version, and
+    when the catalog listener sees a new version that restaurant's items are
+    read again, so every process follows every menu edit.
+    """
+
+    def __init__(self, db=None, catalog=None):
+        self.db = db if db is not None else get_backend()
+        self.catalog = catalog if catalog is not None else catalog_service
+        self.menu_items_collection = 'menu_items'
+
+        self.restaurant_index = SearchIndex(RESTAURANT_FIELD_WEIGHTS)
+        self._subscribed = False
+        self._subscribe_lock = threading.Lock()
+
+        self.dish_index = SearchIndex(DISH_FIELD_WEIGHTS)
+        self._dishes: Dict[str, Dict[str, Any]] = {}
+        self._dishes_loaded = False
+        # restaurant_id -> menu_version its dishes were last read at
+        self._menu_versions: Dict[str, Any] = {}
+        self._dish_lock = threading.RLock()
+        self._dish_listeners: List[Callable] = []
+
+    # ===== RESTAURANTS =====
+
+    def _ensure_indexed(self):
+        """Build the index from the catalog on first use; it is then updated per change"""
+        if self._subscribed:
+            return
+        with self._subscribe_lock:
+            if not self._subscribed:
+                self.catalog.add_listener(self._on_restaurant_change)
+                self._subscribed = True
+
+    def _on_restaurant_change(self, restaurant_id: str, restaurant_data: Optional[Dict[str, Any]],
+                              card: Optional[Dict[str, Any]]):
+        self._follow_menu_version(restaurant_id, restaurant_data)
+        if card is None:
+            self.restaurant_index.remove(restaurant_id)
+        else:
+            self.restaurant_index.add(restaurant_id, {
+                'name': card['name'],
+                'cuisine': card['cuisine'],
+                'description': card['description']
+            })
+
+    def search_restaurants(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Get one page of restaurant cards matching a query, best match first"""
+        self._ensure_indexed()
+        hits, total = self.restaurant_index.search(query, limit=limit, offset=offset)
+
+        restaurants = []
+        for restaurant_id, score in hits:
+            card = self.catalog.get_restaurant(restaurant_id)
+            if card is not None:
+                card['score'] = round(score, 4)
+                restaurants.append(card)
+
+        return {'restaurants': restaurants, 'total': total}
+
+    def match_restaurant_ids(self, query: str) -> List[str]:
+        """Get the IDs of all restaurants matching a query"""
+        self._ensure_indexed()
+        return list(self.restaurant_index.score(query))
+
+    # ===== DISHES =====
+
+    def _ensure_dishes_loaded(self):
+        """Load every menu item into the dish index once per process"""
+        if self._dishes_loaded:
+            return
+        # Follow menu versions from before the load, so no edit falls in between
+        self._ensure_indexed()
+        with self._dish_lock:
+            if self._dishes_loaded:
+                return
+            for doc in self.db.collection(self.menu_items_collection).stream():
+                self._put_dish(doc.id, doc.to_dict())
+            self._dishes_loaded = True
+            print(f"🍽️  Dish index loaded ({len(self._dishes)} menu items)")
+
+    def _follow_menu_version(self, restaurant_id: str, restaurant_data: Optional[Dict[str, Any]]):
+        """Read a restaurant's menu items again when its menu_version moved"""
+        with self._dish_lock:
+            if restaurant_data is None:
+                self._menu_versions.pop(restaurant_id, None)
+                return
+
+            version = restaurant_data.get('menu_version', 0)
+            previous = self._menu_versions.get(restaurant_id, MISSING)
+            self._menu_versions[restaurant_id] = version
+            # Before the first load there's nothing to update; the load reads the current items
+            if self._dishes_loaded and previous is not MISSING and previous != version:
+                self._reload_restaurant_dishes(restaurant_id)
+
+    def _reload_restaurant_dishes(self, restaurant_id: str):
+        """Replace one restaurant's dishes with what menu_items holds now (call with _dish_lock held)"""
+        query = self.db.collection(self.menu_items_collection).where('restaurant_id', '==', restaurant_id)
+        current = {doc.id: doc.to_dict() for doc in query.stream()}
+
+        stale = [item_id for item_id, dish in self._dishes.items()
+                 if dish.get('restaurant_id') == restaurant_id and item_id not in current]
+        for item_id in stale:
+            self.remove_dish(item_id)
+        for item_id, item_data in current.items():
+            if self._dishes.get(item_id) != dict(item_data, id=item_id):
+                self._put_dish(item_id, item_data)
+
+    def _put_dish(self, item_id: str, item_data: Dict[str, Any]):
+        dish = dict(item_data, id=item_id)
+        self._dishes[item_id] = dish
+        self.dish_index.add(item_id, {
+            'name': dish.get('name'),
+            'description': dish.get('description'),
+            'ingredients': ' '.join(str(ingredient) for ingredient in dish.get('ingredients') or [])
+        })
+        self._notify_dish_listeners(item_id, dish)
+
+    def index_dish(self, item_id: str, item_data: Dict[str, Any]):
+        """Add or replace one menu item after it was written"""
+        with self._dish_lock:
+            # Before the first load there's nothing to update; the load will read it
+            if self._dishes_loaded:
+                self._put_dish(item_id, item_data)
+
+    def remove_dish(self, item_id: str):
+        """Remove one menu item after it was deleted"""
+        with self._dish_lock:
+            if self._dishes.pop(item_id, None) is not None:
+                self.dish_index.remove(item_id)
+                self._notify_dish_listeners(item_id, None)
+
+    def _notify_dish_listeners(self, item_id: str, dish: Optional[Dict[str, Any]]):
+        for listener in self._dish_listeners:
+            try:
+                listener(item_id, dish)
+            except Exception as e:
+                print(f"⚠️  Dish listener failed: {str(e)}")
+
+    def add_dish_listener(self, listener: Callable):
+        """Subscribe to menu item changes as listener(item_id, dish); dish is None on removal
+
+        Like the catalog's listeners, it is first called once for every menu
+        item already loaded.
+        """
+        self._ensure_dishes_loaded()
+        with self._dish_lock:
+            self._dish_listeners.append(listener)
+            for item_id, dish in self._dishes.items():
+                listener(item_id, dish)
+
+    def _dish_matches(self, dish: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        """Check a menu item against dish search filters"""
+        if filters.get('restaurant_id') and dish.get('restaurant_id') != filters['restaurant_id']:
+            return False
+
+        for flag, default in DISH_FLAG_DEFAULTS.items():
+            if filters.get(flag) is not None and bool(dish.get(flag, default)) != filters[flag]:
+                return False
+
+        price = dish.get('price', 0)
+        if filters.get('min_price') is not None and price < filters['min_price']:
+            return False
+        if filters.get('max_price') is not None and price > filters['max_price']:
+            return False
+
+        excluded = filters.get('exclude_allergens')
+        if excluded:
+            allergens = {str(allergen).strip().lower() for allergen in dish.get('allergens') or []}
+            if allergens & excluded:
+                return False
+
+        return True
+
+    def search_dishes(self, query: str, filters: Dict[str, Any] = None, limit: Optional[int] = 20,
+                      offset: int = 0, with_restaurants: bool = True) -> Dict[str, Any]:
+        """Get one page of menu items matching a query across all restaurants, best match first
+
+        Filters: restaurant_id, is_vegetarian, is_vegan, is_available,
+        min_price, max_price and exclude_allergens (a set of lowercase names).
+        With with_restaurants, each item carries its restaurant card and items
+        of restaurants missing from the catalog are left out.
+        """
+        self._ensure_dishes_loaded()
+        filters = filters or {}
+
+        with self._dish_lock:
+            def accept(item_id):
+                dish = self._dishes[item_id]
+                if with_restaurants and not self.catalog.has_restaurant(dish.get('restaurant_id')):
+                    return False
+                return self._dish_matches(dish, filters)
+
+            hits, total = self.dish_index.search(query, limit=limit, offset=offset, accept=accept)
+            dishes = [dict(copy.deepcopy(self._dishes[item_id]), score=round(score, 4)) for item_id, score in hits]
+
+        if with_restaurants:
+            for dish in dishes:
+                dish['restaurant'] = self.catalog.get_restaurant(dish.get('restaurant_id'))
+
+        return {'dishes': dishes, 'total': total}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index sizes"""
+        return {
+            'restaurants': len(self.restaurant_index),
+            'dishes': len(self.dish_index),
+            'dishes_loaded': self._dishes_loaded
+        }
+
+# Create a singleton instance
+search_service = SearchService()
@@ -1,10 +1,11 @@
 from firebase_admin import firestore, auth
-from config.firebase import get_db, get_auth
+from config.firebase import get_auth
+from data.repository import get_backend
 from utils.validators import validate_user_data, validate_password
 
 class UserService:
-    def __init__(self):
-        self.db = get_db()
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_backend()
         self.collection = 'users'
     
     def get_all_users(self):
@@ -0,0 +1,73 @@
+# backend/tests/conftest.py
+import os
+import time
+from collections import Counter
+
+# Services create their singletons at import: keep them off Firestore
+os.environ.setdefault('DATA_BACKEND', 'memory')
+
+import pytest
+from data.memory_store import MemoryClient
+from data.repository import set_backend
+
+
+class CountingMemoryClient(MemoryClient):
+    """In-memory backend that counts document reads per collection"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = Counter()
+
+    def _read(self, reference):
+        self.reads[reference._collection_path] += 1
+        return super()._read(reference)
+
+
+class FakeTokenVerifier:
+    """Stands in for firebase_admin.auth: maps raw tokens to claims and counts verifications"""
+
+    def __init__(self, tokens=None):
+        self.tokens = dict(tokens or {})
+        self.calls = 0
+
+    def verify_id_token(self, id_token, check_revoked=False):
+        self.calls += 1
+        if id_token not in self.tokens:
+            raise ValueError("Invalid ID token")
+        return dict(self.tokens[id_token])
+
+
+@pytest.fixture
+def db():
+    client = CountingMemoryClient()
+    set_backend(client)
+    yield client
+    set_backend(None)
+
+
+@pytest.fixture
+def customer_client(db, monkeypatch):
+    """Test client for the customer blueprint on the memory backend, signed in as customer c1
+
+    Send headers={'Authorization': 'Bearer customer-token'}.
+    """
+    import routes.customer as customer_routes
+    import services.role_service as role_service_module
+    from flask import Flask
+    from config.firebase import set_token_verifier
+    from middleware import auth
+    from services.customer_service import CustomerService
+    from services.role_service import RoleService
+
+    now = int(time.time())
+    set_token_verifier(FakeTokenVerifier({'customer-token': {'uid': 'c1', 'sub': 'c1', 'iat': now, 'exp': now + 3600}}))
+    auth.token_cache.clear()
+    db.collection('user_roles').document('c1').set({'role': 'customer', 'is_active': True})
+    monkeypatch.setattr(role_service_module, 'role_service', RoleService(db=db))
+    monkeypatch.setattr(customer_routes, 'customer_service', CustomerService(db=db))
+
+    app = Flask(__name__)
+    app.register_blueprint(customer_routes.customer_bp)
+    yield app.test_client()
+    set_token_verifier(None)
+    auth.token_cache.clear()
@@ -0,0 +1,121 @@
+# backend/tests/test_auth_context.py
+import time
+
+import pytest
+from flask import Flask, g, jsonify
+
+import services.role_service as role_service_module
+from config.firebase import set_token_verifier
+from middleware import auth
+from middleware.auth import get_current_user_id, get_current_user_role, require_permission, require_role
+from models.roles import Permission, UserRole
+from services.role_service import RoleService
+
+from tests.conftest import FakeTokenVerifier
+
+
+def _claims(uid):
+    now = int(time.time())
+    return {'uid': uid, 'sub': uid, 'iat': now, 'exp': now + 3600}
+
+
+@pytest.fixture
+def verifier():
+    verifier = FakeTokenVerifier({
+        'customer-token': _claims('customer-1'),
+        'agent-token': _claims('agent-1')
+    })
+    set_token_verifier(verifier)
+    auth.token_cache.clear()
+    yield verifier
+    set_token_verifier(None)
+    auth.token_cache.clear()
+
+
+@pytest.fixture
+def roles(db, monkeypatch):
+    service = RoleService(db=db)
+    db.collection('user_roles').document('customer-1').set({'role': 'customer', 'is_active': True})
+    db.collection('user_roles').document('agent-1').set({'role': 'agent', 'is_active': True})
+    db.reads.clear()
+    # AuthContext resolves roles through the module-level singleton
+    monkeypatch.setattr(role_service_module, 'role_service', service)
+    return service
+
+
+@pytest.fixture
+def client(verifier, roles):
+    app = Flask(__name__)
+
+    @app.route('/orders')
+    @require_role(UserRole.CUSTOMER, UserRole.ADMIN)
+    @require_permission(Permission.PLACE_ORDER, Permission.VIEW_ORDER_HISTORY)
+    def orders():
+        # Helpers read the same context as the decorators
+        return jsonify({
+            'uid': get_current_user_id(),
+            'role': get_current_user_role().value,
+            'verifications': g.auth_context.verifications,
+            'role_lookups': g.auth_context.role_lookups
+        })
+
+    return app.test_client()
+
+
+def _get(client, token=None):
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return client.get('/orders', headers=headers)
+
+
+def test_stacked_decorators_verify_and_resolve_once(client, verifier, db):
+    response = _get(client, 'customer-token')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['uid'] == 'customer-1'
+    assert body['role'] == 'customer'
+    assert body['verifications'] == 1
+    assert body['role_lookups'] == 1
+    assert verifier.calls == 1
+    assert db.reads['user_roles'] == 1
+
+
+def test_repeat_requests_are_served_from_caches(client, verifier, db):
+    for _ in range(5):
+        assert _get(client, 'customer-token').status_code == 200
+
+    # One verification for the token, one user_roles read for the user
+    assert verifier.calls == 1
+    assert db.reads['user_roles'] == 1
+
+
+def test_wrong_role_is_refused_after_one_verification_and_one_read(client, verifier, db):
+    response = _get(client, 'agent-token')
+
+    assert response.status_code == 403
+    assert verifier.calls == 1
+    assert db.reads['user_roles'] == 1
+
+
+def test_missing_token_costs_nothing(client, verifier, db):
+    response = _get(client)
+
+    assert response.status_code == 401
+    assert verifier.calls == 0
+    assert sum(db.reads.values()) == 0
+
+
+def test_invalid_token_is_verified_once_and_never_reads_roles(client, verifier, db):
+    response = _get(client, 'forged-token')
+
+    assert response.status_code == 401
+    assert verifier.calls == 1
+    assert db.reads['user_roles'] == 0
+
+
+def test_cached_claims_are_handed_out_as_copies(verifier):
+    claims = auth.verify_token('customer-token')
+    claims['uid'] = 'someone-else'
+
+    assert auth.verify_token('customer-token')['uid'] == 'customer-1'
+    assert verifier.calls == 1
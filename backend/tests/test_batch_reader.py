@@ -0,0 +1,108 @@
+# backend/tests/test_batch_reader.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.batch_reader import BatchReader
+from services.agent_service import AgentService
+from services.customer_service import CustomerService
+
+NOON = datetime(2026, 10, 1, 12, 0)
+
+
+@pytest.fixture
+def get_all_calls(db, monkeypatch):
+    calls = []
+    get_all = db.get_all
+
+    def counting_get_all(references, *args, **kwargs):
+        references = list(references)
+        calls.append(sorted(reference.path for reference in references))
+        return get_all(references, *args, **kwargs)
+
+    monkeypatch.setattr(db, 'get_all', counting_get_all)
+    return calls
+
+
+@pytest.fixture
+def restaurants(db):
+    for restaurant_id, name in (('r1', 'Spice Garden'), ('r2', 'Pasta Bar'), ('r3', 'Taco Stand')):
+        db.collection('restaurants').document(restaurant_id).set({'name': name, 'is_active': True})
+    db.reads.clear()
+
+
+def test_references_are_deduplicated_into_one_round_trip(db, restaurants, get_all_calls):
+    reader = BatchReader(db)
+    for restaurant_id in ('r1', 'r2', 'r1', None, '', 'gone'):
+        reader.add('restaurants', restaurant_id)
+    reader.fetch()
+
+    assert get_all_calls == [['restaurants/gone', 'restaurants/r1', 'restaurants/r2']]
+    assert reader.get('restaurants', 'r2') == {'name': 'Pasta Bar', 'is_active': True}
+    assert reader.get('restaurants', 'gone') is None
+    assert reader.get('restaurants', None) is None
+    # Never queued, so never read
+    assert reader.get('restaurants', 'r3') is None
+
+
+def test_later_fetches_only_read_new_references(db, restaurants, get_all_calls):
+    reader = BatchReader(db).add('restaurants', 'r1').fetch()
+    reader.fetch()
+    reader.add('restaurants', 'r1').add('restaurants', 'r3').fetch()
+
+    assert get_all_calls == [['restaurants/r1'], ['restaurants/r3']]
+    assert reader.round_trips == 2
+    assert reader.get('restaurants', 'r3')['name'] == 'Taco Stand'
+
+
+def test_available_orders_read_only_the_page_restaurants_once(db, restaurants, get_all_calls):
+    orders = db.collection('orders')
+    for i in range(6):
+        # The two newest orders, which fall off the page, are the only ones from r3
+        restaurant_id = 'r3' if i >= 4 else ('r1', 'r2')[i % 2]
+        orders.document(f'o{i}').set({'status': 'confirmed', 'restaurant_id': restaurant_id,
+                                      'created_at': NOON + timedelta(minutes=i), 'total_amount': 20})
+    orders.document('taken').set({'status': 'ready', 'agent_id': 'a2', 'restaurant_id': 'r3', 'created_at': NOON})
+
+    available = AgentService(db=db).get_available_orders(limit=4)
+
+    assert [order['id'] for order in available] == ['o0', 'o1', 'o2', 'o3']
+    assert [order['restaurant']['name'] for order in available] == ['Spice Garden', 'Pasta Bar'] * 2
+    assert get_all_calls == [['restaurants/r1', 'restaurants/r2']]
+    assert db.reads['restaurants'] == 2
+
+
+def test_active_orders_fall_back_to_customers_in_a_second_batch(db, restaurants, get_all_calls):
+    db.collection('users').document('u1').set({'name': 'Ana', 'phone': '555-0101'})
+    db.collection('customers').document('u2').set({'name': 'Ben', 'email': 'ben@example.com'})
+    orders = db.collection('orders')
+    orders.document('o1').set({'agent_id': 'a1', 'status': 'picked_up', 'restaurant_id': 'r1', 'customer_id': 'u1',
+                               'assigned_at': NOON})
+    orders.document('o2').set({'agent_id': 'a1', 'status': 'on_way', 'restaurant_id': 'r2', 'customer_id': 'u2',
+                               'assigned_at': NOON + timedelta(minutes=1)})
+    orders.document('o3').set({'agent_id': 'a1', 'status': 'assigned_to_agent', 'restaurant_id': 'r1',
+                               'customer_id': 'u3', 'customer_name': 'Cleo', 'assigned_at': NOON + timedelta(minutes=2)})
+
+    active = AgentService(db=db).get_agent_active_orders('a1')
+
+    assert [(order['id'], order['customer']['name'], order['restaurant']['name']) for order in active] == [
+        ('o1', 'Ana', 'Spice Garden'), ('o2', 'Ben', 'Pasta Bar'), ('o3', 'Cleo', 'Spice Garden')
+    ]
+    assert active[1]['customer']['email'] == 'ben@example.com'
+    # o3 carries its own customer info, so u3 is never looked up
+    assert get_all_calls == [
+        ['restaurants/r1', 'restaurants/r2', 'users/u1', 'users/u2'],
+        ['customers/u2']
+    ]
+
+
+def test_favorites_are_read_in_one_batch_and_skip_deleted_restaurants(db, restaurants, get_all_calls):
+    customers = CustomerService(db=db)
+    favorites = db.collection(customers.favorites_collection)
+    for restaurant_id in ('r2', 'gone', 'r1'):
+        favorites.add({'customer_id': 'c1', 'restaurant_id': restaurant_id})
+
+    names = sorted(restaurant['name'] for restaurant in customers.get_favorite_restaurants('c1'))
+
+    assert names == ['Pasta Bar', 'Spice Garden']
+    assert get_all_calls == [['restaurants/gone', 'restaurants/r1', 'restaurants/r2']]
@@ -0,0 +1,49 @@
+# backend/tests/test_cart_changes.py
+import threading
+
+import pytest
+
+from services.cart_store import CartStore
+from services.customer_service import CustomerService
+
+RESTAURANT = {'id': 'r1', 'name': 'Spice Garden'}
+
+
+@pytest.fixture
+def customers(db):
+    return CustomerService(db=db, carts=CartStore(db=db, flush_interval=60))
+
+
+def _item(item_id, quantity=1):
+    return {'id': item_id, 'name': item_id.title(), 'price': 5.0, 'quantity': quantity}
+
+
+def test_concurrent_adds_are_all_kept(customers):
+    def add(item_id):
+        for _ in range(20):
+            customers.add_item_to_cart('c1', 'r1', RESTAURANT, _item(item_id))
+
+    threads = [threading.Thread(target=add, args=(f'item-{i}',)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cart = customers.get_pending_cart('c1')
+    assert sorted(item['quantity'] for item in cart['items']) == [20] * 8
+    assert cart['version'] == 160
+
+
+def test_every_legacy_change_bumps_the_version_once(customers):
+    created = customers.add_item_to_cart('c1', 'r1', RESTAURANT, _item('naan', 2))
+    assert created['version'] == 1
+
+    assert customers.update_cart_item_quantity('c1', 'naan', 5)['version'] == 2
+    synced = customers.sync_cart_items('c1', [_item('naan', 5), _item('dal')], RESTAURANT)
+    assert synced['version'] == 3
+    assert synced['created_at'] == created['created_at']
+
+    emptied = customers.update_cart_item_quantity('c1', 'naan', 0)
+    emptied = customers.remove_item_from_cart('c1', 'dal')
+    assert emptied['version'] == 5
+    assert emptied['items'] == [] and emptied['restaurant_id'] is None
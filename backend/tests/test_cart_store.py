@@ -0,0 +1,37 @@
+# backend/tests/test_cart_store.py
+import time
+
+from services.cart_store import CartStore
+
+
+def test_cached_carts_expire_so_other_workers_changes_show_up(db):
+    first = CartStore(db=db, flush_interval=0, cache_ttl=0.05)
+    second = CartStore(db=db, flush_interval=0, cache_ttl=0.05)
+    first.put('c1', {'items': [], 'version': 1})
+    assert second.get('c1')['version'] == 1
+
+    first.put('c1', {'items': [], 'version': 2})
+    assert second.get('c1')['version'] == 1
+    time.sleep(0.1)
+    assert second.get('c1')['version'] == 2
+    assert second.reads == 2
+
+
+def test_unwritten_changes_outlive_the_cache(db):
+    store = CartStore(db=db, flush_interval=60, cache_ttl=0.01)
+    store.put('c1', {'items': [], 'version': 1})
+    time.sleep(0.05)
+
+    assert store.get('c1')['version'] == 1
+    assert store.reads == 0
+    assert not db.collection('pending_carts').document('c1').get().exists
+    store.flush()
+    assert db.collection('pending_carts').document('c1').get().to_dict()['version'] == 1
+
+
+def test_zero_ttl_reads_every_written_cart(db):
+    store = CartStore(db=db, flush_interval=0, cache_ttl=0)
+    store.put('c1', {'items': [], 'version': 1})
+    for _ in range(3):
+        assert store.get('c1')['version'] == 1
+    assert store.reads == 3
@@ -0,0 +1,114 @@
+# backend/tests/test_catalog.py
+import pytest
+
+from data.memory_store import MemoryQuery
+from services.catalog_service import CatalogService
+from services.customer_service import CustomerService
+
+
+@pytest.fixture
+def restaurants(db):
+    restaurants = db.collection('restaurants')
+    restaurants.document('r1').set({'name': 'Spice Garden', 'cuisine_type': 'Indian', 'rating': 4.5})
+    restaurants.document('r2').set({'name': 'Curry Corner', 'cuisine_type': 'Indian', 'rating': 4.1})
+    restaurants.document('r3').set({'name': 'Pasta Bar', 'cuisine': 'Italian', 'rating': 4.8})
+    restaurants.document('r4').set({'name': 'Mystery Kitchen'})
+    return restaurants
+
+
+@pytest.fixture
+def catalog(db, restaurants):
+    catalog = CatalogService(db=db, load_timeout=1)
+    yield catalog
+    catalog.stop()
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Paths of the queries run from here on"""
+    paths = []
+    run = MemoryQuery._run
+
+    def counting_run(query):
+        paths.append(query._path)
+        return run(query)
+
+    monkeypatch.setattr(MemoryQuery, '_run', counting_run)
+    return paths
+
+
+def test_browsing_reads_the_catalog_not_firestore(db, catalog, queries):
+    customers = CustomerService(db=db, catalog=catalog)
+    catalog.start()
+    db.reads.clear()
+    queries.clear()
+
+    listing = customers.get_available_restaurants()
+    assert [restaurant['id'] for restaurant in listing['restaurants']] == ['r3', 'r1', 'r2', 'r4']
+    assert customers.get_restaurant_details('r2')['name'] == 'Curry Corner'
+    assert customers.get_cuisine_types() == ['Indian', 'Italian']
+
+    assert queries == [] and sum(db.reads.values()) == 0
+
+
+def test_changes_reach_cards_and_cuisine_counts(catalog, restaurants):
+    assert catalog.get_cuisine_types() == ['Indian', 'Italian']
+
+    restaurants.document('r1').update({'cuisine_type': 'Thai', 'name': 'Thai Garden'})
+    assert catalog.get_cuisine_types() == ['Indian', 'Italian', 'Thai']
+    assert catalog.get_restaurant('r1')['name'] == 'Thai Garden'
+
+    # Indian stays listed until its last restaurant goes
+    restaurants.document('r2').delete()
+    restaurants.document('r3').update({'cuisine': None})
+    assert catalog.get_cuisine_types() == ['Thai']
+    assert catalog.get_restaurant('r2') is None and not catalog.has_restaurant('r2')
+    assert catalog.get_stats()['restaurants'] == 3
+
+
+def test_cards_handed_out_are_copies(catalog):
+    card = catalog.get_restaurant('r1')
+    card['name'] = 'Changed'
+    catalog.get_restaurants()[0]['name'] = 'Changed'
+    catalog.get_restaurant_data('r1')['name'] = 'Changed'
+
+    assert catalog.get_restaurant('r1')['name'] == 'Spice Garden'
+    assert catalog.get_restaurants()[0]['name'] == 'Pasta Bar'
+    assert catalog.get_restaurant_data('r1')['name'] == 'Spice Garden'
+
+
+def test_new_listeners_replay_the_catalog_then_follow_changes(catalog, restaurants):
+    seen = []
+    catalog.add_listener(lambda restaurant_id, data, card: seen.append((restaurant_id, card and card['name'])))
+    assert sorted(seen) == [('r1', 'Spice Garden'), ('r2', 'Curry Corner'), ('r3', 'Pasta Bar'),
+                            ('r4', 'Mystery Kitchen')]
+
+    seen.clear()
+    restaurants.document('r5').set({'name': 'Taco Stand'})
+    restaurants.document('r4').delete()
+    assert seen == [('r5', 'Taco Stand'), ('r4', None)]
+
+
+def test_a_failing_listener_does_not_stop_the_catalog(catalog, restaurants, capsys):
+    def broken(restaurant_id, data, card):
+        if restaurant_id == 'r5':
+            raise RuntimeError("boom")
+
+    seen = []
+    catalog.add_listener(broken)
+    catalog.add_listener(lambda restaurant_id, data, card: seen.append(restaurant_id))
+    seen.clear()
+    restaurants.document('r5').set({'name': 'Taco Stand'})
+
+    assert seen == ['r5'] and catalog.has_restaurant('r5')
+    assert 'Catalog listener failed: boom' in capsys.readouterr().out
+
+
+def test_restaurants_the_catalog_has_not_seen_are_read_directly(db, catalog, restaurants, monkeypatch):
+    monkeypatch.setattr(catalog, 'get_restaurant', lambda restaurant_id: None)
+    customers = CustomerService(db=db, catalog=catalog)
+
+    assert customers.get_restaurant_details('r1')['name'] == 'Spice Garden'
+    assert db.reads['restaurants'] == 1
+    with pytest.raises(Exception, match='Restaurant not found'):
+        customers.get_restaurant_details('missing')
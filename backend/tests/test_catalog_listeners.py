@@ -0,0 +1,72 @@
+# backend/tests/test_catalog_listeners.py
+import threading
+
+import pytest
+
+from services.autocomplete_service import AutocompleteService
+from services.catalog_service import CatalogService
+from services.search_service import SearchService
+
+
+def _held_elsewhere(lock) -> bool:
+    """Check from another thread whether a lock is currently held"""
+    result = []
+
+    def probe():
+        acquired = lock.acquire(timeout=0.5)
+        if acquired:
+            lock.release()
+        result.append(not acquired)
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+@pytest.fixture
+def services(db):
+    db.collection('restaurants').document('r1').set({'name': 'Spice Garden', 'cuisine_type': 'Indian', 'is_active': True})
+    db.collection('menu_items').document('m1').set({'restaurant_id': 'r1', 'name': 'Chicken Biryani', 'price': 12.5})
+    catalog = CatalogService(db=db, load_timeout=1)
+    search = SearchService(db=db, catalog=catalog)
+    yield catalog, search, AutocompleteService(catalog=catalog, search=search)
+    catalog.stop()
+
+
+def test_listeners_run_without_the_catalog_lock(services, db):
+    catalog, _, _ = services
+    seen = []
+    catalog.add_listener(lambda restaurant_id, data, card: seen.append((restaurant_id, _held_elsewhere(catalog._lock))))
+
+    db.collection('restaurants').document('r2').set({'name': 'Pasta Bar', 'is_active': True})
+
+    assert seen == [('r1', False), ('r2', False)]
+
+
+def test_suggestions_search_and_catalog_changes_do_not_deadlock(services, db):
+    catalog, search, autocomplete = services
+    errors = []
+
+    def run(task):
+        try:
+            for i in range(30):
+                task(i)
+        except Exception as e:
+            errors.append(e)
+
+    tasks = [
+        lambda i: autocomplete.suggest('sp'),
+        lambda i: search.search_dishes('biryani'),
+        lambda i: db.collection('restaurants').document(f'x{i}').set({'name': f'Spot {i}', 'is_active': True}),
+        lambda i: search.index_dish(f'd{i}', {'restaurant_id': 'r1', 'name': f'Spicy Dish {i}'})
+    ]
+    threads = [threading.Thread(target=run, args=(task,), daemon=True) for task in tasks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert errors == []
+    assert autocomplete.suggest('spot', limit=50)['restaurants']
@@ -0,0 +1,51 @@
+# backend/tests/test_content_versions.py
+import pytest
+
+from services.catalog_service import CatalogService
+from services.customer_service import CustomerService
+
+
+def _catalog(db):
+    catalog = CatalogService(db=db, load_timeout=1)
+    catalog.start()
+    return catalog
+
+
+@pytest.fixture
+def restaurants(db):
+    db.collection('restaurants').document('r1').set({'name': 'Spice Garden', 'cuisine_type': 'Indian', 'menu_version': 0})
+    db.collection('restaurants').document('r2').set({'name': 'Pasta Bar', 'cuisine_type': 'Italian', 'menu_version': 0})
+    db.collection('menu_categories').document('c1').set({'restaurant_id': 'r1', 'name': 'Mains', 'is_active': True})
+    db.collection('menu_items').document('m1').set({'restaurant_id': 'r1', 'category_id': 'c1', 'name': 'Biryani',
+                                                    'price': 12.5, 'is_available': True})
+    return db.collection('restaurants')
+
+
+def test_workers_with_different_histories_agree_on_versions(db, restaurants):
+    first = _catalog(db)
+    # The first worker sees a change and its revert; a worker started later sees neither
+    restaurants.document('r2').update({'name': 'Pasta Place'})
+    restaurants.document('r2').update({'name': 'Pasta Bar'})
+    second = _catalog(db)
+
+    assert first.version != second.version
+    assert first.get_catalog_digest() == second.get_catalog_digest()
+    assert first.get_digest('r2') == second.get_digest('r2')
+
+    menus = [CustomerService(db=db, catalog=catalog) for catalog in (first, second)]
+    assert menus[0].get_menu_version('r1') == menus[1].get_menu_version('r1')
+
+
+def test_versions_follow_the_content(db, restaurants):
+    catalog = _catalog(db)
+    customers = CustomerService(db=db, catalog=catalog)
+    listing, details, menu = customers.get_catalog_version(), customers.get_restaurant_version('r1'), customers.get_menu_version('r1')
+
+    restaurants.document('r2').update({'rating': 4.8})
+    assert customers.get_catalog_version() != listing
+    assert customers.get_restaurant_version('r1') == details
+
+    db.collection('menu_items').document('m1').update({'price': 13.0})
+    restaurants.document('r1').update({'menu_version': 1})
+    assert customers.get_menu_version('r1') != menu
+    assert customers.get_restaurant_version('r1') != details
@@ -0,0 +1,143 @@
+# backend/tests/test_delivery_areas.py
+import math
+import random
+
+import pytest
+
+from services.catalog_service import CatalogService
+from services.delivery_area_service import DEFAULT_DELIVERY_RADIUS, DeliveryAreaService
+from utils.geo import MILES_PER_DEGREE_LATITUDE, GridIndex, haversine_distance, parse_coordinates
+
+AUTH = {'Authorization': 'Bearer customer-token'}
+
+
+def _east(lat, lng, miles):
+    """A point roughly miles east of (lat, lng)"""
+    return lat, lng + miles / (MILES_PER_DEGREE_LATITUDE * math.cos(math.radians(lat)))
+
+
+def _brute_force(points, lat, lng):
+    matches = [(point_id, haversine_distance(lat, lng, p_lat, p_lng))
+               for point_id, (p_lat, p_lng, radius) in points.items()]
+    return sorted(((point_id, d) for point_id, d in matches if d <= points[point_id][2]),
+                  key=lambda match: (match[1], match[0]))
+
+
+def test_points_across_a_cell_edge_are_found():
+    index = GridIndex(cell_miles=5)
+    edge = index.cell_degrees * 100
+    # The restaurant sits just inside one cell, the customers just across the edge
+    index.put('r1', edge + 1e-6, 10.0, 3.0)
+
+    near = index.covering(edge - 2.9 / MILES_PER_DEGREE_LATITUDE, 10.0)
+    far = index.covering(edge - 3.1 / MILES_PER_DEGREE_LATITUDE, 10.0)
+
+    assert [point_id for point_id, _ in near] == ['r1']
+    assert near[0][1] == pytest.approx(2.9, abs=0.05)
+    assert far == []
+
+
+def test_radii_wider_than_a_cell_reach_several_cells_away():
+    index = GridIndex(cell_miles=2)
+    index.put('wide', 40.0, -74.0, 9.0)
+    index.put('narrow', 40.0, -74.0, 1.0)
+
+    assert [point_id for point_id, _ in index.covering(*_east(40.0, -74.0, 8.5))] == ['wide']
+    assert index.covering(*_east(40.0, -74.0, 9.5)) == []
+
+
+@pytest.mark.parametrize('lat', [60.0, 70.0, 78.0, -75.0, 89.5])
+def test_radius_filter_at_high_latitude(lat):
+    # A degree of longitude is only a few miles wide here, so a few miles east spans many cells
+    index = GridIndex(cell_miles=5)
+    index.put('r1', lat, 20.0, 5.0)
+
+    inside = index.covering(*_east(lat, 20.0, 4.8))
+    assert [point_id for point_id, _ in inside] == ['r1']
+    assert inside[0][1] == pytest.approx(4.8, abs=0.1)
+    assert index.covering(*_east(lat, 20.0, 5.3)) == []
+
+
+def test_covering_matches_a_brute_force_scan():
+    rng = random.Random(3)
+    index = GridIndex(cell_miles=5)
+    points = {}
+    for i in range(400):
+        lat = rng.choice([0.0, 45.0, 70.0]) + rng.uniform(-0.5, 0.5)
+        lng = rng.uniform(-0.5, 0.5)
+        points[f'r{i}'] = (lat, lng, rng.choice([2.0, 5.0, 12.0]))
+        index.put(f'r{i}', *points[f'r{i}'])
+
+    for _ in range(200):
+        lat = rng.choice([0.0, 45.0, 70.0]) + rng.uniform(-0.6, 0.6)
+        lng = rng.uniform(-0.6, 0.6)
+        assert index.covering(lat, lng) == _brute_force(points, lat, lng)
+
+
+def test_moved_and_removed_points_leave_their_old_cells():
+    index = GridIndex(cell_miles=5)
+    index.put('r1', 40.0, -74.0, 3.0)
+    index.put('r1', 41.0, -74.0, 3.0)
+    assert index.covering(40.0, -74.0) == []
+    assert [point_id for point_id, _ in index.covering(41.0, -74.0)] == ['r1']
+
+    index.remove('r1')
+    index.remove('r1')
+    assert len(index) == 0 and index.covering(41.0, -74.0) == []
+
+
+@pytest.fixture
+def areas(db):
+    restaurants = db.collection('restaurants')
+    restaurants.document('r1').set({'name': 'Near', 'is_active': True, 'location': {'lat': 40.0, 'lng': -74.0},
+                                    'settings': {'delivery_radius': 2}})
+    restaurants.document('r2').set({'name': 'Default radius', 'is_active': True,
+                                    'location': {'lat': 40.0, 'lng': -74.05}})
+    restaurants.document('r3').set({'name': 'Not located', 'is_active': True})
+    catalog = CatalogService(db=db, load_timeout=1)
+    yield DeliveryAreaService(catalog=catalog)
+    catalog.stop()
+
+
+def test_restaurants_delivering_to_follow_the_catalog(db, areas):
+    found = areas.restaurants_delivering_to(40.0, -74.01)
+    assert [restaurant_id for restaurant_id, _ in found] == ['r1', 'r2']
+    assert DEFAULT_DELIVERY_RADIUS > found[1][1] > 2
+
+    db.collection('restaurants').document('r1').update({'settings': {'delivery_radius': 0.1}})
+    db.collection('restaurants').document('r3').update({'location': {'lat': 40.0, 'lng': -74.011}})
+    assert [restaurant_id for restaurant_id, _ in areas.restaurants_delivering_to(40.0, -74.01)] == ['r3', 'r2']
+
+
+@pytest.mark.parametrize('lat, lng', [('abc', '10'), ('91', '10'), ('10', '-181'), ('nan', '10'), ('inf', '0')])
+def test_bad_coordinates_are_value_errors(lat, lng):
+    with pytest.raises(ValueError):
+        parse_coordinates(lat, lng)
+
+
+@pytest.fixture
+def address(db):
+    db.collection('customer_addresses').document('a1').set({
+        'customer_id': 'c1', 'address_line_1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'
+    })
+
+
+@pytest.mark.parametrize('coordinates', [{'latitude': 'north', 'longitude': 10}, {'latitude': 95, 'longitude': 10}])
+def test_bad_address_coordinates_are_a_bad_request(db, customer_client, address, coordinates):
+    update = customer_client.put('/api/customer/addresses/a1', headers=AUTH, json={'city': 'Chicago', **coordinates})
+    added = customer_client.post('/api/customer/addresses', headers=AUTH, json={
+        'receiver_name': 'Sam', 'address_line_1': '2 Main St', 'city': 'Springfield', 'state': 'IL',
+        'zip_code': '62701', **coordinates
+    })
+
+    assert (update.status_code, added.status_code) == (400, 400)
+    assert update.get_json()['success'] is False
+    assert db.collection('customer_addresses').document('a1').get().to_dict()['city'] == 'Springfield'
+
+
+def test_good_address_coordinates_locate_the_address(db, customer_client, address):
+    response = customer_client.put('/api/customer/addresses/a1', headers=AUTH,
+                                   json={'city': 'Chicago', 'latitude': '41.88', 'longitude': '-87.63'})
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['location'] == {'lat': 41.88, 'lng': -87.63}
@@ -0,0 +1,62 @@
+# backend/tests/test_dish_search.py
+import pytest
+from firebase_admin import firestore
+
+from services.catalog_service import CatalogService
+from services.restaurant_service import RestaurantService
+from services.search_service import SearchService
+
+
+@pytest.fixture
+def workers(db):
+    """Two processes' worth of catalog and search services over one database"""
+    db.collection('restaurants').document('r1').set({'name': 'Spice Garden', 'cuisine_type': 'Indian', 'is_active': True})
+    db.collection('menu_items').document('m1').set({'restaurant_id': 'r1', 'name': 'Chicken Biryani', 'price': 12.5})
+    db.collection('menu_items').document('m2').set({'restaurant_id': 'r1', 'name': 'Garlic Naan', 'price': 3})
+    catalogs = [CatalogService(db=db, load_timeout=1) for _ in range(2)]
+    yield [SearchService(db=db, catalog=catalog) for catalog in catalogs]
+    for catalog in catalogs:
+        catalog.stop()
+
+
+def _menu_write(db, write):
+    """Write menu items the way another worker's RestaurantService does"""
+    write(db.collection('menu_items'))
+    db.collection('restaurants').document('r1').update({'menu_version': firestore.Increment(1)})
+
+
+def _found(search, query):
+    return {dish['id']: dish for dish in search.search_dishes(query)['dishes']}
+
+
+def test_a_worker_sees_menu_edits_made_by_another(db, workers):
+    writer, reader = workers
+    for search in workers:
+        assert set(_found(search, 'biryani')) == {'m1'}
+
+    _menu_write(db, lambda items: items.document('m1').update({'price': 14, 'is_available': False}))
+    _menu_write(db, lambda items: items.document('m2').delete())
+    _menu_write(db, lambda items: items.document('m3').set({'restaurant_id': 'r1', 'name': 'Mutton Biryani', 'price': 16}))
+
+    found = _found(reader, 'biryani')
+    assert set(found) == {'m1', 'm3'}
+    assert (found['m1']['price'], found['m1']['is_available']) == (14, False)
+    assert _found(reader, 'naan') == {}
+    assert reader.search_dishes('biryani', {'is_available': True})['total'] == 1
+
+
+def test_an_edit_before_the_first_search_is_not_missed(db, workers):
+    _, reader = workers
+    _menu_write(db, lambda items: items.document('m1').update({'name': 'Chicken Pulao'}))
+
+    assert _found(reader, 'biryani') == {}
+    assert set(_found(reader, 'pulao')) == {'m1'}
+
+
+def test_owner_menu_search_reads_the_stored_items(db, workers):
+    db.collection('menu_items').document('m3').set({'restaurant_id': 'r1', 'name': 'Veg Biryani', 'price': 9})
+    db.collection('menu_items').document('x1').set({'restaurant_id': 'r2', 'name': 'Egg Biryani', 'price': 8})
+
+    found = RestaurantService(db=db).search_menu_items('r1', 'biryani')
+
+    assert {item['id'] for item in found} == {'m1', 'm3'}
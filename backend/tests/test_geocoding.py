@@ -0,0 +1,48 @@
+# backend/tests/test_geocoding.py
+import pytest
+
+import services.geocoding_service as geocoding_service
+from services.geocoding_service import Geocoder, LocalGeocoder, locate_address, set_geocoder
+from services.restaurant_service import RestaurantService
+
+ADDRESS = {'address_line_1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'zip_code': '62701'}
+
+
+@pytest.fixture
+def no_geocoder(monkeypatch):
+    monkeypatch.setattr(geocoding_service, '_geocoder', None)
+    monkeypatch.setattr(geocoding_service, '_geocoder_configured', True)
+
+
+def test_geocoder_is_abstract():
+    with pytest.raises(TypeError):
+        Geocoder()
+
+
+def test_without_a_geocoder_only_sent_coordinates_are_used(no_geocoder):
+    assert locate_address(ADDRESS) is None
+    assert locate_address({**ADDRESS, 'latitude': '39.8', 'longitude': '-89.6'}) == {'lat': 39.8, 'lng': -89.6}
+
+
+def test_local_geocoder_only_invents_points_when_synthetic():
+    centroids = {'62701': (39.8, -89.6)}
+    assert LocalGeocoder(centroids).geocode(ADDRESS) == (39.8, -89.6)
+    assert LocalGeocoder(centroids).geocode({**ADDRESS, 'zip_code': '10001'}) is None
+
+    synthetic = LocalGeocoder(centroids, synthetic=True)
+    point = synthetic.geocode({**ADDRESS, 'zip_code': '10001'})
+    assert point is not None
+    assert synthetic.geocode({'zip_code': '10001', 'city': 'New York'}) == point
+
+
+def test_address_change_drops_a_location_that_cannot_be_replaced(db, no_geocoder, monkeypatch):
+    restaurants = RestaurantService(db=db)
+    monkeypatch.setattr(geocoding_service, '_geocoder', LocalGeocoder(synthetic=True))
+    restaurants.update_restaurant_profile('r1', dict(ADDRESS))
+    assert 'location' in db.collection('restaurants').document('r1').get().to_dict()
+
+    set_geocoder(None)
+    profile = restaurants.update_restaurant_profile('r1', {'zip_code': '10001'})
+
+    assert 'location' not in profile
+    assert 'location' not in db.collection('restaurants').document('r1').get().to_dict()
@@ -0,0 +1,63 @@
+# backend/tests/test_identity_map.py
+import pytest
+from flask import Flask
+from google.cloud.firestore_v1 import Increment
+
+from data.identity_map import CachedDocumentSnapshot, current_identity_map, get_document, set_document, update_document
+
+
+@pytest.fixture
+def request_context():
+    app = Flask(__name__)
+    with app.test_request_context('/'):
+        yield
+
+
+def test_repeat_reads_keep_the_document_timestamps(db, request_context):
+    reference = db.collection('orders').document('o1')
+    reference.set({'status': 'pending'})
+
+    first = get_document(reference)
+    second = get_document(reference)
+
+    # The first read is the backend's own snapshot; the repeat comes from the map
+    assert not isinstance(first, CachedDocumentSnapshot)
+    assert isinstance(second, CachedDocumentSnapshot)
+    assert second.to_dict() == first.to_dict()
+    assert second.create_time == first.create_time
+    assert second.update_time == first.update_time
+    assert db.reads['orders'] == 1
+
+
+def test_writes_are_read_back_with_the_write_time(db, request_context):
+    reference = db.collection('orders').document('o1')
+    reference.set({'status': 'pending', 'items': {'a': 1}})
+    get_document(reference)
+
+    result = update_document(reference, {'status': 'confirmed', 'items.b': 2})
+    snapshot = get_document(reference)
+
+    assert snapshot.to_dict() == {'status': 'confirmed', 'items': {'a': 1, 'b': 2}}
+    assert snapshot.get('items.b') == 2
+    assert snapshot.update_time == result.update_time
+    assert db.reads['orders'] == 1
+
+
+def test_server_computed_writes_are_read_again(db, request_context):
+    reference = db.collection('carts').document('c1')
+    set_document(reference, {'version': 1})
+    update_document(reference, {'version': Increment(1)})
+
+    assert get_document(reference).to_dict() == {'version': 2}
+    assert db.reads['carts'] == 1
+    assert current_identity_map().stats() == {'reads': 1, 'reads_saved': 0}
+
+
+def test_merge_into_an_unseen_document_is_not_cached(db, request_context):
+    reference = db.collection('agents').document('a1')
+    reference.set({'name': 'Sam', 'status': 'offline'})
+
+    set_document(reference, {'status': 'available'}, merge=True)
+
+    assert get_document(reference).to_dict() == {'name': 'Sam', 'status': 'available'}
+    assert db.reads['agents'] == 1
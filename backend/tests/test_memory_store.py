@@ -0,0 +1,234 @@
+# backend/tests/test_memory_store.py
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from google.api_core import exceptions
+from google.cloud.firestore_v1.watch import ChangeType
+
+from data.memory_store import DESCENDING, MemoryClient
+from data.repository import run_in_transaction
+
+
+@pytest.fixture
+def client():
+    return MemoryClient()
+
+
+@pytest.fixture
+def scores(client):
+    scores = client.collection('scores')
+    for document_id, data in {
+        'a': {'team': 'red', 'points': 3},
+        'b': {'team': 'blue', 'points': 7},
+        'c': {'team': 'red', 'points': 7},
+        'd': {'team': 'red', 'points': None},
+        'e': {'team': 'blue', 'points': 'forfeit'},
+        'f': {'team': 'red'},
+        'g': {'team': 'blue', 'points': 1.5},
+    }.items():
+        scores.document(document_id).set(data)
+    return scores
+
+
+def _ids(query):
+    return [doc.id for doc in query.stream()]
+
+
+def test_queries_order_by_type_then_value_then_document_id(scores):
+    # null < numbers < strings; documents without the field are left out
+    assert _ids(scores.order_by('points')) == ['d', 'g', 'a', 'b', 'c', 'e']
+    # The document-ID tiebreak follows the last direction
+    assert _ids(scores.order_by('points', direction=DESCENDING)) == ['e', 'c', 'b', 'a', 'g', 'd']
+    assert _ids(scores.where('team', '==', 'red').order_by('points').limit(2)) == ['d', 'a']
+    assert _ids(scores.where('points', '>', 2)) == ['a', 'b', 'c']
+
+
+def test_cursors_resume_after_snapshots_fields_and_values(scores):
+    query = scores.order_by('points', direction=DESCENDING)
+    b = scores.document('b').get()
+
+    assert _ids(query.start_after(b)) == ['a', 'g', 'd']
+    assert _ids(query.start_at(b)) == ['b', 'a', 'g', 'd']
+    # A value-only cursor skips every document with that value
+    assert _ids(query.start_after({'points': 7})) == ['a', 'g', 'd']
+    assert _ids(query.start_after([7, 'c'])) == ['b', 'a', 'g', 'd']
+    assert _ids(query.end_before([3])) == ['e', 'c', 'b']
+    assert _ids(query.start_after(b).end_at([1.5]).limit(5)) == ['a', 'g']
+
+
+def test_equality_indexes_follow_writes(scores):
+    red = scores.where('team', '==', 'red')
+    assert _ids(red) == ['a', 'c', 'd', 'f']
+
+    scores.document('a').update({'team': 'blue'})
+    scores.document('c').delete()
+    scores.document('h').set({'team': 'red', 'points': 0})
+
+    assert _ids(red) == ['d', 'f', 'h']
+    assert _ids(scores.where('team', 'in', ['blue'])) == ['a', 'b', 'e', 'g']
+
+
+def test_aware_and_naive_datetimes_compare_on_one_scale(client):
+    events = client.collection('events')
+    events.document('naive').set({'at': datetime(2026, 1, 1, 12, 0)})
+    events.document('aware').set({'at': datetime(2026, 1, 1, 11, 0, tzinfo=timezone.utc)})
+
+    assert _ids(events.order_by('at')) == ['aware', 'naive']
+    assert _ids(events.where('at', '==', datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc))) == ['naive']
+
+
+def test_a_batch_with_a_failing_write_applies_nothing(client):
+    batch = client.batch()
+    batch.set(client.document('items/x'), {'n': 1})
+    batch.update(client.document('items/missing'), {'n': 2})
+
+    with pytest.raises(exceptions.NotFound):
+        batch.commit()
+    assert not client.document('items/x').get().exists
+
+
+def test_a_transaction_aborts_when_a_read_document_changed(client):
+    counter = client.document('counters/c')
+    counter.set({'n': 0})
+
+    transaction = client.transaction()
+    seen = counter.get(transaction=transaction).to_dict()['n']
+    counter.update({'n': 10})
+    transaction.update(counter, {'n': seen + 1})
+
+    with pytest.raises(exceptions.Aborted):
+        transaction.commit()
+    assert counter.get().to_dict() == {'n': 10}
+
+
+def test_a_transaction_that_read_a_missing_document_aborts_if_it_appears(client):
+    transaction = client.transaction()
+    assert not client.document('claims/o1').get(transaction=transaction).exists
+    client.document('claims/o1').set({'agent': 'other'})
+    transaction.set(client.document('claims/o1'), {'agent': 'me'})
+
+    with pytest.raises(exceptions.Aborted):
+        transaction.commit()
+
+
+def test_run_transaction_retries_conflicts(client):
+    counter = client.document('counters/c')
+    counter.set({'n': 0})
+    attempts = []
+
+    def increment(transaction):
+        n = counter.get(transaction=transaction).to_dict()['n']
+        attempts.append(n)
+        if len(attempts) < 3:
+            # Someone else writes between our read and our commit
+            counter.update({'n': n + 100})
+        transaction.update(counter, {'n': n + 1})
+        return n + 1
+
+    assert run_in_transaction(client, increment) == 201
+    assert attempts == [0, 100, 200]
+    assert counter.get().to_dict() == {'n': 201}
+
+
+def test_run_transaction_gives_up_after_max_attempts(client):
+    counter = client.document('counters/c')
+    counter.set({'n': 0})
+    attempts = []
+
+    def always_conflicts(transaction):
+        attempts.append(counter.get(transaction=transaction).to_dict()['n'])
+        counter.update({'n': len(attempts)})
+        transaction.update(counter, {'n': -1})
+
+    with pytest.raises(exceptions.Aborted):
+        run_in_transaction(client, always_conflicts, max_attempts=3)
+    assert len(attempts) == 3
+    assert counter.get().to_dict() == {'n': 3}
+
+
+def test_other_errors_are_not_retried_and_roll_back(client):
+    attempts = []
+
+    def fails(transaction):
+        attempts.append(1)
+        transaction.set(client.document('items/x'), {'n': 1})
+        raise ValueError("Nothing to claim")
+
+    with pytest.raises(ValueError):
+        run_in_transaction(client, fails)
+    assert attempts == [1]
+    assert not client.document('items/x').get().exists
+
+
+def test_concurrent_increments_all_land(client):
+    counter = client.document('counters/c')
+    counter.set({'n': 0})
+
+    def increment(transaction):
+        n = counter.get(transaction=transaction).to_dict()['n']
+        transaction.update(counter, {'n': n + 1})
+
+    def worker():
+        for _ in range(25):
+            run_in_transaction(client, increment, max_attempts=1000)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.get().to_dict() == {'n': 200}
+
+
+def test_snapshot_listeners_see_the_initial_state_then_each_commit(scores):
+    events = []
+
+    def on_snapshot(docs, changes, read_time):
+        events.append(([doc.id for doc in docs], [(change.type, change.document.id) for change in changes]))
+
+    watch = scores.where('team', '==', 'red').on_snapshot(on_snapshot)
+    scores.document('a').update({'points': 4})
+    scores.document('b').update({'team': 'red'})
+    scores.document('c').update({'team': 'blue'})
+    scores.document('g').update({'points': 2})
+    watch.unsubscribe()
+    scores.document('d').delete()
+
+    assert events == [
+        (['a', 'c', 'd', 'f'], [(ChangeType.ADDED, 'a'), (ChangeType.ADDED, 'c'),
+                                (ChangeType.ADDED, 'd'), (ChangeType.ADDED, 'f')]),
+        (['a', 'c', 'd', 'f'], [(ChangeType.MODIFIED, 'a')]),
+        (['a', 'b', 'c', 'd', 'f'], [(ChangeType.ADDED, 'b')]),
+        (['a', 'b', 'd', 'f'], [(ChangeType.REMOVED, 'c')]),
+    ]
+
+
+def test_writes_from_a_listener_are_delivered_after_the_current_event(client):
+    log = []
+
+    def on_snapshot(docs, changes, read_time):
+        for change in changes:
+            data = change.document.to_dict()
+            log.append((change.document.id, data['step']))
+            if data['step'] < 3:
+                client.document(f'steps/s{data["step"] + 1}').set({'step': data['step'] + 1})
+
+    client.collection('steps').on_snapshot(on_snapshot)
+    client.document('steps/s1').set({'step': 1})
+
+    assert log == [('s1', 1), ('s2', 2), ('s3', 3)]
+
+
+def test_a_failing_listener_does_not_break_writes(client, capsys):
+    def broken(docs, changes, read_time):
+        if changes and changes[0].type != ChangeType.ADDED:
+            raise RuntimeError("boom")
+
+    client.document('items/x').set({'n': 1})
+    client.collection('items').on_snapshot(broken)
+    client.document('items/x').update({'n': 2})
+
+    assert client.document('items/x').get().to_dict() == {'n': 2}
+    assert 'Snapshot listener failed: boom' in capsys.readouterr().out
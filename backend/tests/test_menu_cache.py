@@ -0,0 +1,71 @@
+# backend/tests/test_menu_cache.py
+import pytest
+from firebase_admin import firestore
+
+import services.restaurant_service as restaurant_service_module
+from services.catalog_service import CatalogService
+from services.customer_service import CustomerService
+from services.menu_cache import MenuCache
+from services.restaurant_service import RestaurantService
+
+
+@pytest.fixture
+def menus(db):
+    db.collection('restaurants').document('r1').set({'name': 'Spice Garden', 'cuisine_type': 'Indian', 'is_active': True})
+    db.collection('menu_categories').document('c1').set({'restaurant_id': 'r1', 'name': 'Mains', 'is_active': True})
+    db.collection('menu_items').document('m1').set({'restaurant_id': 'r1', 'category_id': 'c1', 'name': 'Biryani',
+                                                    'price': 12.5, 'is_available': True})
+    catalog = CatalogService(db=db, load_timeout=1)
+    cache = MenuCache()
+    yield CustomerService(db=db, catalog=catalog, menus=cache), cache
+    catalog.stop()
+
+
+def _prices(customers):
+    return {item['name']: item['price']
+            for category in customers.get_restaurant_menu('r1')['categories'] for item in category['items']}
+
+
+def test_the_cached_menu_is_served_while_the_version_holds(db, menus):
+    customers, cache = menus
+    assert _prices(customers) == {'Biryani': 12.5}
+    reads = db.reads['menu_items']
+
+    # Written without a version bump: the cached menu is still served
+    db.collection('menu_items').document('m1').update({'price': 99})
+    assert _prices(customers) == {'Biryani': 12.5}
+    assert db.reads['menu_items'] == reads
+    assert cache.stats()['hits'] >= 1
+
+
+def test_a_menu_version_bump_from_another_instance_rebuilds_the_menu(db, menus):
+    customers, _ = menus
+    assert _prices(customers) == {'Biryani': 12.5}
+
+    # Another worker's RestaurantService: write the item, then bump the stored menu_version
+    db.collection('menu_items').document('m1').update({'price': 14})
+    db.collection('restaurants').document('r1').update({'menu_version': firestore.Increment(1)})
+
+    assert _prices(customers) == {'Biryani': 14}
+
+
+def test_a_local_bump_rebuilds_the_menu_before_the_catalog_sees_the_write(db, menus):
+    customers, cache = menus
+    assert _prices(customers) == {'Biryani': 12.5}
+
+    db.collection('menu_items').document('m1').update({'is_available': False})
+    cache.bump('r1')
+
+    assert _prices(customers) == {}
+
+
+def test_menu_writes_through_the_restaurant_service_bump_both_versions(db, menus, monkeypatch):
+    customers, cache = menus
+    monkeypatch.setattr(restaurant_service_module, 'menu_cache', cache)
+    assert _prices(customers) == {'Biryani': 12.5}
+
+    RestaurantService(db=db).update_menu_item('m1', {'price': '15'})
+
+    assert cache.version('r1', 0)[1] == 1
+    assert db.collection('restaurants').document('r1').get().to_dict()['menu_version'] == 1
+    assert _prices(customers) == {'Biryani': 15.0}
@@ -0,0 +1,85 @@
+# backend/tests/test_order_claims.py
+import threading
+
+import pytest
+
+from services.agent_service import AgentService
+from services.claim_arbiter import ClaimArbiter
+from services.order_lifecycle import OrderLifecycle
+
+AGENTS = 16
+
+
+@pytest.fixture
+def lifecycle(db):
+    lifecycle = OrderLifecycle(db=db)
+    lifecycle.create('o1', {'customer_id': 'c1', 'restaurant_id': 'r1', 'total': 30.0}, 'ready', 'restaurant', 'r1')
+    return lifecycle
+
+
+def _race(accept):
+    """Run accept(agent_id) for every agent at once; returns the agents that got the order"""
+    start = threading.Barrier(AGENTS)
+    winners, errors = [], []
+
+    def contend(agent_id):
+        start.wait()
+        try:
+            accept(agent_id)
+            winners.append(agent_id)
+        except ValueError:
+            pass
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=contend, args=(f'a{i}',)) for i in range(AGENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    return winners
+
+
+def _assignment_events(lifecycle):
+    return [event for event in lifecycle.get_events('o1') if event['to_status'] == 'assigned_to_agent']
+
+
+def test_agents_in_one_process_assign_an_order_once(db, lifecycle):
+    arbiter = ClaimArbiter()
+    agents = AgentService(db=db, lifecycle=lifecycle, arbiter=arbiter)
+
+    winners = _race(lambda agent_id: agents.accept_order(agent_id, 'o1'))
+
+    assert len(winners) == 1
+    assert db.collection('orders').document('o1').get().to_dict()['agent_id'] == winners[0]
+    assert len(_assignment_events(lifecycle)) == 1
+    assert arbiter.granted + arbiter.refused_in_flight + arbiter.refused_taken == AGENTS
+
+
+def test_agents_on_different_workers_assign_an_order_once(db, lifecycle):
+    """Each worker has its own arbiter, so only the transaction settles the race between them"""
+    arbiters = [ClaimArbiter() for _ in range(4)]
+    workers = [AgentService(db=db, lifecycle=lifecycle, arbiter=arbiter) for arbiter in arbiters]
+
+    winners = _race(lambda agent_id: workers[int(agent_id[1:]) % len(workers)].accept_order(agent_id, 'o1'))
+
+    assert len(winners) == 1
+    assert db.collection('orders').document('o1').get().to_dict()['agent_id'] == winners[0]
+    assert len(_assignment_events(lifecycle)) == 1
+    assert sum(arbiter.won for arbiter in arbiters) == 1
+
+
+def test_concurrent_claims_grant_an_order_once():
+    arbiter = ClaimArbiter()
+
+    def claim(agent_id):
+        with arbiter.claim('o1', agent_id):
+            pass
+
+    winners = _race(claim)
+
+    assert len(winners) == 1
+    assert arbiter.stats()['won'] == 1
+    assert arbiter.refused_in_flight + arbiter.refused_taken == AGENTS - 1
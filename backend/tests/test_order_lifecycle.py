@@ -0,0 +1,123 @@
+# backend/tests/test_order_lifecycle.py
+import pytest
+
+from services.order_lifecycle import ORDER_TRANSITIONS, OrderLifecycle, allowed_transitions, current_status
+
+
+@pytest.fixture
+def lifecycle(db):
+    return OrderLifecycle(db=db)
+
+
+def _order(db, order_id='o1'):
+    return db.collection('orders').document(order_id).get().to_dict()
+
+
+def _events(lifecycle, order_id='o1'):
+    return [(event['from_status'], event['to_status'], event['role']) for event in lifecycle.get_events(order_id)]
+
+
+@pytest.mark.parametrize('status, role, allowed', [
+    ('pending', 'restaurant', ['confirmed', 'cancelled']),
+    ('pending', 'customer', ['cancelled']),
+    ('pending', 'agent', []),
+    ('confirmed', 'restaurant', ['preparing', 'ready', 'cancelled']),
+    ('confirmed', 'agent', ['assigned_to_agent']),
+    ('ready', 'agent', ['assigned_to_agent']),
+    ('ready', 'customer', []),
+    ('assigned_to_agent', 'agent', ['picked_up']),
+    ('picked_up', 'agent', ['on_way']),
+    ('on_way', 'agent', ['delivered']),
+    ('delivered', 'restaurant', []),
+    ('cancelled', 'customer', []),
+])
+def test_allowed_transitions_per_role(status, role, allowed):
+    assert allowed_transitions(status, role) == allowed
+
+
+def test_every_target_is_a_known_status():
+    for next_statuses in ORDER_TRANSITIONS.values():
+        assert set(next_statuses) <= set(ORDER_TRANSITIONS)
+
+
+def test_a_transition_sets_its_timestamp_and_appends_an_event(db, lifecycle):
+    lifecycle.create('o1', {'restaurant_id': 'r1'}, 'confirmed', 'customer', 'c1')
+
+    order = lifecycle.transition('o1', 'assigned_to_agent', 'agent', 'a1', updates={'agent_id': 'a1'})
+
+    stored = _order(db)
+    assert order['id'] == 'o1'
+    assert stored['status'] == order['status'] == 'assigned_to_agent'
+    assert stored['agent_id'] == 'a1'
+    assert stored['assigned_at'] == stored['updated_at']
+    assert 'confirmed_at' in stored
+    assert _events(lifecycle) == [(None, 'confirmed', 'customer'), ('confirmed', 'assigned_to_agent', 'agent')]
+    assert lifecycle.get_events('o1')[-1]['actor_id'] == 'a1'
+
+
+@pytest.mark.parametrize('status, new_status, role', [
+    ('pending', 'preparing', 'restaurant'),
+    ('confirmed', 'preparing', 'customer'),
+    ('confirmed', 'picked_up', 'agent'),
+    ('ready', 'assigned_to_agent', 'restaurant'),
+    ('assigned_to_agent', 'on_way', 'agent'),
+    ('picked_up', 'delivered', 'customer'),
+    ('delivered', 'cancelled', 'restaurant'),
+])
+def test_disallowed_transitions_are_refused_and_write_nothing(db, lifecycle, status, new_status, role):
+    lifecycle.create('o1', {'restaurant_id': 'r1'}, status, 'restaurant', 'r1')
+
+    with pytest.raises(ValueError, match='Invalid status transition'):
+        lifecycle.transition('o1', new_status, role, 'x1')
+
+    assert _order(db)['status'] == status
+    assert len(_events(lifecycle)) == 1
+
+
+def test_a_failing_check_refuses_the_transition(db, lifecycle):
+    lifecycle.create('o1', {'restaurant_id': 'r1'}, 'confirmed', 'customer', 'c1')
+
+    def check(order_data):
+        raise ValueError("Order does not belong to this restaurant")
+
+    with pytest.raises(ValueError, match='does not belong'):
+        lifecycle.transition('o1', 'preparing', 'restaurant', 'r2', check=check)
+    assert _order(db)['status'] == 'confirmed'
+    assert len(_events(lifecycle)) == 1
+
+
+def test_a_concurrent_change_makes_the_transition_retry_against_the_new_status(db, lifecycle):
+    lifecycle.create('o1', {'restaurant_id': 'r1'}, 'confirmed', 'customer', 'c1')
+    seen = []
+
+    def check(order_data):
+        seen.append(order_data['status'])
+        if len(seen) == 1:
+            # Another writer cancels the order between this transaction's read and its commit
+            db.collection('orders').document('o1').update({'status': 'cancelled'})
+
+    with pytest.raises(ValueError, match='from cancelled to preparing'):
+        lifecycle.transition('o1', 'preparing', 'restaurant', 'r1', check=check)
+
+    assert seen == ['confirmed', 'cancelled']
+    assert _order(db)['status'] == 'cancelled'
+    assert len(_events(lifecycle)) == 1
+
+
+def test_unknown_orders_and_statuses_are_refused(lifecycle):
+    with pytest.raises(ValueError, match='not found'):
+        lifecycle.transition('missing', 'ready', 'restaurant')
+    with pytest.raises(ValueError, match='Invalid status'):
+        lifecycle.transition('missing', 'eaten', 'customer')
+
+
+def test_legacy_orders_are_read_from_order_status_and_migrated(db, lifecycle):
+    db.collection('orders').document('o1').set({'restaurant_id': 'r1', 'order_status': 'CONFIRMED'})
+    assert current_status(_order(db)) == 'confirmed'
+
+    lifecycle.transition('o1', 'preparing', 'restaurant', 'r1')
+
+    stored = _order(db)
+    assert stored['status'] == 'preparing'
+    assert 'order_status' not in stored
+    assert _events(lifecycle) == [('confirmed', 'preparing', 'restaurant')]
@@ -0,0 +1,74 @@
+# backend/tests/test_pagination.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.pagination import ASCENDING, decode_cursor, encode_cursor, paginate
+
+NOON = datetime(2026, 10, 1, 12, 0)
+
+
+@pytest.fixture
+def orders(db):
+    # Five orders share created_at, so only the document ID tells them apart
+    for i in range(8):
+        created_at = NOON if i < 5 else NOON + timedelta(minutes=i)
+        db.collection('orders').document(f'o{i}').set({'customer_id': 'c1', 'created_at': created_at})
+    db.collection('orders').document('other').set({'customer_id': 'c2', 'created_at': NOON})
+    return db.collection('orders')
+
+
+def _pages(orders_ref, limit, direction='DESCENDING'):
+    query = orders_ref.where('customer_id', '==', 'c1')
+    pages, cursor = [], None
+    while True:
+        snapshots, next_cursor = paginate(query, orders_ref, 'created_at', limit, decode_cursor(cursor), direction)
+        pages.append([doc.id for doc in snapshots])
+        if next_cursor is None:
+            return pages
+        cursor = next_cursor
+
+
+def test_pages_split_equal_sort_values_by_document_id(orders):
+    assert _pages(orders, 3) == [['o7', 'o6', 'o5'], ['o4', 'o3', 'o2'], ['o1', 'o0']]
+    assert _pages(orders, 2, ASCENDING) == [['o0', 'o1'], ['o2', 'o3'], ['o4', 'o5'], ['o6', 'o7']]
+
+
+def test_the_last_page_has_no_cursor(orders):
+    # A full last page still reads one extra document to know nothing follows
+    assert _pages(orders, 4) == [['o7', 'o6', 'o5', 'o4'], ['o3', 'o2', 'o1', 'o0']]
+    assert _pages(orders, 8) == [['o7', 'o6', 'o5', 'o4', 'o3', 'o2', 'o1', 'o0']]
+    assert _pages(orders, 20) == [['o7', 'o6', 'o5', 'o4', 'o3', 'o2', 'o1', 'o0']]
+
+
+def test_cursors_round_trip_datetimes_and_plain_values():
+    cursor = decode_cursor(encode_cursor(NOON, 'o1'))
+    assert (cursor.value.replace(tzinfo=None), cursor.document_id) == (NOON, 'o1')
+    assert cursor.value.tzinfo is not None
+
+    cursor = decode_cursor(encode_cursor(4.5, 'o2'))
+    assert (cursor.value, cursor.document_id) == (4.5, 'o2')
+    assert decode_cursor(None) is None and decode_cursor('') is None
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', '!!!', encode_cursor(1, 'o1')[:-3], 'eyJ2IjoxfQ', 'eyJ2IjoxLCJpZCI6IiJ9'])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor)
+
+
+def test_order_history_pages_through_the_route(orders, customer_client):
+    headers = {'Authorization': 'Bearer customer-token'}
+    first = customer_client.get('/api/customer/orders?limit=5', headers=headers).get_json()
+    second = customer_client.get(f"/api/customer/orders?limit=5&cursor={first['next_cursor']}", headers=headers).get_json()
+
+    assert [order['id'] for order in first['data']] == ['o7', 'o6', 'o5', 'o4', 'o3']
+    assert [order['id'] for order in second['data']] == ['o2', 'o1', 'o0']
+    assert second['next_cursor'] is None
+
+
+def test_a_malformed_cursor_is_a_bad_request(customer_client):
+    response = customer_client.get('/api/customer/orders?cursor=garbage', headers={'Authorization': 'Bearer customer-token'})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Invalid cursor'}
@@ -0,0 +1,71 @@
+# backend/tests/test_pricing.py
+import pytest
+
+from services.cart_store import CartStore
+from services.catalog_service import CatalogService
+from services.customer_service import CustomerService
+from services.order_lifecycle import OrderLifecycle
+from services.pricing_service import PricingService
+
+
+@pytest.fixture
+def pricing(db):
+    db.collection('restaurants').document('r1').set({
+        'name': 'Spice Garden',
+        'settings': {'tax_rate': 10, 'delivery_fee': 2.5, 'min_order_amount': 10}
+    })
+    db.collection('menu_items').document('m1').set({'restaurant_id': 'r1', 'name': 'Biryani', 'price': 12.5})
+    db.collection('menu_items').document('m2').set({'restaurant_id': 'r1', 'name': 'Naan', 'price': 2, 'is_available': False})
+    catalog = CatalogService(db=db, load_timeout=1)
+    yield PricingService(db=db, catalog=catalog)
+    catalog.stop()
+
+
+def test_quote_uses_menu_prices_and_keeps_the_other_item_fields(pricing):
+    quote = pricing.quote('r1', [{
+        'id': 'm1', 'name': 'Biryani', 'price': 0.01, 'line_total': 0.01, 'quantity': 2,
+        'description': 'Hyderabadi', 'image_url': 'https://img/b.png', 'special_instructions': 'extra raita'
+    }])
+
+    line, = quote['items']
+    assert line == {
+        'id': 'm1', 'menu_item_id': 'm1', 'name': 'Biryani', 'price': 12.5, 'quantity': 2, 'line_total': 25.0,
+        'description': 'Hyderabadi', 'image_url': 'https://img/b.png', 'special_instructions': 'extra raita'
+    }
+    assert (quote['subtotal'], quote['delivery_fee'], quote['tax'], quote['total']) == (25.0, 2.5, 2.5, 30.0)
+
+
+@pytest.mark.parametrize('items, error', [
+    ([{'id': 'm2', 'quantity': 1}], 'unavailable'),
+    ([{'id': 'nope', 'quantity': 1}], 'not found'),
+    ([{'id': 'm1', 'quantity': 0}], 'Quantity'),
+])
+def test_invalid_lines_are_refused(pricing, items, error):
+    with pytest.raises(ValueError, match=error):
+        pricing.quote('r1', items)
+
+
+def test_orders_below_the_minimum_are_refused(db, pricing):
+    db.collection('menu_items').document('m3').set({'restaurant_id': 'r1', 'name': 'Tea', 'price': 1.5})
+    db.collection('restaurants').document('r1').update({'menu_version': 1})
+    with pytest.raises(ValueError, match='Minimum order'):
+        pricing.quote('r1', [{'id': 'm3', 'quantity': 1}])
+
+
+@pytest.mark.parametrize('client_total, mismatch', [
+    (30.0, None),
+    (31.5, {'client_total': 31.5, 'priced_total': 30.0, 'difference': 1.5}),
+])
+def test_orders_record_a_paid_amount_that_differs_from_the_priced_total(db, pricing, client_total, mismatch):
+    customers = CustomerService(db=db, catalog=pricing.catalog, pricing=pricing,
+                                carts=CartStore(db=db, flush_interval=60), lifecycle=OrderLifecycle(db=db))
+
+    result = customers.create_order('c1', {
+        'restaurant_id': 'r1', 'items': [{'id': 'm1', 'quantity': 2}],
+        'delivery_address': {'id': 'a1'}, 'total': client_total
+    })
+
+    assert result['success'], result
+    stored = db.collection('orders').document(result['data']['id']).get().to_dict()
+    assert stored['total'] == 30.0
+    assert stored.get('price_mismatch') == mismatch
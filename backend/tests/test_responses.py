@@ -0,0 +1,128 @@
+# backend/tests/test_responses.py
+import enum
+import gzip
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+import middleware.compression as compression
+import utils.json_provider as json_provider
+from middleware.compression import init_compression
+from middleware.http_cache import conditional
+from utils.json_provider import FastJSONProvider
+
+
+class Status(enum.Enum):
+    READY = 'ready'
+
+
+PAYLOAD = {
+    'created_at': datetime(2026, 10, 1, 12, 30, 5, 250000),
+    'paid_at': datetime(2026, 10, 1, 12, 31, tzinfo=timezone.utc),
+    'day': date(2026, 10, 1),
+    'status': Status.READY,
+    'total': Decimal('12.50'),
+    'tags': ['veg'],
+    'count': 3
+}
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    init_compression(app)
+
+    @app.route('/small')
+    def small():
+        return jsonify(PAYLOAD)
+
+    @app.route('/large')
+    @conditional(lambda: 'v1')
+    def large():
+        return jsonify({'orders': [dict(PAYLOAD, id=i) for i in range(50)]})
+
+    return app
+
+
+def _expected(body: dict) -> dict:
+    return dict(body, created_at='2026-10-01T12:30:05.250000', paid_at='2026-10-01T12:31:00+00:00',
+                day='2026-10-01', status='ready', total=12.5)
+
+
+@pytest.mark.parametrize('with_orjson', [True, False])
+def test_datetimes_and_other_types_are_encoded_as_json_values(app, monkeypatch, with_orjson):
+    if not with_orjson:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    elif json_provider.orjson is None:
+        pytest.skip('orjson is not installed')
+
+    response = app.test_client().get('/small')
+
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == _expected(PAYLOAD)
+    # Keys keep their insertion order
+    assert list(json.loads(response.data)) == list(PAYLOAD)
+
+
+def test_values_orjson_refuses_fall_back_to_the_standard_encoder(app):
+    with app.test_request_context():
+        response = app.json.response({'big': 2 ** 70})
+    assert json.loads(response.get_data()) == {'big': 2 ** 70}
+
+
+def test_small_responses_are_not_compressed(app):
+    response = app.test_client().get('/small', headers={'Accept-Encoding': 'gzip'})
+
+    assert len(response.data) < compression.COMPRESSION_MIN_SIZE
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_large_responses_are_gzipped_for_gzip_clients(app):
+    client = app.test_client()
+    plain = client.get('/large')
+    compressed = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+    assert len(plain.data) >= compression.COMPRESSION_MIN_SIZE
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+
+
+def test_brotli_is_preferred_when_installed(app, monkeypatch):
+    class FakeBrotli:
+        @staticmethod
+        def compress(data, quality):
+            return b'br:' + data
+
+    monkeypatch.setattr(compression, 'brotli', FakeBrotli)
+    monkeypatch.setattr(compression, 'CONTENT_ENCODINGS', ('br', 'gzip'))
+    client = app.test_client()
+
+    both = client.get('/large', headers={'Accept-Encoding': 'gzip, br'})
+    gzip_only = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+    assert both.headers['Content-Encoding'] == 'br'
+    assert both.data.startswith(b'br:')
+    assert gzip_only.headers['Content-Encoding'] == 'gzip'
+
+
+def test_the_encoding_suffixed_etag_still_matches(app):
+    client = app.test_client()
+    plain = client.get('/large')
+    compressed = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    plain_tag = plain.get_etag()[0]
+
+    assert compressed.get_etag() == (f"{plain_tag}-gzip", False)
+
+    revalidated = client.get('/large', headers={'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == compressed.headers['ETag']
+
+    assert client.get('/large', headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+    assert client.get('/large', headers={'If-None-Match': '"other-gzip"'}).status_code == 200
+
@@ -0,0 +1,117 @@
+# backend/tests/test_restaurant_listing.py
+import pytest
+from flask import Flask
+
+import routes.customer as customer_routes
+from services.catalog_service import CatalogService
+from services.customer_service import CustomerService
+from services.delivery_area_service import DeliveryAreaService
+
+RESTAURANTS = {
+    'r1': {'name': 'Spice Garden', 'cuisine_type': 'Indian', 'rating': 4.5, 'delivery_time': '30-45 min', 'delivery_fee': 2.5},
+    'r2': {'name': 'Pasta Bar', 'cuisine_type': 'Italian', 'rating': 4.8, 'delivery_time': '20-30 min', 'delivery_fee': 3.0},
+    'r3': {'name': 'Taco Stand', 'cuisine_type': 'Mexican', 'rating': 4.5, 'delivery_time': '15 min', 'delivery_fee': 0},
+    'r4': {'name': 'Noodle House', 'cuisine_type': 'Chinese', 'rating': 3.9, 'delivery_time': 'soon', 'delivery_fee': 1.5},
+    'r5': {'name': 'Curry Corner', 'cuisine_type': 'Indian', 'rating': 4.1, 'delivery_time': '40 min', 'delivery_fee': 2.5},
+}
+
+
+@pytest.fixture
+def catalog(db):
+    for restaurant_id, data in RESTAURANTS.items():
+        db.collection('restaurants').document(restaurant_id).set(dict(data))
+    catalog = CatalogService(db=db, load_timeout=1)
+    yield catalog
+    catalog.stop()
+
+
+@pytest.mark.parametrize('sort, expected', [
+    # Ties are broken by restaurant ID; unparseable delivery times sort last
+    ('rating', ['r2', 'r1', 'r3', 'r5', 'r4']),
+    ('delivery_time', ['r3', 'r2', 'r1', 'r5', 'r4']),
+    ('delivery_fee', ['r3', 'r4', 'r1', 'r5', 'r2']),
+])
+def test_select_walks_the_listing_order(catalog, sort, expected):
+    assert catalog.select(sort) == expected
+    assert catalog.select(sort, count=2) == expected[:2]
+    assert catalog.select(sort, count=0) == []
+    indian = lambda card, data: data['cuisine_type'] == 'Indian'
+    assert catalog.select(sort, accept=indian) == [rid for rid in expected if rid in ('r1', 'r5')]
+
+
+def test_select_among_ranks_a_subset(catalog):
+    subset = ['r4', 'r1', 'r3', 'gone']
+    assert catalog.select_among(subset) == ['r1', 'r3', 'r4']
+    assert catalog.select_among(subset, count=2, sort='delivery_fee') == ['r3', 'r4']
+    distances = {'r1': 0.5, 'r3': 2.0, 'r4': 1.0}
+    assert catalog.select_among(distances, count=2, key=distances.get) == ['r1', 'r4']
+
+
+def test_listing_order_follows_changes(db, catalog):
+    db.collection('restaurants').document('r4').update({'rating': 5.0})
+    db.collection('restaurants').document('r2').delete()
+
+    assert catalog.select('rating') == ['r4', 'r1', 'r3', 'r5']
+
+
+@pytest.fixture
+def client(db, catalog, monkeypatch):
+    customers = CustomerService(db=db, catalog=catalog, delivery_areas=DeliveryAreaService(catalog=catalog))
+    monkeypatch.setattr(customer_routes, 'customer_service', customers)
+    app = Flask(__name__)
+    app.register_blueprint(customer_routes.customer_bp)
+    return app.test_client()
+
+
+def _ids(response):
+    return [restaurant['id'] for restaurant in response.get_json()['data']]
+
+
+def test_pages_cover_the_listing_once(client):
+    pages, offset = [], 0
+    while offset is not None:
+        response = client.get(f'/api/customer/restaurants?sort=rating&limit=2&offset={offset}')
+        pages.append(_ids(response))
+        offset = response.get_json()['next_offset']
+
+    assert pages == [['r2', 'r1'], ['r3', 'r5'], ['r4']]
+
+
+@pytest.mark.parametrize('query, expected_ids, limit, offset', [
+    ('limit=0', ['r2'], 1, 0),
+    ('limit=-5', ['r2'], 1, 0),
+    ('limit=500', ['r2', 'r1', 'r3', 'r5', 'r4'], 100, 0),
+    ('limit=2&offset=-3', ['r2', 'r1'], 2, 0),
+    ('limit=2&offset=10', [], 2, 10),
+    ('', ['r2', 'r1', 'r3', 'r5', 'r4'], None, 0),
+])
+def test_limit_and_offset_are_clamped(client, query, expected_ids, limit, offset):
+    response = client.get(f'/api/customer/restaurants?{query}')
+    body = response.get_json()
+
+    assert _ids(response) == expected_ids
+    assert (body['limit'], body['offset']) == (limit, offset)
+
+
+@pytest.mark.parametrize('query', ['sort=popularity', 'sort=distance'])
+def test_bad_sorts_are_rejected(client, query):
+    assert client.get(f'/api/customer/restaurants?{query}').status_code == 400
+
+
+def test_the_listing_etag_changes_with_a_restaurant(db, client):
+    first = client.get('/api/customer/restaurants?limit=2')
+    etag = first.headers['ETag']
+
+    assert client.get('/api/customer/restaurants?limit=2', headers={'If-None-Match': etag}).status_code == 304
+    # Each page has its own tag
+    assert client.get('/api/customer/restaurants?limit=2&offset=2').headers['ETag'] != etag
+
+    # A change to a restaurant outside the page still changes the listing's content version
+    db.collection('restaurants').document('r4').update({'delivery_fee': 0.5})
+    changed = client.get('/api/customer/restaurants?limit=2', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+    # Writing the same content back restores the same tag
+    db.collection('restaurants').document('r4').update({'delivery_fee': 1.5})
+    assert client.get('/api/customer/restaurants?limit=2', headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,91 @@
+# backend/tests/test_restaurant_search.py
+import pytest
+
+from services.catalog_service import CatalogService
+from services.customer_service import CustomerService
+from services.search_service import SearchService
+
+
+@pytest.fixture
+def restaurants(db):
+    restaurants = db.collection('restaurants')
+    restaurants.document('name').set({'name': 'Pizza Palace', 'cuisine_type': 'Italian',
+                                      'description': 'Wood fired ovens', 'rating': 4.0})
+    restaurants.document('cuisine').set({'name': 'Luigi', 'cuisine_type': 'Pizza',
+                                         'description': 'Family run', 'rating': 4.9})
+    restaurants.document('description').set({'name': 'Corner Deli', 'cuisine_type': 'American',
+                                             'description': 'Sandwiches and pizza by the slice', 'rating': 4.5})
+    restaurants.document('cafe').set({'name': 'Crème Brûlée Café', 'cuisine_type': 'French',
+                                      'description': 'Pastries', 'rating': 4.2})
+    return restaurants
+
+
+@pytest.fixture
+def search(db, restaurants):
+    catalog = CatalogService(db=db, load_timeout=1)
+    yield SearchService(db=db, catalog=catalog)
+    catalog.stop()
+
+
+def _ids(results):
+    return [restaurant['id'] for restaurant in results['restaurants']]
+
+
+def test_name_matches_outrank_cuisine_and_description_matches(search):
+    results = search.search_restaurants('pizza')
+
+    assert _ids(results) == ['name', 'cuisine', 'description']
+    assert results['total'] == 3
+    scores = [restaurant['score'] for restaurant in results['restaurants']]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_prefixes_match_below_whole_words(search, restaurants):
+    restaurants.document('burger').set({'name': 'Burger Barn', 'cuisine_type': 'American'})
+    restaurants.document('burgers').set({'name': 'Burgers Barn', 'cuisine_type': 'American'})
+
+    results = search.search_restaurants('burger')
+
+    # Otherwise identical: "burger" is a whole word in one name and a prefix of "burgers" in the other
+    assert _ids(results) == ['burger', 'burgers']
+    assert results['restaurants'][0]['score'] > results['restaurants'][1]['score']
+    assert set(_ids(search.search_restaurants('piz'))) == {'name', 'cuisine', 'description'}
+
+
+@pytest.mark.parametrize('query', ['creme brulee', 'CRÈME', 'brûl', 'cafe'])
+def test_accents_and_case_are_folded(search, query):
+    assert _ids(search.search_restaurants(query)) == ['cafe']
+
+
+def test_every_query_word_must_match(search):
+    assert _ids(search.search_restaurants('pizza palace')) == ['name']
+    assert _ids(search.search_restaurants('pizza sushi')) == []
+
+
+def test_pages_follow_the_ranking(search):
+    ranked = _ids(search.search_restaurants('pizza', limit=None))
+
+    page = search.search_restaurants('pizza', limit=2, offset=1)
+    assert _ids(page) == ranked[1:3]
+    assert page['total'] == 3
+
+
+def test_the_index_follows_catalog_changes(search, restaurants):
+    assert _ids(search.search_restaurants('palace')) == ['name']
+
+    restaurants.document('name').update({'name': 'Slice Shack'})
+    restaurants.document('cuisine').delete()
+    restaurants.document('new').set({'name': 'Palace of Noodles', 'cuisine_type': 'Chinese'})
+
+    assert _ids(search.search_restaurants('palace')) == ['new']
+    assert _ids(search.search_restaurants('shack')) == ['name']
+    assert 'cuisine' not in search.match_restaurant_ids('pizza')
+
+
+def test_the_listing_search_filter_uses_the_index(db, search):
+    customers = CustomerService(db=db, catalog=search.catalog, search=search)
+
+    listing = customers.get_available_restaurants({'search': 'piz'})
+
+    # Listing order (rating), not relevance
+    assert [restaurant['id'] for restaurant in listing['restaurants']] == ['cuisine', 'description', 'name']
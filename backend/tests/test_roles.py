@@ -0,0 +1,84 @@
+# backend/tests/test_roles.py
+import pytest
+
+from models.roles import ROLE_PERMISSIONS, Permission, RoleHelper, UserRole
+from services.role_service import RoleService
+
+
+@pytest.fixture
+def service(db):
+    for role in UserRole:
+        db.collection('user_roles').document(f'{role.value}-1').set({'role': role.value, 'is_active': True})
+    return RoleService(db=db)
+
+
+@pytest.mark.parametrize('role', list(UserRole))
+def test_masks_match_permission_lists(role):
+    mask = RoleHelper.get_role_permission_mask(role)
+    assert set(RoleHelper.get_mask_permissions(mask)) == set(ROLE_PERMISSIONS[role])
+    for permission in Permission:
+        assert RoleHelper.has_permission(role, permission) == (permission in ROLE_PERMISSIONS[role])
+
+
+@pytest.mark.parametrize('role', list(UserRole))
+def test_service_permissions_come_from_masks(service, role):
+    uid = f'{role.value}-1'
+    assert set(service.get_user_permissions(uid)) == set(ROLE_PERMISSIONS[role])
+    for permission in Permission:
+        assert service.has_permission(uid, permission) == (permission in ROLE_PERMISSIONS[role])
+
+
+def test_user_without_role_has_no_permissions(service):
+    assert service.get_user_permissions('nobody') == []
+    assert not service.has_permission('nobody', Permission.VIEW_PROFILE)
+
+
+@pytest.fixture
+def claims(monkeypatch):
+    """Turn on role claims and record the claims set per user instead of calling Firebase"""
+    import services.role_service as role_service_module
+    claims = {}
+    monkeypatch.setattr(role_service_module, 'ROLE_CLAIMS_ENABLED', True)
+    monkeypatch.setattr(role_service_module.auth, 'get_user', lambda uid: type('User', (), {'custom_claims': claims.get(uid)}))
+    monkeypatch.setattr(role_service_module.auth, 'set_custom_user_claims', lambda uid, value: claims.__setitem__(uid, value))
+    monkeypatch.setattr(role_service_module.auth, 'revoke_refresh_tokens', lambda uid: None)
+    return claims
+
+
+def test_assign_caches_the_new_role(db, service, claims):
+    service.assign_role('new-1', UserRole.AGENT)
+    reads = db.reads['user_roles']
+
+    assert service.get_user_role('new-1') is UserRole.AGENT
+    assert db.reads['user_roles'] == reads
+    assert claims['new-1'] == {'role': 'agent'}
+
+
+def test_update_replaces_the_cached_role(service, claims):
+    assert service.get_user_role('customer-1') is UserRole.CUSTOMER
+
+    service.update_user_role('customer-1', UserRole.AGENT, updated_by='admin-1')
+
+    assert service.get_user_role('customer-1') is UserRole.AGENT
+    assert claims['customer-1'] == {'role': 'agent'}
+
+
+def test_remove_drops_the_cached_role(service, claims):
+    assert service.get_user_role('agent-1') is UserRole.AGENT
+
+    service.remove_user_role('agent-1')
+
+    assert service.get_user_role('agent-1') is None
+    assert service.get_user_permissions('agent-1') == []
+    assert 'role' not in claims['agent-1']
+
+
+def test_updating_a_deactivated_user_grants_nothing(db, service, claims):
+    service.remove_user_role('customer-1')
+
+    service.update_user_role('customer-1', UserRole.ADMIN, updated_by='admin-1')
+
+    assert db.collection('user_roles').document('customer-1').get().to_dict()['role'] == 'admin'
+    assert service.get_user_role('customer-1') is None
+    assert not service.has_permission('customer-1', Permission.VIEW_PROFILE)
+    assert 'role' not in claims['customer-1']
@@ -0,0 +1,47 @@
+# backend/tests/test_search_index.py
+import random
+
+import pytest
+
+from services.search_service import DISH_FIELD_WEIGHTS
+from utils.search_index import SearchIndex
+
+from benchmarks.bench_search import make_dish
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(DISH_FIELD_WEIGHTS)
+    rng = random.Random(7)
+    for i in range(2000):
+        index.add(f'm{i}', make_dish(rng))
+    index.add('biryani', {'name': 'Hyderabadi Biryani', 'description': 'Slow cooked rice'})
+    index.add('pizza', {'name': 'Margherita Pizza', 'description': 'Tomato, mozzarella, basil'})
+    return index
+
+
+@pytest.mark.parametrize('query, doc_id', [('biriyani', 'biryani'), ('margarita', 'pizza'), ('hyderab', 'biryani')])
+def test_misspelled_and_partial_words_match(index, query, doc_id):
+    hits, _ = index.search(query, limit=None)
+    assert doc_id in dict(hits)
+
+
+@pytest.mark.parametrize('query', ['chicken', 'spicy chicken', 'chick', 'chiken', 'pan'])
+def test_pages_follow_the_full_ranking(index, query):
+    ranked, total = index.search(query, limit=None)
+    assert total == len(ranked) > 10
+
+    for offset, limit in [(0, 20), (20, 20), (0, 1), (5, 0), (total - 3, 20)]:
+        page, page_total = index.search(query, limit=limit, offset=offset)
+        assert page == ranked[offset:offset + limit]
+        assert page_total == total
+
+
+def test_removed_and_replaced_documents(index):
+    index.remove('biryani')
+    assert 'biryani' not in index
+    assert index.search('hyderabadi', limit=None)[1] == 0
+
+    index.add('pizza', {'name': 'Neapolitan Pizza'})
+    assert 'pizza' in dict(index.search('neapolitan', limit=None)[0])
+    assert 'pizza' not in dict(index.search('basil', limit=None)[0])
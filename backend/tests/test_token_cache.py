@@ -0,0 +1,120 @@
+# backend/tests/test_token_cache.py
+import pytest
+from cachetools import TLRUCache
+
+from config.firebase import set_token_verifier
+from middleware import auth
+from middleware.auth import TOKEN_REVOCATION_CHECK_INTERVAL, verify_token
+from utils.cache import CountingCache
+
+from tests.conftest import FakeTokenVerifier
+
+NOW = 1_800_000_000
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingVerifier(FakeTokenVerifier):
+    """Also records the check_revoked flag of every verification"""
+
+    def __init__(self, tokens=None):
+        super().__init__(tokens)
+        self.check_revoked = []
+
+    def verify_id_token(self, id_token, check_revoked=False):
+        self.check_revoked.append(check_revoked)
+        return super().verify_id_token(id_token, check_revoked)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    cache = CountingCache(TLRUCache(maxsize=100, ttu=auth._token_expiry, timer=clock))
+    monkeypatch.setattr(auth, 'token_cache', cache)
+    return clock
+
+
+@pytest.fixture
+def verifier():
+    verifier = RecordingVerifier({
+        'long-token': {'uid': 'u1', 'exp': NOW + 3600, 'roles': ['customer']},
+        'short-token': {'uid': 'u2', 'exp': NOW + 100},
+        'expired-token': {'uid': 'u3', 'exp': NOW - 1}
+    })
+    set_token_verifier(verifier)
+    yield verifier
+    set_token_verifier(None)
+
+
+@pytest.fixture
+def claims_mode(monkeypatch):
+    monkeypatch.setattr(auth, 'ROLE_CLAIMS_ENABLED', True)
+
+
+def test_cached_tokens_live_until_their_exp(clock, verifier, monkeypatch):
+    monkeypatch.setattr(auth, 'ROLE_CLAIMS_ENABLED', False)
+    verify_token('long-token')
+
+    clock.now = NOW + 3599
+    verify_token('long-token')
+    assert verifier.calls == 1
+
+    clock.now = NOW + 3600
+    verify_token('long-token')
+    assert verifier.calls == 2
+    assert verifier.check_revoked == [False, False]
+
+
+def test_claims_mode_reverifies_after_the_revocation_interval(clock, verifier, claims_mode):
+    verify_token('long-token')
+
+    clock.now = NOW + TOKEN_REVOCATION_CHECK_INTERVAL - 1
+    verify_token('long-token')
+    assert verifier.calls == 1
+
+    clock.now = NOW + TOKEN_REVOCATION_CHECK_INTERVAL
+    verify_token('long-token')
+    assert verifier.calls == 2
+    assert verifier.check_revoked == [True, True]
+
+
+def test_claims_mode_never_caches_past_exp(clock, verifier, claims_mode):
+    # exp comes before the revocation interval, so exp wins
+    assert NOW + 100 < NOW + TOKEN_REVOCATION_CHECK_INTERVAL
+    verify_token('short-token')
+
+    clock.now = NOW + 99
+    verify_token('short-token')
+    assert verifier.calls == 1
+
+    clock.now = NOW + 100
+    verify_token('short-token')
+    assert verifier.calls == 2
+
+
+def test_expired_and_invalid_tokens_are_not_cached(clock, verifier):
+    verify_token('expired-token')
+    verify_token('expired-token')
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            verify_token('forged-token')
+
+    assert verifier.calls == 4
+    assert len(auth.token_cache) == 0
+
+
+def test_callers_get_a_copy_of_the_cached_claims(clock, verifier):
+    first = verify_token('long-token')
+    first['uid'] = 'someone-else'
+    first['roles'].append('admin')
+
+    second = verify_token('long-token')
+    assert second == {'uid': 'u1', 'exp': NOW + 3600, 'roles': ['customer']}
+    assert second is not verify_token('long-token')
+    assert verifier.calls == 1
@@ -0,0 +1,168 @@
+# backend/tests/test_token_verifier.py
+import threading
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import config.firebase as firebase_config
+import config.token_verifier as token_verifier_module
+from config.token_verifier import InvalidIdTokenError, LocalTokenVerifier, RevokedIdTokenError, StaticKeySource
+
+PROJECT = 'food-delivery-test'
+ISSUER = f'https://securetoken.google.com/{PROJECT}'
+
+
+def _keypair():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return private_key, private_key.public_key()
+
+
+SIGNING_KEY, PUBLIC_KEY = _keypair()
+ROTATED_KEY, ROTATED_PUBLIC_KEY = _keypair()
+
+
+def _token(key=SIGNING_KEY, kid='k1', algorithm='RS256', **overrides):
+    now = int(time.time())
+    claims = {'iss': ISSUER, 'aud': PROJECT, 'sub': 'user-1', 'iat': now - 10, 'exp': now + 3600, 'auth_time': now - 10}
+    claims.update(overrides)
+    return jwt.encode({k: v for k, v in claims.items() if v is not None}, key, algorithm=algorithm,
+                      headers={'kid': kid})
+
+
+class CountingKeySource(StaticKeySource):
+    def __init__(self, keys):
+        super().__init__(keys)
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        return super().fetch()
+
+
+class Users:
+    """Stands in for firebase_admin.auth's user lookup"""
+
+    def __init__(self, disabled=False, tokens_valid_after_timestamp=None):
+        self.user = type('User', (), {'disabled': disabled, 'tokens_valid_after_timestamp': tokens_valid_after_timestamp})
+
+    def get_user(self, uid):
+        return self.user
+
+
+@pytest.fixture
+def keys():
+    return CountingKeySource({'k1': PUBLIC_KEY})
+
+
+@pytest.fixture
+def verifier(keys):
+    return LocalTokenVerifier(PROJECT, key_source=keys, refresh_in_background=False)
+
+
+def test_a_valid_token_is_accepted(verifier):
+    claims = verifier.verify_id_token(_token())
+    assert claims['uid'] == claims['sub'] == 'user-1'
+    assert claims['aud'] == PROJECT
+
+
+@pytest.mark.parametrize('overrides, message', [
+    ({'aud': 'another-project'}, '(?i)audience'),
+    ({'iss': 'https://securetoken.google.com/another-project'}, 'issuer'),
+    ({'exp': int(time.time()) - 60}, 'expired'),
+    ({'iat': None}, 'iat'),
+    ({'sub': ''}, 'subject'),
+    ({'auth_time': int(time.time()) + 600}, 'auth_time'),
+])
+def test_tokens_with_bad_claims_are_rejected(verifier, overrides, message):
+    with pytest.raises(InvalidIdTokenError, match=message):
+        verifier.verify_id_token(_token(**overrides))
+
+
+def test_unsigned_and_hmac_tokens_are_rejected(verifier):
+    unsigned = _token(key=None, algorithm='none')
+    with pytest.raises(InvalidIdTokenError, match='algorithm'):
+        verifier.verify_id_token(unsigned)
+
+    # Only RS256 is accepted, so an HMAC-signed token fails before any key is used
+    hmac = _token(key='not-the-private-key-but-long-enough-for-hs256', algorithm='HS256')
+    with pytest.raises(InvalidIdTokenError, match='algorithm'):
+        verifier.verify_id_token(hmac)
+
+
+def test_a_token_signed_by_another_key_is_rejected(verifier):
+    with pytest.raises(InvalidIdTokenError, match='Signature'):
+        verifier.verify_id_token(_token(key=ROTATED_KEY))
+
+
+@pytest.mark.parametrize('token', ['', None, 'not.a.jwt'])
+def test_malformed_tokens_are_rejected(verifier, token):
+    with pytest.raises(InvalidIdTokenError):
+        verifier.verify_id_token(token)
+
+
+def test_an_unknown_kid_refreshes_the_keys(verifier, keys, monkeypatch):
+    keys.keys = {'k1': PUBLIC_KEY, 'k2': ROTATED_PUBLIC_KEY}
+    rotated = _token(key=ROTATED_KEY, kid='k2')
+
+    # Right after a refresh, another one isn't tried
+    with pytest.raises(InvalidIdTokenError, match='unknown key ID'):
+        verifier.verify_id_token(rotated)
+    assert keys.fetches == 1
+
+    monkeypatch.setattr(token_verifier_module, 'KEY_RETRY_INTERVAL', 0)
+    assert verifier.verify_id_token(rotated)['uid'] == 'user-1'
+    assert keys.fetches == 2
+
+    with pytest.raises(InvalidIdTokenError, match='unknown key ID'):
+        verifier.verify_id_token(_token(kid='k3'))
+
+
+def test_check_revoked(keys):
+    token = _token()
+    issued_at = jwt.decode(token, options={'verify_signature': False})['iat']
+
+    def verify(users, check_revoked=True):
+        verifier = LocalTokenVerifier(PROJECT, key_source=keys, refresh_in_background=False, user_source=users)
+        return verifier.verify_id_token(token, check_revoked=check_revoked)
+
+    assert verify(Users())['uid'] == 'user-1'
+    assert verify(Users(tokens_valid_after_timestamp=(issued_at - 1) * 1000))['uid'] == 'user-1'
+    with pytest.raises(RevokedIdTokenError):
+        verify(Users(tokens_valid_after_timestamp=(issued_at + 1) * 1000))
+    with pytest.raises(InvalidIdTokenError, match='disabled'):
+        verify(Users(disabled=True))
+    # Without check_revoked the user isn't looked up
+    assert verify(Users(disabled=True), check_revoked=False)['uid'] == 'user-1'
+
+
+def test_concurrent_first_use_creates_one_verifier(monkeypatch, keys):
+    created = []
+
+    class SlowVerifier(LocalTokenVerifier):
+        def __init__(self, project_id):
+            created.append(self)
+            time.sleep(0.05)
+            super().__init__(project_id, key_source=keys, refresh_in_background=False)
+
+    monkeypatch.setattr(token_verifier_module, 'LocalTokenVerifier', SlowVerifier)
+    monkeypatch.setattr(firebase_config, 'get_project_id', lambda: PROJECT)
+    monkeypatch.setattr(firebase_config, 'token_verifier', None)
+    monkeypatch.setattr(firebase_config, 'AUTH_VERIFIER', 'local')
+
+    start = threading.Barrier(8)
+    results = []
+
+    def first_request():
+        start.wait()
+        results.append(firebase_config.get_token_verifier())
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict
+
+# Sentinel returned by CountingCache.get() on a miss, so that falsy values
+# (None, empty dicts) can be cached as well
+MISSING = object()
+
+
+def content_digest(value: Any) -> str:
+    """Stable hash of JSON-like content, equal in every process for equal content"""
+    raw = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CountingCache:
+    """Thread-safe wrapper around a cachetools cache that counts hits and misses"""
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Any:
+        """Get a cached value, or MISSING if the key is absent or expired"""
+        with self._lock:
+            try:
+                value = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                return MISSING
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value (expired values are silently dropped by TTL caches)"""
+        with self._lock:
+            self._cache[key] = value
+
+    def pop(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cache)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._cache),
+                'max_size': self._cache.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,132 @@
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LATITUDE = 69.05
+
+
+def haversine_distances(lat: float, lng: float, points: Sequence[Tuple[float, float]]) -> List[float]:
+    """Great-circle distances in miles from one point to many (lat, lng) points
+
+    The origin's terms are computed once, so each extra point costs a
+    handful of float operations.
+    """
+    lat_radians = math.radians(lat)
+    lng_radians = math.radians(lng)
+    cos_lat = math.cos(lat_radians)
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+
+    distances = []
+    for point_lat, point_lng in points:
+        point_lat_radians = radians(point_lat)
+        half_dlat = (point_lat_radians - lat_radians) / 2
+        half_dlng = (radians(point_lng) - lng_radians) / 2
+        a = sin(half_dlat) ** 2 + cos_lat * cos(point_lat_radians) * sin(half_dlng) ** 2
+        distances.append(2 * EARTH_RADIUS_MILES * asin(min(1.0, sqrt(a))))
+    return distances
+
+
+def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in miles between two points"""
+    return haversine_distances(lat1, lng1, [(lat2, lng2)])[0]
+
+
+def parse_coordinates(lat, lng) -> Optional[Tuple[float, float]]:
+    """Validate a latitude/longitude pair (raises ValueError if out of range)"""
+    if lat is None or lng is None:
+        return None
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        raise ValueError("Coordinates must be numbers")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("Coordinates out of range")
+    return lat, lng
+
+
+class GridIndex:
+    """Uniform-grid spatial index of service areas (a point plus a radius in miles)
+
+    Points are bucketed into square cells of cell_miles of latitude. A query
+    only visits the cells within the largest indexed radius of the query
+    point, then keeps the points whose own radius reaches it.
+    """
+
+    def __init__(self, cell_miles: float = 5.0):
+        self.cell_degrees = cell_miles / MILES_PER_DEGREE_LATITUDE
+
+        self._lock = threading.RLock()
+        # (row, column) -> IDs, and ID -> (lat, lng, radius, cell)
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._points: Dict[str, Tuple[float, float, float, Tuple[int, int]]] = {}
+        # radius -> number of points with it, to know how far a query must look
+        self._radius_counts: Dict[float, int] = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def put(self, point_id: str, lat: float, lng: float, radius: float):
+        """Add a service area, or move/resize it"""
+        with self._lock:
+            self.remove(point_id)
+            cell = self._cell(lat, lng)
+            self._cells.setdefault(cell, set()).add(point_id)
+            self._points[point_id] = (lat, lng, radius, cell)
+            self._radius_counts[radius] = self._radius_counts.get(radius, 0) + 1
+
+    def remove(self, point_id: str):
+        """Remove a service area (no-op if it isn't indexed)"""
+        with self._lock:
+            previous = self._points.pop(point_id, None)
+            if previous is None:
+                return
+
+            _, _, radius, cell = previous
+            members = self._cells[cell]
+            members.discard(point_id)
+            if not members:
+                del self._cells[cell]
+
+            count = self._radius_counts[radius] - 1
+            if count:
+                self._radius_counts[radius] = count
+            else:
+                del self._radius_counts[radius]
+
+    def covering(self, lat: float, lng: float) -> List[Tuple[str, float]]:
+        """Get (id, distance) for every service area containing a point, nearest first"""
+        with self._lock:
+            if not self._points:
+                return []
+
+            reach = max(self._radius_counts)
+            lat_span = reach / MILES_PER_DEGREE_LATITUDE
+            # Longitude degrees shrink toward the poles; size the window for the widest row
+            widest_cos = max(math.cos(math.radians(min(89.9, abs(lat) + lat_span))), 0.01)
+            lng_span = min(180.0, lat_span / widest_cos)
+
+            min_row, min_column = self._cell(lat - lat_span, lng - lng_span)
+            max_row, max_column = self._cell(lat + lat_span, lng + lng_span)
+
+            if (max_row - min_row + 1) * (max_column - min_column + 1) > len(self._cells):
+                # The window spans more cells than are occupied: check them all instead
+                candidates = list(self._points)
+            else:
+                candidates = []
+                for row in range(min_row, max_row + 1):
+                    for column in range(min_column, max_column + 1):
+                        candidates.extend(self._cells.get((row, column), ()))
+
+            points = [self._points[point_id] for point_id in candidates]
+
+        distances = haversine_distances(lat, lng, [(point[0], point[1]) for point in points])
+        matches = [(point_id, distance)
+                   for point_id, point, distance in zip(candidates, points, distances)
+                   if distance <= point[2]]
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
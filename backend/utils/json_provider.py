@@ -0,0 +1,69 @@
+import dataclasses
+import decimal
+import enum
+import json
+import uuid
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+from google.cloud.firestore_v1 import DocumentReference, GeoPoint
+from data.memory_store import MemoryDocumentReference
+
+# orjson is optional: without it responses use the standard library encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_json_value(value):
+    """Convert a value json can't encode: datetimes (ISO 8601), enums, Decimals and Firestore types"""
+    if isinstance(value, (datetime, date)):
+        # Also covers Firestore's DatetimeWithNanoseconds
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, GeoPoint):
+        return {'lat': value.latitude, 'lng': value.longitude}
+    if isinstance(value, (DocumentReference, MemoryDocumentReference)):
+        return value.path
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes responses with orjson when it's installed
+
+    Datetimes are written as ISO 8601 (not Flask's default HTTP dates), so
+    Firestore timestamps can be returned as-is. Keys keep their insertion
+    order instead of being sorted.
+    """
+
+    default = staticmethod(to_json_value)
+    sort_keys = False
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        if orjson is not None:
+            options = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+            if indent:
+                options |= orjson.OPT_INDENT_2
+            try:
+                body = orjson.dumps(obj, default=to_json_value, option=options)
+                return self._app.response_class(body, mimetype=self.mimetype)
+            except TypeError:
+                # e.g. integers beyond 64 bits; the standard encoder handles (or reports) them
+                pass
+
+        dump_args = {'indent': 2} if indent else {'separators': (',', ':')}
+        return self._app.response_class(f"{self.dumps(obj, **dump_args)}\n", mimetype=self.mimetype)
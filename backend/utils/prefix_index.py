@@ -0,0 +1,118 @@
+import bisect
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+from cachetools import LRUCache
+from utils.search_index import tokenize
+
+# Most suggestions one prefix can return; each cached prefix keeps this many
+MAX_SUGGESTIONS = 20
+
+# Prefixes whose ranked suggestions are kept between writes
+PREFIX_CACHE_SIZE = 4096
+
+
+def normalize_phrase(text: Optional[str]) -> str:
+    """Fold text to lowercase, accent-free words separated by single spaces"""
+    return ' '.join(tokenize(text))
+
+
+class PrefixIndex:
+    """Weighted prefix lookup over short phrases (names), for autocomplete
+
+    Every word start of a phrase is a key, so "chi" and "bir" both suggest
+    "Chicken Biryani". Keys live in one sorted array and a prefix is a
+    bisect range of it; the best suggestions for a prefix are cached, and a
+    write only drops the cached prefixes of the phrases it changed.
+    """
+
+    def __init__(self, cache_size: int = PREFIX_CACHE_SIZE):
+        self._lock = threading.RLock()
+        # Sorted (key, entry_id); key is a phrase from one of its word starts on
+        self._keys: List[Tuple[str, str]] = []
+        # entry_id -> (text, weight, keys)
+        self._entries: Dict[str, Tuple[str, float, List[str]]] = {}
+        # prefix -> ranked entry IDs (at most MAX_SUGGESTIONS)
+        self._top_cache = LRUCache(maxsize=cache_size)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, entry_id: str) -> bool:
+        with self._lock:
+            return entry_id in self._entries
+
+    # ===== UPDATES =====
+
+    def put(self, entry_id: str, text: str, weight: float = 0.0):
+        """Add an entry, or replace its text and weight"""
+        words = tokenize(text)
+        keys = list(dict.fromkeys(' '.join(words[i:]) for i in range(len(words))))
+
+        with self._lock:
+            previous = self._entries.get(entry_id)
+            if previous is not None and previous[2] == keys:
+                # Same keys: only the ranking can change
+                self._entries[entry_id] = (text, weight, keys)
+                self._invalidate(keys)
+                return
+
+            self.remove(entry_id)
+            if not keys:
+                return
+
+            for key in keys:
+                bisect.insort(self._keys, (key, entry_id))
+            self._entries[entry_id] = (text, weight, keys)
+            self._invalidate(keys)
+
+    def remove(self, entry_id: str):
+        """Remove an entry (no-op if it isn't indexed)"""
+        with self._lock:
+            previous = self._entries.pop(entry_id, None)
+            if previous is None:
+                return
+
+            for key in previous[2]:
+                index = bisect.bisect_left(self._keys, (key, entry_id))
+                del self._keys[index]
+            self._invalidate(previous[2])
+
+    def _invalidate(self, keys: List[str]):
+        for key in keys:
+            for end in range(1, len(key) + 1):
+                self._top_cache.pop(key[:end], None)
+
+    # ===== QUERIES =====
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[str, str, float]]:
+        """Get up to limit (entry_id, text, weight) entries starting with prefix, heaviest first"""
+        prefix = normalize_phrase(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            ranked = self._top_cache.get(prefix)
+            if ranked is None:
+                ranked = self._rank(prefix)
+                self._top_cache[prefix] = ranked
+
+            suggestions = []
+            for entry_id in ranked[:limit]:
+                text, weight, _ = self._entries[entry_id]
+                suggestions.append((entry_id, text, weight))
+            return suggestions
+
+    def _rank(self, prefix: str) -> List[str]:
+        """Scan the key range of a prefix for its best entries"""
+        matched = set()
+        index = bisect.bisect_left(self._keys, (prefix,))
+        while index < len(self._keys) and self._keys[index][0].startswith(prefix):
+            matched.add(self._keys[index][1])
+            index += 1
+
+        entries = self._entries
+        best = heapq.nsmallest(MAX_SUGGESTIONS, matched,
+                               key=lambda entry_id: (-entries[entry_id][1], entries[entry_id][0]))
+        return best
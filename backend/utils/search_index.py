@@ -0,0 +1,327 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from cachetools import LRUCache
+
+_TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Score multiplier for a query word that only matches as a prefix ("piz" -> "pizza")
+PREFIX_MATCH_WEIGHT = 0.7
+
+# Prefixes shorter than this only match exactly, and each expands to at most
+# MAX_PREFIX_EXPANSIONS terms, so one-letter queries can't touch the whole index
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 50
+
+# Per-term score lists kept between writes, so popular words aren't rescored on every query
+TERM_SCORE_CACHE_SIZE = 1024
+
+# Score multiplier for a typo match ("biriyani" -> "biryani"), reduced further per edit
+FUZZY_MATCH_WEIGHT = 0.5
+MAX_FUZZY_EXPANSIONS = 20
+
+
+def max_edits_for(token: str) -> int:
+    """Typos tolerated in a query word: none under 4 letters, 1 up to 5, then 2"""
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) <= 5 else 2
+
+
+def trigrams(term: str) -> Set[str]:
+    """Character trigrams of a term, padded so the first and last letters count too"""
+    padded = f'$${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Edit distance with adjacent transpositions, or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and j > 1 and
+                    a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        # Stop once no cell (including via a transposition from the row before) can get back under
+        if min(current) > max_distance and min(previous) >= max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    return previous[-1] if previous[-1] <= max_distance else max_distance + 1
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Crème Brûlée" -> "creme brulee")"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into folded word tokens"""
+    if not text:
+        return []
+    return _TOKEN_PATTERN.findall(fold(str(text)))
+
+
+class SearchIndex:
+    """Field-weighted inverted index with prefix and typo matching and BM25 scoring
+
+    Each document has a few text fields; a match in a heavier field (e.g. the
+    name) outranks the same match in a lighter one (e.g. the description).
+    Documents are added, replaced and removed one at a time, and a query only
+    touches the posting lists of its own terms, never the whole collection.
+    Query words with no exact match also match terms a few edits away; those
+    are found through a trigram index over the vocabulary, so edit distance is
+    only computed for terms that share most of the word's trigrams.
+
+    Per-document data is kept as tuples in field order, and identical tuples
+    (most postings are "once, in one field") are shared, so millions of menu
+    items fit in memory.
+    """
+
+    def __init__(self, field_weights: Dict[str, float], k1: float = 1.2, b: float = 0.75):
+        self.field_weights = dict(field_weights)
+        self._fields = tuple(self.field_weights)
+        self._weights = tuple(self.field_weights.values())
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        # term -> {doc_id: term frequency per field}
+        self._postings: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        # Sorted vocabulary for prefix lookups, and trigram -> terms for typo lookups
+        self._terms: List[str] = []
+        self._trigram_terms: Dict[str, Set[str]] = {}
+        # doc_id -> token count per field, and doc_id -> its distinct terms
+        self._field_lengths: Dict[str, Tuple[int, ...]] = {}
+        self._document_terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_field_lengths: List[int] = [0] * len(self._fields)
+        # One shared instance of each per-field count tuple
+        self._shared_counts: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+        # (term, weight) -> {doc_id: score}; every write changes the corpus statistics, so it clears this
+        self._term_score_cache = LRUCache(maxsize=TERM_SCORE_CACHE_SIZE)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._field_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            return doc_id in self._field_lengths
+
+    # ===== UPDATES =====
+
+    def add(self, doc_id: str, fields: Dict[str, Optional[str]]):
+        """Index a document, replacing any previous version"""
+        with self._lock:
+            self.remove(doc_id)
+            self._term_score_cache.clear()
+
+            lengths = []
+            frequencies: Dict[str, List[int]] = {}
+            for position, field in enumerate(self._fields):
+                tokens = tokenize(fields.get(field))
+                lengths.append(len(tokens))
+                self._total_field_lengths[position] += len(tokens)
+                for token in tokens:
+                    counts = frequencies.get(token)
+                    if counts is None:
+                        counts = frequencies[token] = [0] * len(self._fields)
+                    counts[position] += 1
+
+            for token, counts in frequencies.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._add_term(token)
+                postings[doc_id] = self._share(tuple(counts))
+
+            self._field_lengths[doc_id] = self._share(tuple(lengths))
+            self._document_terms[doc_id] = tuple(frequencies)
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index (no-op if it isn't indexed)"""
+        with self._lock:
+            lengths = self._field_lengths.pop(doc_id, None)
+            if lengths is None:
+                return
+            self._term_score_cache.clear()
+
+            for position, length in enumerate(lengths):
+                self._total_field_lengths[position] -= length
+
+            for term in self._document_terms.pop(doc_id):
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+                    self._remove_term(term)
+
+    def _share(self, counts: Tuple[int, ...]) -> Tuple[int, ...]:
+        return self._shared_counts.setdefault(counts, counts)
+
+    def _add_term(self, term: str):
+        bisect.insort(self._terms, term)
+        for trigram in trigrams(term):
+            self._trigram_terms.setdefault(trigram, set()).add(term)
+
+    def _remove_term(self, term: str):
+        self._terms.pop(bisect.bisect_left(self._terms, term))
+        for trigram in trigrams(term):
+            terms = self._trigram_terms[trigram]
+            terms.discard(term)
+            if not terms:
+                del self._trigram_terms[trigram]
+
+    # ===== QUERIES =====
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed terms a query token matches, with their match weights"""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+
+        if len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_right(self._terms, token)
+            for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                matches.append((term, PREFIX_MATCH_WEIGHT))
+
+        # Misspelled words: look for close terms when there's no exact match
+        if token not in self._postings:
+            matches.extend(self._fuzzy_terms(token))
+
+        return matches
+
+    def _fuzzy_terms(self, token: str) -> List[Tuple[str, float]]:
+        """Vocabulary terms within a few edits of a token, found via shared trigrams"""
+        max_edits = max_edits_for(token)
+        if not max_edits:
+            return []
+
+        # Each edit changes at most 3 trigrams, so a close term must share the rest
+        token_trigrams = trigrams(token)
+        required = max(1, len(token_trigrams) - 3 * max_edits)
+
+        shared = {}
+        for trigram in token_trigrams:
+            for term in self._trigram_terms.get(trigram, ()):
+                shared[term] = shared.get(term, 0) + 1
+
+        matches = []
+        for term, count in shared.items():
+            if count < required or term.startswith(token):
+                continue
+            distance = bounded_edit_distance(token, term, max_edits)
+            if distance <= max_edits:
+                matches.append((term, FUZZY_MATCH_WEIGHT * (1 - distance / (len(token) + 1))))
+
+        matches.sort(key=lambda match: -match[1])
+        return matches[:MAX_FUZZY_EXPANSIONS]
+
+    def _term_scores(self, term: str, weight: float, document_count: int,
+                     average_lengths: Tuple[float, ...]) -> Dict[str, float]:
+        """BM25F scores of one term in every document containing it"""
+        cached = self._term_score_cache.get((term, weight))
+        if cached is not None:
+            return cached
+
+        postings = self._postings[term]
+        document_frequency = len(postings)
+        idf = weight * math.log(1 + (document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+        k1, b = self.k1, self.b
+        field_weights = tuple(zip(range(len(self._fields)), self._weights, average_lengths))
+        field_lengths = self._field_lengths
+
+        # The count tuples are shared, so documents repeat a few (frequencies, lengths)
+        # pairs over and over; score each pair once
+        pair_scores: Dict[Tuple[int, ...], Dict[Tuple[int, ...], float]] = {}
+        scores = {}
+        for doc_id, frequencies in postings.items():
+            lengths = field_lengths[doc_id]
+            by_lengths = pair_scores.get(frequencies)
+            if by_lengths is None:
+                by_lengths = pair_scores[frequencies] = {}
+            score = by_lengths.get(lengths)
+            if score is None:
+                weighted_frequency = 0.0
+                for position, field_weight, average_length in field_weights:
+                    frequency = frequencies[position]
+                    if frequency:
+                        length_norm = 1 - b + b * lengths[position] / average_length
+                        weighted_frequency += field_weight * frequency / length_norm
+                score = by_lengths[lengths] = idf * weighted_frequency * (k1 + 1) / (weighted_frequency + k1)
+            scores[doc_id] = score
+
+        self._term_score_cache[(term, weight)] = scores
+        return scores
+
+    def score(self, query: str) -> Dict[str, float]:
+        """Score every document matching all query words"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return {}
+
+        with self._lock:
+            document_count = len(self._field_lengths)
+            average_lengths = tuple((total / document_count if document_count else 0) or 1
+                                    for total in self._total_field_lengths)
+            per_token = []
+            for token in tokens:
+                token_scores = {}
+                for term, weight in self._expand(token):
+                    term_scores = self._term_scores(term, weight, document_count, average_lengths)
+                    if not token_scores:
+                        token_scores = dict(term_scores)
+                        continue
+                    for doc_id, term_score in term_scores.items():
+                        if term_score > token_scores.get(doc_id, 0.0):
+                            token_scores[doc_id] = term_score
+                if not token_scores:
+                    return {}
+                per_token.append(token_scores)
+
+        # Every query word must match; start from the rarest
+        per_token.sort(key=len)
+        scores = dict(per_token[0])
+        for token_scores in per_token[1:]:
+            scores = {doc_id: score + token_scores[doc_id]
+                      for doc_id, score in scores.items() if doc_id in token_scores}
+            if not scores:
+                break
+        return scores
+
+    def search(self, query: str, limit: Optional[int] = 20, offset: int = 0,
+               accept: Optional[Callable[[str], bool]] = None) -> Tuple[List[Tuple[str, float]], int]:
+        """Get one page of (doc_id, score) results, best first, and the total match count
+
+        accept, if given, filters matches by document ID before ranking; a
+        limit of None returns every match from offset on.
+        """
+        scores = self.score(query)
+        if accept is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if accept(doc_id)}
+
+        rank = lambda item: (-item[1], item[0])
+        count = None if limit is None else offset + limit
+        if count is None or count >= len(scores):
+            top = sorted(scores.items(), key=rank)
+        elif count <= 0:
+            top = []
+        else:
+            # Find the cut-off score over the bare values, then rank only what reaches it
+            cutoff = heapq.nlargest(count, scores.values())[-1]
+            top = sorted((item for item in scores.items() if item[1] >= cutoff), key=rank)[:count]
+        return top[offset:], len(scores)
@@ -18,6 +18,8 @@ const CartManager = ({ cart, restaurant, onUpdateItem, onRemoveItem, onClearCart
   const [checkingPayment, setCheckingPayment] = useState(false);
   const [orderData, setOrderData] = useState(null);
   const [orderStatus, setOrderStatus] = useState(null);
+  // Server price of the current cart: what the customer is charged and the order stores
+  const [quote, setQuote] = useState(null);
   const [newAddress, setNewAddress] = useState({
     label: '',
     receiver_name: '',
@@ -57,6 +59,30 @@ const CartManager = ({ cart, restaurant, onUpdateItem, onRemoveItem, onClearCart
     }
   };
 
+  // Re-price the cart on the server whenever it changes
+  useEffect(() => {
+    let cancelled = false;
+    setQuote(null);
+    if (!restaurant?.id || cart.length === 0) return;
+
+    customerService.quoteOrder(restaurant.id, getQuoteItems())
+      .then(response => {
+        if (!cancelled && response.success) setQuote(response.data);
+      })
+      .catch(() => {
+        // e.g. below the minimum order: checkout re-prices and reports the reason
+      });
+    return () => { cancelled = true; };
+  }, [cart, restaurant?.id]);
+
+  const getQuoteItems = () => cart.map(item => ({
+    menu_item_id: item.id,
+    name: item.name,
+    quantity: item.quantity,
+    description: item.description || '',
+    image_url: item.image_url || ''
+  }));
+
   const handleAddAddress = async () => {
     try {
       const response = await customerService.addDeliveryAddress(newAddress);
@@ -90,19 +116,23 @@ const CartManager = ({ cart, restaurant, onUpdateItem, onRemoveItem, onClearCart
     }
   };
 
+  // Amounts come from the server quote; until it arrives the subtotal and fee are estimated locally
   const calculateSubtotal = () => {
+    if (quote) return quote.subtotal;
     return cart.reduce((sum, item) => sum + (item.price * item.quantity), 0);
   };
 
   const calculateDeliveryFee = () => {
+    if (quote) return quote.delivery_fee;
     return restaurant?.delivery_fee || 2.99;
   };
 
   const calculateTax = () => {
-    return calculateSubtotal() * 0.18; // 18% GST
+    return quote ? quote.tax : 0;
   };
 
   const calculateTotal = () => {
+    if (quote) return quote.total;
     return calculateSubtotal() + calculateDeliveryFee() + calculateTax();
   };
 
@@ -127,23 +157,32 @@ const CartManager = ({ cart, restaurant, onUpdateItem, onRemoveItem, onClearCart
 
     setIsCheckingOut(true);
     
+    // Price the order on the server before anything is charged: unavailable items
+    // and the minimum order are caught here, and the payment uses the server total
+    let serverQuote;
+    try {
+      const quoteResponse = await customerService.quoteOrder(restaurant.id, getQuoteItems());
+      if (!quoteResponse.success) throw new Error(quoteResponse.error);
+      serverQuote = quoteResponse.data;
+      setQuote(serverQuote);
+    } catch (error) {
+      alert(`Your order can't be placed: ${error.message}`);
+      setIsCheckingOut(false);
+      return;
+    }
+    
     try {
       // Store order data for later creation
       const orderRequestData = {
         restaurant_id: restaurant.id,
-        items: cart.map(item => ({
-          menu_item_id: item.id,
-          name: item.name,
-          price: item.price,
-          quantity: item.quantity
-        })),
+        items: serverQuote.items,
         delivery_address: selectedAddress,
         special_instructions: specialInstructions,
         payment_method: paymentMethod,
-        subtotal: calculateSubtotal(),
-        delivery_fee: calculateDeliveryFee(),
-        tax: calculateTax(),
-        total: calculateTotal()
+        subtotal: serverQuote.subtotal,
+        delivery_fee: serverQuote.delivery_fee,
+        tax: serverQuote.tax,
+        total: serverQuote.total
       };
 
       // For cash on delivery, create order immediately
@@ -401,8 +440,8 @@ const CartManager = ({ cart, restaurant, onUpdateItem, onRemoveItem, onClearCart
             </div>
             
             <div className="flex justify-between items-center">
-              <span className="text-gray-600">Tax (18%)</span>
-              <span className="font-medium text-gray-800">${calculateTax().toFixed(2)}</span>
+              <span className="text-gray-600">Tax{quote ? ` (${quote.tax_rate}%)` : ''}</span>
+              <span className="font-medium text-gray-800">{quote ? `$${calculateTax().toFixed(2)}` : 'Calculating...'}</span>
             </div>
             
             <div className="border-t border-gray-200 pt-3">
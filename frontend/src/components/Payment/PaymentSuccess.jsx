@@ -178,7 +178,7 @@ Please help resolve this issue.`;
               <div className="space-y-1 text-sm text-gray-600">
                 <div><strong>Order #:</strong> {orderDetails.order_number}</div>
                 <div><strong>Amount:</strong> ₹{orderDetails.total?.toFixed(2)}</div>
-                <div><strong>Status:</strong> {orderDetails.order_status}</div>
+                <div><strong>Status:</strong> {orderDetails.status}</div>
                 <div><strong>Restaurant:</strong> {orderDetails.restaurant_name}</div>
                 <div><strong>Delivery Address:</strong> {orderDetails.delivery_address}</div>
                 <div><strong>Payment:</strong> Online (Confirmed)</div>
@@ -96,6 +96,18 @@ class CustomerService {
     }
   }
 
+  async quoteOrder(restaurantId, items) {
+    try {
+      return await this.makeRequest('/customer/orders/quote', {
+        method: 'POST',
+        body: JSON.stringify({ restaurant_id: restaurantId, items }),
+      });
+    } catch (error) {
+      console.error('Error pricing order:', error);
+      throw error;
+    }
+  }
+
   async getMyOrders(status = null, limit = 20) {
     try {
       const queryParams = new URLSearchParams();